@@ -0,0 +1,81 @@
+"""複数のファイルの種類の判定速度(files/sec)を1ファイルずつの判定とまとめて判定する場合で比較する
+
+    python benchmarks/bench_classify.py [--files 1000] [--batch-sizes 1,32,128]
+
+拡張子やマジックナンバーで判定できない形式(ログ、JSON、ソースコード、HTMLなど)のファイルを作成し、
+1ファイルずつMagikaで判定する場合と、FileUtil.get_document_typesでまとめて判定する場合の処理時間を計測します。
+CLASSIFIER_TRUST=magika(常にMagikaで判定)の場合も計測します。
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.model import FileUtilDocumentHandle
+from file_util.util.file_util import FileUtil
+from file_util.util.magika_util import MagikaUtil
+
+
+SAMPLES = {
+    ".log": lambda i: "".join(f"2024-01-01 12:00:{s:02d} INFO worker-{i} processed request {s}\n" for s in range(60)),
+    ".json": lambda i: "{" + ", ".join(f'"key{k}": {{"id": {i}, "values": [1, 2, 3]}}' for k in range(40)) + "}\n",
+    ".py": lambda i: "".join(f"def func_{i}_{k}(x):\n    return x * {k}\n\n" for k in range(40)),
+    ".html": lambda i: "<html><body>" + "".join(f"<p>段落 {k} の本文です。</p>" for k in range(60)) + "</body></html>\n",
+    ".xml": lambda i: "<?xml version='1.0'?><root>" + "".join(f"<item id='{k}'>{i}</item>" for k in range(60)) + "</root>\n",
+    ".txt": lambda i: "日本語のテキストです。\n" * 80,
+}
+
+
+def make_files(root: str, count: int) -> list[str]:
+    random.seed(0)
+    paths = []
+    extensions = list(SAMPLES) + [".bin"]
+    for i in range(count):
+        extension = extensions[i % len(extensions)]
+        path = os.path.join(root, f"file{i:05d}{extension}")
+        if extension == ".bin":
+            data = random.randbytes(4096)
+        else:
+            data = SAMPLES[extension](i).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def per_file(paths: list[str]) -> list[str]:
+    # 1ファイルずつ判定する(従来のFileUtilDocumentHandle.identify)
+    return [FileUtilDocumentHandle(path).identify()[0] for path in paths]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000, help="Number of files to classify")
+    parser.add_argument("--batch-sizes", type=str, default="1,32,128", help="Comma-separated batch sizes")
+    args = parser.parse_args()
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+
+    MagikaUtil.warm_up()
+    config = FileUtilConfig.get_instance()
+    with tempfile.TemporaryDirectory() as root:
+        paths = make_files(root, args.files)
+        print(f"{args.files} files")
+        print(f"{'trust':>10} {'mode':>14} {'time[s]':>8} {'files/s':>9} {'same':>5}")
+        for trust in ("signature", "magika"):
+            config.classifier_trust = trust
+            start = time.perf_counter()
+            expected = per_file(paths)
+            elapsed = time.perf_counter() - start
+            print(f"{trust:>10} {'per file':>14} {elapsed:>8.2f} {len(paths) / elapsed:>9.0f} {'':>5}")
+            for batch_size in batch_sizes:
+                start = time.perf_counter()
+                results = FileUtil.get_document_types(paths, batch_size)
+                elapsed = time.perf_counter() - start
+                same = [r.mime_type for r in results] == expected
+                print(f"{trust:>10} {f'batch {batch_size}':>14} {elapsed:>8.2f} {len(paths) / elapsed:>9.0f} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""エンコーディングの判定時間を従来の実装(データ全体をchardetに渡す)と比較する
+
+    python benchmarks/bench_encoding.py [--mb 4] [--sample-bytes 65536]
+"""
+import argparse
+import random
+import time
+
+from chardet import UniversalDetector
+
+from file_util.util.encoding_util import EncodingUtil
+
+
+def legacy_detect(data: bytes) -> tuple[str | None, float]:
+    # 従来のFileUtilDocument.get_encoding_from_bytes
+    detector = UniversalDetector()
+    detector.feed(data)
+    detector.close()
+    return detector.result["encoding"], detector.result["confidence"]
+
+
+def make_text(size: int) -> str:
+    # ログやCSVを想定した日本語を含むテキスト
+    random.seed(0)
+    words = ["受注番号", "顧客名", "東京都千代田区", "処理が完了しました", "エラー", "ＡＢＣ", "2024-01-01", "INFO", "12345"]
+    lines = []
+    total = 0
+    while total < size:
+        line = ",".join(random.choice(words) for _ in range(8)) + "\n"
+        lines.append(line)
+        total += len(line) * 2
+    return "".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=4, help="Approximate size of each corpus in MB")
+    parser.add_argument("--sample-bytes", type=int, default=64 * 1024, help="Sample size of the fast detector")
+    args = parser.parse_args()
+
+    text = make_text(args.mb * 1024 * 1024)
+    corpora = {
+        "shift_jis": text.encode("shift_jis"),
+        "euc-jp": text.encode("euc-jp"),
+        "utf-8": text.encode("utf-8"),
+        "utf-8 (ascii head)": ("log line\n" * 200000 + text).encode("utf-8"),
+        "utf-8-sig": text.encode("utf-8-sig"),
+    }
+    print(f"{'corpus':>20} {'MB':>6} {'legacy':>22} {'[s]':>7} {'fast':>22} {'method':>8} {'[s]':>7} {'sampled':>8}")
+    for name, data in corpora.items():
+        start = time.perf_counter()
+        legacy_encoding, legacy_confidence = legacy_detect(data)
+        legacy_time = time.perf_counter() - start
+        result = EncodingUtil.detect(data, args.sample_bytes)
+        print(f"{name:>20} {len(data) / (1024 * 1024):>6.1f} "
+              f"{f'{legacy_encoding} ({legacy_confidence:.2f})':>22} {legacy_time:>7.3f} "
+              f"{f'{result.encoding} ({result.confidence:.2f})':>22} {result.method:>8} "
+              f"{result.elapsed_seconds:>7.3f} {result.sampled_bytes:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Word/PowerPointのテキスト抽出エンジン(オブジェクトモデル / ooxml)の処理時間とメモリ使用量を比較する
+
+    python benchmarks/bench_ooxml.py [--paragraphs 20000] [--slides 500] [--repeat 3]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_data import make_docx, make_pptx  # noqa: E402
+
+from file_util.util.ppt_util import PPTUtil  # noqa: E402
+from file_util.util.word_util import WordUtil  # noqa: E402
+
+
+def measure(func, path: str, engine: str, repeat: int) -> tuple[float, float, int]:
+    """平均処理時間[s]、最大RSS[MB]、出力文字数を返す
+
+    lxml(python-docx / python-pptx)のメモリはtracemallocで捕捉できないため、
+    別プロセスで実行して最大RSSを計測します。
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(_run, (func, path, engine, repeat))
+
+
+def _run(func, path: str, engine: str, repeat: int) -> tuple[float, float, int]:
+    import resource
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text = func(path, engine)
+    elapsed = (time.perf_counter() - start) / repeat
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return elapsed, max_rss, len(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--slides", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docx_path = os.path.join(tmp, "synthetic.docx")
+        pptx_path = os.path.join(tmp, "synthetic.pptx")
+        make_docx(docx_path, args.paragraphs, table_rows=args.paragraphs // 20)
+        make_pptx(pptx_path, args.slides)
+
+        print(f"{'format':<6} {'engine':<12} {'time[s]':>9} {'MB/s':>8} {'rss[MB]':>9} {'chars':>10}")
+        for label, func, path, engines in [
+            ("docx", WordUtil.extract_text_from_docx, docx_path, ["python-docx", "ooxml"]),
+            ("pptx", PPTUtil.extract_text_from_pptx, pptx_path, ["python-pptx", "ooxml"]),
+        ]:
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            for engine in engines:
+                elapsed, peak, chars = measure(func, path, engine, args.repeat)
+                print(f"{label:<6} {engine:<12} {elapsed:>9.3f} {size_mb / elapsed:>8.2f} {peak:>9.1f} {chars:>10}")
+
+
+if __name__ == "__main__":
+    main()
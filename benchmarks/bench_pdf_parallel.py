@@ -0,0 +1,43 @@
+"""PDFの逐次抽出とページ並列抽出の処理時間を比較する
+
+    python benchmarks/bench_pdf_parallel.py [--pages 10,100,1000] [--workers N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_data import make_pdf  # noqa: E402
+
+from file_util.util.pdf_util import PDFUtil  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", default="10,100,1000", help="Comma-separated page counts")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--pages-per-task", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'sequential[s]':>14} {'parallel[s]':>12} {'speedup':>8} identical")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in [int(p) for p in args.pages.split(",")]:
+            path = os.path.join(tmp, f"synthetic_{pages}.pdf")
+            make_pdf(path, pages)
+
+            start = time.perf_counter()
+            sequential = PDFUtil.extract_text_from_pdf(path)
+            sequential_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parallel = PDFUtil.extract_text_from_pdf_parallel(path, args.workers, args.pages_per_task)
+            parallel_time = time.perf_counter() - start
+
+            print(f"{pages:>6} {sequential_time:>14.3f} {parallel_time:>12.3f} "
+                  f"{sequential_time / parallel_time:>8.2f} {sequential == parallel}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""テキストのサニタイズの処理時間とピークメモリを従来の実装(re.subを2回適用)と比較する
+
+    python benchmarks/bench_sanitize.py [--mchars 50] [--chunk-chars 1048576]
+"""
+import argparse
+import random
+import re
+import time
+import tracemalloc
+
+from file_util.util.text_sanitizer import TextSanitizer
+
+
+def legacy_sanitize(text: str) -> str:
+    # 従来のFileUtil.sanitize_text
+    text = re.sub(r'\n+', '\n', text)
+    return re.sub(r' +', ' ', text)
+
+
+def make_text(chars: int) -> str:
+    # 改行・空白の連続、CRLF、全角スペース、全角英数字を含む日本語のテキスト
+    random.seed(0)
+    words = ["日本語の文書", "テキスト抽出", "ＡＢＣ１２３", "ｶﾞｲﾄﾞ", "file_util", "。", "、"]
+    separators = [" ", "  ", "　", "\t", "\n", "\r\n", "\r\n\r\n", "\n\n\n"]
+    parts = []
+    size = 0
+    while size < chars:
+        part = random.choice(words) + random.choice(separators)
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def measure(func) -> tuple[float, float]:
+    # tracemallocは処理時間に影響するため、処理時間とピークメモリは別々に計測する
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mchars", type=int, default=50, help="Size of the synthetic text in millions of characters")
+    parser.add_argument("--chunk-chars", type=int, default=1024 * 1024, help="Characters per chunk for the streaming sanitizer")
+    args = parser.parse_args()
+
+    text = make_text(args.mchars * 1000 * 1000)
+    chunks = [text[i:i + args.chunk_chars] for i in range(0, len(text), args.chunk_chars)]
+
+    def stream(rules: tuple[str, ...]) -> None:
+        # チャンクごとの出力は保持せずに破棄する(逐次書き出す場合を想定)
+        for _ in TextSanitizer(rules).iter_sanitized(chunks):
+            pass
+
+    cases = [
+        ("legacy re.sub x2", lambda: legacy_sanitize(text)),
+        ("sanitize()", lambda: TextSanitizer().sanitize(text)),
+        ("stream", lambda: stream(())),
+        ("stream crlf,ws", lambda: stream(("crlf", "whitespace"))),
+        ("stream crlf,ws,nfkc", lambda: stream(("crlf", "whitespace", "nfkc"))),
+    ]
+    print(f"{len(text) / 1e6:.1f}M chars, chunk {args.chunk_chars} chars")
+    print(f"{'mode':>22} {'time[s]':>8} {'Mchars/s':>9} {'peak[MB]':>9}")
+    for name, func in cases:
+        elapsed, peak = measure(func)
+        print(f"{name:>22} {elapsed:>8.2f} {len(text) / 1e6 / elapsed:>9.1f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
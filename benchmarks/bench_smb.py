@@ -0,0 +1,63 @@
+"""SMB/CIFS上のファイルの一括抽出を、プロセス内のSMBサーバー(InMemorySMBClient)を使って計測する
+
+    python benchmarks/bench_smb.py [--files 200] [--latency 0.005] [--pdf-pages 5]
+
+実際のSMBサーバーの代わりにテスト用のInMemorySMBClient(tests/smb_stub.py)をSMBStorageに渡し、smb:// のディレクトリに置いた
+テキストファイルとPDFファイルからextract_text_from_directoryでテキストを並列に抽出します。
+要求ごとにlatency秒待つことでネットワークの往復時間を模擬し、登録されたセッション数(1であること)と
+要求数、読み込んだバイト数を表示します。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic_data import make_pdf  # noqa: E402
+from tests.smb_stub import InMemorySMBClient  # noqa: E402
+
+from file_util.core.app import extract_text_from_directory  # noqa: E402
+from file_util.util.storage_util import SMBStorage, StorageUtil  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="Number of files on the share")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds to wait per SMB request")
+    parser.add_argument("--pdf-pages", type=int, default=5, help="Pages of each PDF file")
+    args = parser.parse_args()
+
+    client = InMemorySMBClient(latency=args.latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "sample.pdf")
+        make_pdf(pdf_path, args.pdf_pages)
+        with open(pdf_path, "rb") as f:
+            pdf_data = f.read()
+    for i in range(args.files):
+        if i % 4 == 0:
+            client.put(f"\\\\fileserver\\docs\\reports\\report{i:04d}.pdf", pdf_data)
+        else:
+            client.put(f"\\\\fileserver\\docs\\notes\\note{i:04d}.txt", f"議事録 {i}\n本文です。\n".encode("utf-8") * 50)
+
+    storage = SMBStorage("fileserver", "docs", client=client)
+    StorageUtil.register_storage(StorageUtil.SMB_PREFIX, storage)
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(extract_text_from_directory("smb://fileserver/docs"))
+        elapsed = time.perf_counter() - start
+    finally:
+        StorageUtil.unregister_storage(StorageUtil.SMB_PREFIX)
+
+    errors = [result for result in results if result.error]
+    stats = client.get_stats()
+    print(f"{len(results)} files, {len(errors)} errors, {elapsed:.2f} s, {len(results) / elapsed:.0f} files/s")
+    print(f"sessions: {stats['sessions']}, requests: {stats['requests']}, storage: {storage.get_stats()}")
+    for result in errors[:5]:
+        print(f"  {result.file_path}: {result.error}")
+
+
+if __name__ == "__main__":
+    main()
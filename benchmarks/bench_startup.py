@@ -0,0 +1,98 @@
+"""MCPサーバー(stdio)の起動から最初の応答までの時間とメモリ使用量(RSS)を計測する
+
+    python benchmarks/bench_startup.py [--runs 5] [--prewarm]
+
+サーバーを起動してinitializeとtools/listを送信し、それぞれの応答までの時間と、
+tools/listの応答時点・(--prewarmの場合は)事前ロードの完了後のRSSを表示します。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def read_rss_mb(pid: int) -> float | None:
+    # /proc/<pid>/status のVmRSSを読む(Linuxのみ)
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def request(proc: subprocess.Popen, message: dict) -> dict | None:
+    proc.stdin.write(json.dumps(message) + "\n")
+    proc.stdin.flush()
+    if "id" not in message:
+        return None
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError("The server exited before responding")
+        response = json.loads(line)
+        if response.get("id") == message["id"]:
+            return response
+
+
+def run_once(prewarm: bool, settle_seconds: float) -> dict:
+    command = [sys.executable, "-m", "file_util.mcp.mcp_server"] + (["--prewarm"] if prewarm else [])
+    env = dict(os.environ, LOGLEVEL="WARNING")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env,
+    )
+    try:
+        request(proc, {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "bench", "version": "0"}},
+        })
+        initialize_seconds = time.perf_counter() - start
+        request(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        response = request(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        list_tools_seconds = time.perf_counter() - start
+        rss = read_rss_mb(proc.pid)
+        settled_rss = None
+        if settle_seconds > 0:
+            time.sleep(settle_seconds)
+            settled_rss = read_rss_mb(proc.pid)
+        return {
+            "initialize": initialize_seconds,
+            "list_tools": list_tools_seconds,
+            "tools": len(response["result"]["tools"]),
+            "rss": rss,
+            "settled_rss": settled_rss,
+        }
+    finally:
+        proc.stdin.close()
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of server launches")
+    parser.add_argument("--prewarm", action="store_true", help="Start the server with --prewarm")
+    parser.add_argument("--settle", type=float, default=0.0, help="Seconds to wait before reading the RSS again")
+    args = parser.parse_args()
+
+    results = [run_once(args.prewarm, args.settle) for _ in range(args.runs)]
+    print(f"runs={args.runs} prewarm={args.prewarm} tools={results[0]['tools']}")
+    for key, label, unit in (
+        ("initialize", "time to initialize response", "s"),
+        ("list_tools", "time to tools/list response", "s"),
+        ("rss", "RSS at tools/list", "MB"),
+        ("settled_rss", f"RSS after {args.settle:.1f} s", "MB"),
+    ):
+        values = [r[key] for r in results if r[key] is not None]
+        if values:
+            print(f"{label:>30}: median {statistics.median(values):.3f} {unit} (min {min(values):.3f}, max {max(values):.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""ベンチマーク用の合成データを生成する"""
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 40) -> None:
+    """テキストのみを含む合成PDFファイルを生成する
+
+    Args:
+        path: 出力先のファイルパス
+        pages: ページ数
+        lines_per_page: 1ページあたりの行数
+    """
+    # 1: Catalog, 2: Pages, 3: Font, 4以降: ページごとに Page と Contents
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(pages)), pages)).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        lines = " ".join(
+            f"(Page {i + 1} line {j + 1}: the quick brown fox jumps over the lazy dog) '"
+            for j in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 40 760 Td 12 TL {lines} ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def make_docx(path: str, paragraphs: int, table_rows: int = 0) -> None:
+    """段落と表を含む合成DOCXファイルを生成する
+
+    Args:
+        path: 出力先のファイルパス
+        paragraphs: 段落数
+        table_rows: 表の行数。0の場合は表を作成しない
+    """
+    import docx
+
+    document = docx.Document()
+    for i in range(paragraphs):
+        document.add_paragraph(f"Paragraph {i + 1}: 吾輩は猫である。名前はまだ無い。 the quick brown fox")
+    if table_rows:
+        table = document.add_table(rows=table_rows, cols=4)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = f"r{r}c{c}"
+    document.save(path)
+
+
+def make_pptx(path: str, slides: int) -> None:
+    """タイトルと本文を含む合成PPTXファイルを生成する
+
+    Args:
+        path: 出力先のファイルパス
+        slides: スライド数
+    """
+    import pptx
+
+    presentation = pptx.Presentation()
+    layout = presentation.slide_layouts[1]
+    for i in range(slides):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {i + 1}"
+        slide.placeholders[1].text = "\n".join(f"Bullet {j + 1} of slide {i + 1}" for j in range(8))
+    presentation.save(path)
+
+
+def make_file_tree(root: str, files: int, file_size: int, compressible: bool = True) -> None:
+    """ZIPのベンチマーク用にファイルを含むディレクトリを生成する
+
+    Args:
+        root: 出力先のディレクトリ
+        files: ファイル数
+        file_size: 1ファイルあたりのサイズ(バイト)
+        compressible: Trueの場合はテキスト、Falseの場合は乱数(圧縮済みデータ相当)で埋める
+    """
+    import os
+
+    line = b"the quick brown fox jumps over the lazy dog 0123456789\n"
+    for i in range(files):
+        directory = os.path.join(root, f"dir{i % 10:02d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i:05d}.txt"), "wb") as f:
+            if compressible:
+                f.write((line * (file_size // len(line) + 1))[:file_size])
+            else:
+                f.write(os.urandom(file_size))
@@ -1,23 +1,74 @@
-from fastapi import FastAPI, APIRouter
+from contextlib import asynccontextmanager
+import asyncio
+import os
+from typing import Annotated, Literal, Optional
+from fastapi import FastAPI, APIRouter, Query, Request, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from file_util.core.app import (
     get_document_type,
     get_mime_type,
+    get_document_types,
+    detect_encoding,
     get_sheet_names,
     extract_excel_sheet,
     extract_text_from_file,
     extract_base64_to_text,
     extract_text_from_file,
     list_zip_contents,
+    list_zip_members,
+    extract_zip_member,
+    extract_text_from_zip_member,
     extract_zip,
     create_zip,
+    get_extraction_cache_stats,
+    get_executor_stats,
+    get_storage_stats,
+    get_encoding_stats,
+    get_classifier_stats,
+    get_diagnostics,
+    extract_text_from_directory,
+    iter_text_from_directory,
+    iter_text_from_file,
+    extract_chunks_from_file,
+    iter_chunks_from_file,
+    extract_text_from_zip,
+    index_directory,
+    iter_text_from_zip,
 )
-app = FastAPI()
+from file_util.model import FileUtilStreamExtractionResult
+from file_util.util.file_util import FileUtil
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.util.executor_util import ExecutorUtil
+from file_util.util.metrics_util import MetricsUtil
+
+# アップロードされたデータを読み込む際のチャンクサイズ
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # PREWARM_ON_STARTUPが有効な場合は、起動を待たせないようにバックグラウンドでパーサーとMagikaのモデルをロードする
+    prewarm_task = None
+    if FileUtilConfig.get_instance().prewarm_on_startup:
+        prewarm_task = asyncio.create_task(asyncio.to_thread(FileUtil.prewarm))
+    try:
+        yield
+    finally:
+        # 事前ロードが完了していない場合はキャンセルしてからワーカープールを終了する
+        await ExecutorUtil.cancel_task(prewarm_task)
+        ExecutorUtil.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 router = APIRouter()
 # get_document_type
 router.add_api_route(path='/get_document_type', endpoint=get_document_type, methods=['GET'])
 # get_mime_type
 router.add_api_route(path='/get_mime_type', endpoint=get_mime_type, methods=['GET'])
+# get_document_types
+router.add_api_route(path='/get_document_types', endpoint=get_document_types, methods=['POST'])
+
+# detect_encoding
+router.add_api_route(path='/detect_encoding', endpoint=detect_encoding, methods=['GET'])
  
 # get_sheet_names
 router.add_api_route(path='/get_sheet_names', endpoint=get_sheet_names, methods=['GET'])
@@ -27,22 +78,136 @@ router.add_api_route(path='/extract_excel_sheet', endpoint=extract_excel_sheet,
 # extract_text_from_file
 router.add_api_route(path='/extract_text_from_file', endpoint=extract_text_from_file, methods=['POST'])
 
+# multipart/form-dataでアップロードされたファイルからテキストを抽出する
+async def extract_uploaded_file(file: UploadFile) -> FileUtilStreamExtractionResult:
+    async def chunks():
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+    extension = os.path.splitext(file.filename or "")[1].lstrip(".")
+    return await FileUtil.extract_text_from_stream_async(chunks(), extension)
+
+router.add_api_route(path='/extract_uploaded_file', endpoint=extract_uploaded_file, methods=['POST'])
+
+# リクエストボディ(application/octet-stream、chunked転送可)として送信されたデータからテキストを抽出する
+async def extract_request_body(request: Request, extension: str = "") -> FileUtilStreamExtractionResult:
+    return await FileUtil.extract_text_from_stream_async(request.stream(), extension)
+
+router.add_api_route(path='/extract_request_body', endpoint=extract_request_body, methods=['POST'])
+
+# extract_text_from_file の結果をPDFの場合はページごとに返す
+async def extract_text_from_file_stream(
+    file_path: str,
+    page_range: Optional[str] = None,
+    max_chars: Optional[int] = None,
+    ) -> StreamingResponse:
+    return StreamingResponse(iter_text_from_file(file_path, page_range, max_chars), media_type="text/plain; charset=utf-8")
+
+router.add_api_route(path='/extract_text_from_file_stream', endpoint=extract_text_from_file_stream, methods=['POST'])
+
+# extract_chunks_from_file
+router.add_api_route(path='/extract_chunks_from_file', endpoint=extract_chunks_from_file, methods=['POST'])
+
+# extract_chunks_from_file のチャンクを1つずつNDJSONで返す
+async def extract_chunks_from_file_stream(
+    file_path: str,
+    max_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    unit: Literal["chars", "tokens"] = "chars",
+    ) -> StreamingResponse:
+    async def generate():
+        async for chunk in iter_chunks_from_file(file_path, max_size, overlap, unit):
+            yield chunk.model_dump_json() + "\n"
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+router.add_api_route(path='/extract_chunks_from_file_stream', endpoint=extract_chunks_from_file_stream, methods=['POST'])
+
 # extract_base64_to_text
 router.add_api_route(path='/extract_base64_to_text', endpoint=extract_base64_to_text, methods=['GET'])
 
 # extract_text_from_file
 router.add_api_route(path='/extract_text_from_file', endpoint=extract_text_from_file, methods=['POST'])
 
+# extract_text_from_directory
+router.add_api_route(path='/extract_text_from_directory', endpoint=extract_text_from_directory, methods=['POST'])
+
+# extract_text_from_directory の結果を1ファイルずつNDJSONで返す
+async def extract_text_from_directory_stream(
+    root_path: Optional[str] = None,
+    file_paths: Annotated[Optional[list[str]], Query()] = None,
+    include_patterns: Annotated[Optional[list[str]], Query()] = None,
+    exclude_patterns: Annotated[Optional[list[str]], Query()] = None,
+    recursive: bool = True,
+    ) -> StreamingResponse:
+    async def generate():
+        async for result in iter_text_from_directory(root_path, file_paths, include_patterns, exclude_patterns, recursive):
+            yield result.model_dump_json() + "\n"
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+router.add_api_route(path='/extract_text_from_directory_stream', endpoint=extract_text_from_directory_stream, methods=['POST'])
+
+# index_directory
+router.add_api_route(path='/index_directory', endpoint=index_directory, methods=['POST'])
+
+# extract_text_from_zip
+router.add_api_route(path='/extract_text_from_zip', endpoint=extract_text_from_zip, methods=['POST'])
+
+# extract_text_from_zip の結果を1メンバーずつNDJSONで返す
+async def extract_text_from_zip_stream(
+    file_path: str,
+    password: Optional[str] = None,
+    max_depth: Optional[int] = None,
+    ) -> StreamingResponse:
+    async def generate():
+        async for result in iter_text_from_zip(file_path, password, max_depth):
+            yield result.model_dump_json() + "\n"
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+router.add_api_route(path='/extract_text_from_zip_stream', endpoint=extract_text_from_zip_stream, methods=['POST'])
+
 # ZIPファイルの内容をリストする関数
 router.add_api_route(path='/list_zip_contents', endpoint=list_zip_contents, methods=['GET'])
 
+# ZIPファイルのメンバーの情報をページ単位でリストする関数
+router.add_api_route(path='/list_zip_members', endpoint=list_zip_members, methods=['GET'])
+
+# ZIPファイルの1つのメンバーを展開する関数
+router.add_api_route(path='/extract_zip_member', endpoint=extract_zip_member, methods=['POST'])
+
+# ZIPファイルの1つのメンバーからテキストを抽出する関数
+router.add_api_route(path='/extract_text_from_zip_member', endpoint=extract_text_from_zip_member, methods=['POST'])
+
 # ZIPファイルを展開する関数
 router.add_api_route(path='/extract_zip', endpoint=extract_zip, methods=['POST'])
 
 # ZIPファイルを作成する関数
 router.add_api_route(path='/create_zip', endpoint=create_zip, methods=['POST'])
 
+# 抽出結果キャッシュの統計情報を取得する関数
+router.add_api_route(path='/get_extraction_cache_stats', endpoint=get_extraction_cache_stats, methods=['GET'])
+
+# ワーカープールの統計情報を取得する関数
+router.add_api_route(path='/get_executor_stats', endpoint=get_executor_stats, methods=['GET'])
+
+# ストレージの読み込みの統計情報を取得する関数
+router.add_api_route(path='/get_storage_stats', endpoint=get_storage_stats, methods=['GET'])
+
+# エンコーディングの判定の統計情報を取得する関数
+router.add_api_route(path='/get_encoding_stats', endpoint=get_encoding_stats, methods=['GET'])
+
+# ファイルの種類の判定の統計情報を取得する関数
+router.add_api_route(path='/get_classifier_stats', endpoint=get_classifier_stats, methods=['GET'])
+
+# 処理段階ごとの処理時間と各種統計情報を取得する関数
+router.add_api_route(path='/get_diagnostics', endpoint=get_diagnostics, methods=['GET'])
+
 app.include_router(router, prefix="/api/file_util")
+
+# 処理段階・形式ごとの処理時間のヒストグラムとバイト数をPrometheusのテキスト形式で返す
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(MetricsUtil.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+app.add_api_route(path='/metrics', endpoint=metrics, methods=['GET'])
+
 if __name__ == "__main__":
     import uvicorn
     from dotenv import load_dotenv
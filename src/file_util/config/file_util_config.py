@@ -3,9 +3,24 @@ from dotenv import load_dotenv
 
 class FileUtilConfig:
 
+    __instance: "FileUtilConfig | None" = None
+
+    @classmethod
+    def get_instance(cls) -> "FileUtilConfig":
+        """プロセス内で共有する設定を取得する。初回呼び出し時に環境変数を読み込む"""
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
     def __init__(self):
         load_dotenv()
 
+        # PREWARM_ON_STARTUP サーバーの起動後にバックグラウンドでパーサーとMagikaのモデルをロードする
+        self.prewarm_on_startup = os.getenv("PREWARM_ON_STARTUP", "false").lower() == "true"
+
+        # METRICS_ENABLED 処理段階・形式ごとの処理時間とバイト数を集計する(/metrics, get_diagnostics)
+        self.metrics_enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
         # ENABLE_SMB_CIFS
         self.enable_smb_cifs = os.getenv("ENABLE_SMB_CIFS", "false").lower() == "true"
 
@@ -21,3 +36,90 @@ class FileUtilConfig:
         # SMB_CIFS_PASSWORD
         self.smb_cifs_password = os.getenv("SMB_CIFS_PASSWORD", "password")
 
+        # EXTRACTION_CACHE_DIR 空文字の場合はテキスト抽出結果のキャッシュを無効にする
+        self.extraction_cache_dir = os.getenv("EXTRACTION_CACHE_DIR", "")
+
+        # EXTRACTION_CACHE_MAX_BYTES キャッシュするテキストの合計サイズの上限
+        self.extraction_cache_max_bytes = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+        # EXECUTOR_THREAD_WORKERS I/O処理用スレッドプールのワーカー数。0の場合はPythonの既定値
+        self.executor_thread_workers = int(os.getenv("EXECUTOR_THREAD_WORKERS", "0"))
+
+        # EXECUTOR_PROCESS_WORKERS CPU負荷の高いパーサー用プロセスプールのワーカー数。0(既定)の場合はスレッドプールで実行する。
+        # プロセスプールを使う場合もメモリ上のデータはコピーを避けるためスレッドプールで抽出する
+        self.executor_process_workers = int(os.getenv("EXECUTOR_PROCESS_WORKERS", "0"))
+
+        # EXECUTOR_CONCURRENCY_LIMITS 処理種別ごとの同時実行数の上限。例: "pdf=2,excel=2,zip=1"
+        self.executor_concurrency_limits: dict[str, int] = {}
+        for item in os.getenv("EXECUTOR_CONCURRENCY_LIMITS", "").split(","):
+            if "=" not in item:
+                continue
+            kind, limit = item.split("=", 1)
+            self.executor_concurrency_limits[kind.strip()] = int(limit)
+
+        # PDF_PARALLEL_MIN_PAGES このページ数以上のPDFはページを分割して並列に抽出する。0の場合は並列抽出しない
+        self.pdf_parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "100"))
+
+        # PDF_PARALLEL_PAGES_PER_TASK 並列抽出時に1タスクで処理するページ数
+        self.pdf_parallel_pages_per_task = int(os.getenv("PDF_PARALLEL_PAGES_PER_TASK", "25"))
+
+        # WORD_EXTRACTOR Wordのテキスト抽出エンジン。python-docx または ooxml(XMLを直接解析する高速版)
+        self.word_extractor = os.getenv("WORD_EXTRACTOR", "python-docx")
+
+        # PPT_EXTRACTOR PowerPointのテキスト抽出エンジン。python-pptx または ooxml(XMLを直接解析する高速版)
+        self.ppt_extractor = os.getenv("PPT_EXTRACTOR", "python-pptx")
+
+        # UPLOAD_SPOOL_MAX_BYTES アップロードされたデータ・SMB上のファイルをメモリ上に保持する上限。超えた場合は一時ファイルに書き出す
+        self.upload_spool_max_bytes = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+        # TEXT_SANITIZE_RULES 抽出したテキストに適用する正規化の規則(crlf, whitespace, nfkc)。空の場合は改行・スペースの連続のみまとめる
+        self.text_sanitize_rules = [rule.strip() for rule in os.getenv("TEXT_SANITIZE_RULES", "").split(",") if rule.strip()]
+
+        # CLASSIFIER_TRUST ファイルの種類の判定でマジックナンバー・拡張子をどこまで信頼するか。
+        # signature(マジックナンバーのみで判定), strict(マジックナンバーと拡張子が一致する場合のみ判定), magika(常にMagikaで判定)
+        self.classifier_trust = os.getenv("CLASSIFIER_TRUST", "signature")
+
+        # MAGIKA_BATCH_SIZE 複数のファイルの種類をまとめて判定する場合に1回のMagikaの推論で判定する最大件数
+        self.magika_batch_size = int(os.getenv("MAGIKA_BATCH_SIZE", "32"))
+
+        # ENCODING_SAMPLE_BYTES エンコーディングの判定で最初の非ASCIIのバイトから読み込むサンプルの最大サイズ
+        self.encoding_sample_bytes = int(os.getenv("ENCODING_SAMPLE_BYTES", str(64 * 1024)))
+
+        # ENCODING_MAX_SCAN_BYTES エンコーディングの判定でASCIIのみの部分を読み飛ばす最大サイズ
+        self.encoding_max_scan_bytes = int(os.getenv("ENCODING_MAX_SCAN_BYTES", str(16 * 1024 * 1024)))
+
+
+        # ZIP_WORKERS ZIPファイルの展開・作成で並列に処理するワーカースレッド数。1の場合は逐次処理する
+        self.zip_workers = int(os.getenv("ZIP_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+        # ZIP_COMPRESSION_LEVEL ZIPファイル作成時のDeflateの圧縮レベル(0-9)。空文字の場合は圧縮せずに格納する
+        zip_compression_level = os.getenv("ZIP_COMPRESSION_LEVEL", "")
+        self.zip_compression_level = int(zip_compression_level) if zip_compression_level else None
+
+        # ZIP_STORE_EXTENSIONS 圧縮済みの形式として、圧縮レベルの指定にかかわらず格納のみとする拡張子
+        self.zip_store_extensions = [
+            ext.strip().lower() for ext in os.getenv(
+                "ZIP_STORE_EXTENSIONS", ".zip,.gz,.bz2,.xz,.7z,.jpg,.jpeg,.png,.gif,.mp3,.mp4,.docx,.xlsx,.pptx"
+            ).split(",") if ext.strip()
+        ]
+
+        # ZIP_MAX_DEPTH ZIPファイル内のテキスト抽出で展開する入れ子のZIPファイルの深さの上限
+        self.zip_max_depth = int(os.getenv("ZIP_MAX_DEPTH", "3"))
+
+        # ZIP_MEMBER_MAX_BYTES ZIPファイル内のテキスト抽出でメモリ上に読み込むメンバーの最大サイズ
+        self.zip_member_max_bytes = int(os.getenv("ZIP_MEMBER_MAX_BYTES", str(256 * 1024 * 1024)))
+
+        # ZIP_INDEX_CACHE_SIZE メモリ上にキャッシュするZIPファイルの索引(メンバー一覧)の数
+        self.zip_index_cache_size = int(os.getenv("ZIP_INDEX_CACHE_SIZE", "32"))
+
+        # INDEX_MANIFEST_DIR インクリメンタルなテキスト抽出(index_directory)のマニフェストと抽出したテキストの保存先
+        self.index_manifest_dir = os.getenv("INDEX_MANIFEST_DIR", "")
+
+        # CHUNK_MAX_SIZE チャンク単位の抽出で1チャンクの最大サイズ(文字数またはトークン数)
+        self.chunk_max_size = int(os.getenv("CHUNK_MAX_SIZE", "1000"))
+
+        # CHUNK_OVERLAP チャンク単位の抽出で前のチャンクと重複させるサイズ(文字数またはトークン数)
+        self.chunk_overlap = int(os.getenv("CHUNK_OVERLAP", "100"))
+
+        # CHUNK_TOKEN_ENCODING トークン数で分割する場合のtiktokenのエンコーディング名
+        self.chunk_token_encoding = os.getenv("CHUNK_TOKEN_ENCODING", "cl100k_base")
@@ -1,9 +1,23 @@
-from typing import Annotated, Optional, Literal
+import base64
+import fnmatch
+import os
+from typing import Annotated, AsyncIterator, Iterator, Optional, Literal
 from pydantic import Field
 from file_util.util.file_util import FileUtil
-from file_util.model import FileUtilDocumentType, FileUtilDocument
+from file_util.model import FileUtilDocumentType, FileUtilDocumentHandle, FileUtilDocumentTypeResult, FileUtilExtractionResult, FileUtilStreamExtractionResult, FileUtilZipListing, FileUtilIndexReport, FileUtilTextChunk, FileUtilTextChunkPage, FileUtilEncodingInfo
 from file_util.util.excel_util import ExcelUtil
 from file_util.util.zip_util import ZipUtil
+from file_util.util.cache_util import ExtractionCache
+from file_util.util.executor_util import ExecutorUtil
+from file_util.util.storage_util import StorageUtil
+from file_util.util.encoding_util import EncodingUtil
+from file_util.util.magika_util import MagikaUtil
+from file_util.util.metrics_util import MetricsUtil
+from file_util.model.classifier import DocumentClassifier
+from file_util.config.file_util_config import FileUtilConfig
+
+# バイナリリソースを分割してデコードする際に、base64の文字列から1度に取り出す文字数
+BASE64_DECODE_CHUNK_CHARS = 4 * 256 * 1024
 
 
 async def get_document_type(
@@ -12,8 +26,8 @@ async def get_document_type(
     """
     This function gets the type of a file at the specified path.
     """
-    document_type = FileUtilDocument.from_file(document_path=file_path)
-    return document_type.get_document_type()
+    handle = await ExecutorUtil.run_in_thread("detect", FileUtilDocumentHandle.from_file, file_path, identify=True)
+    return handle.get_document_type()
 
 async def get_mime_type(
     file_path: Annotated[str, Field(description="Path to the file to get MIME type for")]
@@ -21,8 +35,41 @@ async def get_mime_type(
     """
     This function gets the MIME type of a file at the specified path.
     """
-    document_type = FileUtilDocument.from_file(document_path=file_path)
-    return document_type.mime_type
+    handle = await ExecutorUtil.run_in_thread("detect", FileUtilDocumentHandle.from_file, file_path, identify=True)
+    return handle.mime_type
+
+async def get_document_types(
+    file_paths: Annotated[Optional[list[str]], Field(description="List of file paths to get types for. **Absolute paths or smb://server/share/path required**")] = None,
+    root_path: Annotated[Optional[str], Field(description="Directory whose files to get types for. **Absolute path or smb://server/share/path required**")] = None,
+    include_patterns: Annotated[Optional[list[str]], Field(description="Glob patterns of files to include, e.g. ['*.pdf', 'docs/**/*.docx']. All files if omitted")] = None,
+    exclude_patterns: Annotated[Optional[list[str]], Field(description="Glob patterns of files to exclude")] = None,
+    recursive: Annotated[bool, Field(description="Whether to search subdirectories of root_path")] = True,
+    batch_size: Annotated[Optional[int], Field(description="Maximum number of files classified in one model inference. MAGIKA_BATCH_SIZE if omitted")] = None,
+    ) -> Annotated[list[FileUtilDocumentTypeResult], Field(description="Types of the files in the order of file_paths followed by the files under root_path")]:
+    """
+    This function gets the types of many files at once, batching the model inference for files
+    that cannot be identified by their signature or extension.
+    """
+    def classify() -> list[FileUtilDocumentTypeResult]:
+        return FileUtil.get_document_types(
+            iter_target_paths(root_path, file_paths, include_patterns, exclude_patterns, recursive), batch_size
+        )
+    return await ExecutorUtil.run_in_thread("detect", classify)
+
+async def detect_encoding(
+    file_path: Annotated[str, Field(description="Path to the text file to detect the encoding of. A local path or smb://server/share/path")]
+    ) -> Annotated[FileUtilEncodingInfo, Field(description="Detected encoding with its confidence and the time spent")]:
+    """
+    This function detects the character encoding of a text file by sampling it.
+    """
+    def detect() -> FileUtilEncodingInfo:
+        with StorageUtil.open(file_path) as f:
+            result = EncodingUtil.detect_stream(f)
+        return FileUtilEncodingInfo(
+            encoding=result.encoding, confidence=result.confidence, method=result.method,
+            sampled_bytes=result.sampled_bytes, elapsed_seconds=result.elapsed_seconds,
+        )
+    return await ExecutorUtil.run_in_thread("detect", detect)
 
 # get_sheet_names
 async def get_sheet_names(
@@ -31,18 +78,22 @@ async def get_sheet_names(
     """
     This function gets the sheet names of an Excel file at the specified path.
     """
-    response = ExcelUtil.get_sheet_names(file_path)
+    response = await ExecutorUtil.run_in_process("excel", ExcelUtil.get_sheet_names, file_path)
     return response
 
 # extract_excel_sheet
 async def extract_excel_sheet(
     file_path: Annotated[str, Field(description="Path to the Excel file to extract text from")],
-    sheet_name: Annotated[str, Field(description="Name of the sheet to extract text from")]
+    sheet_name: Annotated[str, Field(description="Name of the sheet to extract text from")],
+    max_rows: Annotated[Optional[int], Field(description="Maximum number of rows to read from the sheet. All rows if omitted")] = None,
+    columns: Annotated[Optional[list[str]], Field(description="Column letters to extract, e.g. ['A', 'C']. All columns if omitted")] = None,
     ) -> Annotated[str, Field(description="Extracted text from the specified Excel sheet")]:
     """
     This function extracts text from a specified sheet in an Excel file.
     """
-    response = ExcelUtil.extract_text_from_sheet(file_path, sheet_name)
+    response = await ExecutorUtil.run_in_process(
+        "excel", ExcelUtil.extract_text_from_sheet, file_path, sheet_name, max_rows, columns
+    )
     return response
 
 # extract_base64_to_text
@@ -56,44 +107,304 @@ async def extract_base64_to_text(
     response = await FileUtil.extract_base64_to_text(extension, base64_data)
     return response
 
+# MCPのバイナリリソース(base64のblob)からテキストを抽出する関数
+async def extract_binary_resource_to_text(
+    blob: Annotated[str, Field(description="Base64 encoded binary content of an MCP resource (the 'blob' field of BlobResourceContents)")],
+    extension: Annotated[Optional[str], Field(description="File extension of the resource, if known")] = None,
+    ) -> Annotated[FileUtilStreamExtractionResult, Field(description="Extracted text with the detected MIME type, size and throughput")]:
+    """
+    This function extracts text from a binary resource. The base64 string is decoded in fixed-size
+    slices without copying it, and large decoded payloads are spooled to disk instead of being held in memory.
+    """
+    async def chunks() -> AsyncIterator[bytes]:
+        # 元の文字列を一定の長さずつ取り出し、改行などの空白を除いて4文字単位でデコードする。
+        # 4の倍数に満たない末尾の文字は次の範囲に持ち越すため、文字列全体のコピーは作成しない
+        step = BASE64_DECODE_CHUNK_CHARS
+        rest = ""
+        for i in range(0, len(blob), step):
+            data = rest + "".join(blob[i:i + step].split())
+            end = len(data) - len(data) % 4
+            rest = data[end:]
+            if end:
+                yield base64.b64decode(data[:end])
+        if rest:
+            yield base64.b64decode(rest)
+
+    return await FileUtil.extract_text_from_stream_async(chunks(), extension or "")
+
 
 async def extract_text_from_file(
-    file_path: Annotated[str, Field(description="Path to the file to extract text from")]
+    file_path: Annotated[str, Field(description="Path to the file to extract text from. A local path or smb://server/share/path")],
+    page_range: Annotated[Optional[str], Field(description="Pages to extract from a PDF, e.g. '1-3,5' (1-based). All pages if omitted")] = None,
+    max_chars: Annotated[Optional[int], Field(description="Maximum number of characters to extract. Extraction stops early once reached")] = None,
     ) -> Annotated[str, Field(description="Extracted text from the file")]:
     """
     This function extracts text from a file at the specified path.
     """
-    return await FileUtil.extract_text_from_file_async(file_path)
+    return await FileUtil.extract_text_from_file_async(file_path, page_range, max_chars)
+
+async def iter_text_from_file(
+    file_path: str,
+    page_range: Optional[str] = None,
+    max_chars: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+    """
+    This function yields text from a file incrementally (page by page for PDF files).
+    """
+    async for text in FileUtil.iter_text_from_file_async(file_path, page_range, max_chars):
+        yield text
+
+async def extract_chunks_from_file(
+    file_path: Annotated[str, Field(description="Path to the file to extract text from. A local path or smb://server/share/path")],
+    max_size: Annotated[Optional[int], Field(description="Maximum size of a chunk in characters or tokens. CHUNK_MAX_SIZE if omitted")] = None,
+    overlap: Annotated[Optional[int], Field(description="Size of the end of the previous chunk repeated at the start of the next chunk. CHUNK_OVERLAP if omitted")] = None,
+    unit: Annotated[Literal["chars", "tokens"], Field(description="Unit of max_size and overlap. 'tokens' requires tiktoken")] = "chars",
+    cursor: Annotated[Optional[str], Field(description="next_cursor of the previous call to get the following chunks")] = None,
+    limit: Annotated[int, Field(description="Maximum number of chunks to return")] = 100,
+    ) -> Annotated[FileUtilTextChunkPage, Field(description="Chunks with page, sheet/row or slide numbers and the cursor for the next chunks")]:
+    """
+    This function splits the text of a file into size-bounded chunks for embedding and returns them page by page.
+    """
+    return await FileUtil.extract_chunks_from_file_async(file_path, max_size, overlap, unit, cursor, limit)
+
+async def iter_chunks_from_file(
+    file_path: str,
+    max_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    unit: Literal["chars", "tokens"] = "chars",
+    ) -> AsyncIterator[FileUtilTextChunk]:
+    """
+    This function yields size-bounded chunks of the text of a file as they are extracted.
+    """
+    async for chunk in FileUtil.iter_chunks_from_file_async(file_path, max_size, overlap, unit):
+        yield chunk
+
+async def iter_text_from_directory(
+    root_path: Optional[str] = None,
+    file_paths: Optional[list[str]] = None,
+    include_patterns: Optional[list[str]] = None,
+    exclude_patterns: Optional[list[str]] = None,
+    recursive: bool = True,
+    ) -> AsyncIterator[FileUtilExtractionResult]:
+    """
+    This function yields extraction results for the files under a directory and/or in a file list
+    as each file finishes.
+    """
+    targets = iter_target_paths(root_path, file_paths, include_patterns, exclude_patterns, recursive)
+    async for result in FileUtil.extract_text_from_files_async(targets):
+        yield result
+
+# ファイルリストとディレクトリ配下から、パターンに一致するファイルのパスを順に返す関数
+def iter_target_paths(
+    root_path: Optional[str] = None,
+    file_paths: Optional[list[str]] = None,
+    include_patterns: Optional[list[str]] = None,
+    exclude_patterns: Optional[list[str]] = None,
+    recursive: bool = True,
+    ) -> Iterator[str]:
+    if file_paths:
+        for file_path in file_paths:
+            name = os.path.basename(file_path)
+            if include_patterns and not any(fnmatch.fnmatch(name, p) for p in include_patterns):
+                continue
+            if exclude_patterns and any(fnmatch.fnmatch(name, p) for p in exclude_patterns):
+                continue
+            yield file_path
+    if root_path:
+        yield from FileUtil.list_files(root_path, include_patterns, exclude_patterns, recursive)
+
+async def extract_text_from_directory(
+    root_path: Annotated[Optional[str], Field(description="Directory to extract text from. **Absolute path or smb://server/share/path required**")] = None,
+    file_paths: Annotated[Optional[list[str]], Field(description="List of file paths to extract text from. **Absolute paths required**")] = None,
+    include_patterns: Annotated[Optional[list[str]], Field(description="Glob patterns of files to include, e.g. ['*.pdf', 'docs/**/*.docx']. All files if omitted")] = None,
+    exclude_patterns: Annotated[Optional[list[str]], Field(description="Glob patterns of files to exclude")] = None,
+    recursive: Annotated[bool, Field(description="Whether to search subdirectories of root_path")] = True,
+    ) -> Annotated[list[FileUtilExtractionResult], Field(description="Extraction results per file in completion order. Failed files have an error message")]:
+    """
+    This function extracts text from all files under a directory and/or in a file list in parallel.
+    """
+    results = []
+    async for result in iter_text_from_directory(root_path, file_paths, include_patterns, exclude_patterns, recursive):
+        results.append(result)
+    return results
+
+async def iter_text_from_zip(
+    file_path: str,
+    password: Optional[str] = None,
+    max_depth: Optional[int] = None,
+    ) -> AsyncIterator[FileUtilExtractionResult]:
+    """
+    This function yields extraction results for the members of a ZIP file one by one
+    without extracting the archive to disk.
+    """
+    async for result in FileUtil.extract_text_from_zip_async(file_path, password, max_depth):
+        yield result
+
+# ZIPファイルを展開せずにメンバーからテキストを抽出する関数
+async def extract_text_from_zip(
+    file_path: Annotated[str, Field(description="Path to the ZIP file to extract text from. **Absolute path or smb://server/share/path required**")],
+    password: Annotated[Optional[str], Field(description="Password for the ZIP file, if any. Also used for nested archives")] = None,
+    max_depth: Annotated[Optional[int], Field(description="Maximum depth of nested ZIP files to descend into. Defaults to ZIP_MAX_DEPTH")] = None,
+    ) -> Annotated[list[FileUtilExtractionResult], Field(description="Extraction results per member in archive order. file_path is '<zip>!/<member>'. Failed members have an error message")]:
+    """
+    This function extracts text from each member of a ZIP file in memory, without extracting the archive to disk.
+    """
+    results = []
+    async for result in iter_text_from_zip(file_path, password, max_depth):
+        results.append(result)
+    return results
+
+# 前回の実行から追加・変更されたファイルのみテキストを抽出する関数
+async def index_directory(
+    root_path: Annotated[str, Field(description="Directory to index. **Absolute path or smb://server/share/path required**")],
+    manifest_dir: Annotated[Optional[str], Field(description="Directory holding the manifest and the extracted texts. Defaults to INDEX_MANIFEST_DIR")] = None,
+    include_patterns: Annotated[Optional[list[str]], Field(description="Glob patterns of files to include, e.g. ['*.pdf', 'docs/**/*.docx']. All files if omitted")] = None,
+    exclude_patterns: Annotated[Optional[list[str]], Field(description="Glob patterns of files to exclude")] = None,
+    recursive: Annotated[bool, Field(description="Whether to search subdirectories of root_path")] = True,
+    ) -> Annotated[FileUtilIndexReport, Field(description="Counts of new, changed, unchanged, deleted and failed files, with the list of new, changed, deleted and failed files")]:
+    """
+    This function extracts text only from the files under a directory that are new or changed since the previous run.
+    Extracted texts are saved under manifest_dir, and files deleted since the previous run are reported.
+    """
+    manifest_dir = manifest_dir or FileUtilConfig.get_instance().index_manifest_dir
+    if not manifest_dir:
+        raise ValueError("manifest_dir is required when INDEX_MANIFEST_DIR is not set")
+    return await FileUtil.index_directory_async(root_path, manifest_dir, include_patterns, exclude_patterns, recursive)
+
+# 抽出結果キャッシュの統計情報を取得する関数
+async def get_extraction_cache_stats(
+    ) -> Annotated[Optional[dict], Field(description="Hit/miss/eviction counters and size of the extraction cache. None if the cache is disabled")]:
+    """
+    This function gets the statistics of the text extraction cache.
+    """
+    cache = ExtractionCache.get_instance()
+    if cache is None:
+        return None
+    return cache.get_stats()
+
+# ワーカープールの統計情報を取得する関数
+async def get_executor_stats(
+    ) -> Annotated[dict[str, dict[str, int]], Field(description="Queued, running, completed and failed task counts per task kind")]:
+    """
+    This function gets the queue depth and task counters of the worker pools.
+    """
+    return ExecutorUtil.get_stats()
+
+# ストレージの読み込みの統計情報を取得する関数
+async def get_storage_stats(
+    ) -> Annotated[dict[str, dict[str, int]], Field(description="Open, read call and bytes read counters per storage backend (local, smb://, mem://)")]:
+    """
+    This function gets the number of bytes read from each storage backend.
+    """
+    return StorageUtil.get_stats()
+
+# エンコーディングの判定の統計情報を取得する関数
+async def get_encoding_stats(
+    ) -> Annotated[dict[str, dict[str, float]], Field(description="Count, sampled bytes and total seconds per detection stage (bom, ascii, utf-8, chardet)")]:
+    """
+    This function gets how often each encoding detection stage decided the encoding and the time spent.
+    """
+    return EncodingUtil.get_stats()
+
+# ファイルの種類の判定の統計情報を取得する関数
+async def get_classifier_stats(
+    ) -> Annotated[dict[str, dict[str, float]], Field(description="Count and total seconds per classification tier (signature, extension, magika)")]:
+    """
+    This function gets how many files each classification tier resolved and the time spent.
+    """
+    return DocumentClassifier.get_stats()
+
+# 処理段階ごとの処理時間と各種統計情報を取得する関数
+async def get_diagnostics(
+    ) -> Annotated[dict, Field(description="Per-stage and per-format latency, bytes and error counts (when METRICS_ENABLED is true), plus classifier, encoding, Magika, storage, ZIP index and worker pool statistics")]:
+    """
+    This function gets the per-stage latency metrics and the statistics of each component for diagnostics.
+    """
+    return {
+        "metrics_enabled": MetricsUtil.is_enabled(),
+        "stages": MetricsUtil.get_stats(),
+        "classifier": DocumentClassifier.get_stats(),
+        "encoding": EncodingUtil.get_stats(),
+        "magika": MagikaUtil.get_stats(),
+        "storage": StorageUtil.get_stats(),
+        "zip_index": ZipUtil.get_index_cache_stats(),
+        "executor": ExecutorUtil.get_stats(),
+    }
 
 # ZIPファイルの内容をリストする関数
 async def list_zip_contents(
-    file_path: Annotated[str, Field(description="Path to the ZIP file to list contents from. **Absolute path required**")]
+    file_path: Annotated[str, Field(description="Path to the ZIP file to list contents from. **Absolute path or smb://server/share/path required**")]
     ) -> Annotated[list[str], Field(description="List of file names in the ZIP archive")]:
     """
     This function lists the contents of a ZIP file at the specified path.
     """
-    return ZipUtil.list_zip_contents(file_path)
+    return await ExecutorUtil.run_in_thread("zip", ZipUtil.list_zip_contents, file_path)
+
+# ZIPファイルのメンバーの情報をページ単位でリストする関数
+async def list_zip_members(
+    file_path: Annotated[str, Field(description="Path to the ZIP file. **Absolute path or smb://server/share/path required**")],
+    offset: Annotated[int, Field(description="Offset of the first member to return, after filtering by pattern")] = 0,
+    limit: Annotated[Optional[int], Field(description="Maximum number of members to return. All if omitted")] = None,
+    pattern: Annotated[Optional[str], Field(description="Glob pattern to filter member names, e.g. 'docs/*.pdf'")] = None,
+    ) -> Annotated[FileUtilZipListing, Field(description="Total number of matching members and the requested page of member information")]:
+    """
+    This function lists the members of a ZIP file with their sizes, CRCs and offsets.
+    The central directory is cached per (path, size, mtime), so repeated calls on an unchanged archive do not rescan it.
+    """
+    return await ExecutorUtil.run_in_thread("zip", ZipUtil.list_zip_members, file_path, offset, limit, pattern)
+
+# ZIPファイルの1つのメンバーを展開する関数
+async def extract_zip_member(
+    file_path: Annotated[str, Field(description="Path to the ZIP file. **Absolute path or smb://server/share/path required**")],
+    member_name: Annotated[str, Field(description="Name of the member as returned by list_zip_contents")],
+    extract_to: Annotated[str, Field(description="Directory to extract the member to. **Absolute path required**")],
+    password: Annotated[Optional[str], Field(description="Password for the ZIP file, if any")] = None,
+    ) -> Annotated[str, Field(description="Path of the extracted file")]:
+    """
+    This function extracts a single member of a ZIP file by seeking directly to its data.
+    """
+    return await ExecutorUtil.run_in_thread("zip", ZipUtil.extract_zip_member, file_path, member_name, extract_to, password)
+
+# ZIPファイルの1つのメンバーからテキストを抽出する関数
+async def extract_text_from_zip_member(
+    file_path: Annotated[str, Field(description="Path to the ZIP file. **Absolute path or smb://server/share/path required**")],
+    member_name: Annotated[str, Field(description="Name of the member as returned by list_zip_contents")],
+    password: Annotated[Optional[str], Field(description="Password for the ZIP file, if any")] = None,
+    ) -> Annotated[str, Field(description="Extracted text from the member")]:
+    """
+    This function extracts text from a single member of a ZIP file in memory, without extracting the archive to disk.
+    """
+    data = await ExecutorUtil.run_in_thread("zip", ZipUtil.read_zip_member, file_path, member_name, password)
+    return await FileUtil.extract_text_from_bytes_async(data, os.path.splitext(member_name)[1].lstrip("."))
 
 # ZIPファイルを展開する関数
 async def extract_zip(
-    file_path: Annotated[str, Field(description="Path to the ZIP file to extract. **Absolute path required**")],
+    file_path: Annotated[str, Field(description="Path to the ZIP file to extract. **Absolute path or smb://server/share/path required**")],
     extract_to: Annotated[str, Field(description="Directory to extract the ZIP contents to. **Absolute path required**")],
-    password: Annotated[Optional[str], Field(description="Password for the ZIP file, if any")] = None
+    password: Annotated[Optional[str], Field(description="Password for the ZIP file, if any")] = None,
+    max_workers: Annotated[Optional[int], Field(description="Number of worker threads extracting members in parallel. Defaults to ZIP_WORKERS")] = None
     ) -> Annotated[bool, Field(description="True if extraction was successful")]:
 
     """
     This function extracts a ZIP file at the specified path.
+    Members are split across worker threads and written in fixed-size chunks.
     """
-    return ZipUtil.extract_zip(file_path, extract_to, password)
+    return await ExecutorUtil.run_in_thread("zip", ZipUtil.extract_zip, file_path, extract_to, password, max_workers)
 
 # ZIPファイルを作成する関数
 async def create_zip(
     file_paths: Annotated[list[str], Field(description="List of file or directory paths to include in the ZIP. **Absolute paths required**")],
     output_zip: Annotated[str, Field(description="Path to the output ZIP file. **Absolute path required**")],
-    password: Annotated[Optional[str], Field(description="Password for the ZIP file, if any")] = None
+    password: Annotated[Optional[str], Field(description="Password for the ZIP file, if any")] = None,
+    max_workers: Annotated[Optional[int], Field(description="Number of worker threads compressing members in parallel. Defaults to ZIP_WORKERS")] = None,
+    compression_level: Annotated[Optional[int], Field(description="Deflate compression level (0-9). Defaults to ZIP_COMPRESSION_LEVEL; members are stored uncompressed when neither is set")] = None,
+    store_only: Annotated[bool, Field(description="Store all members without compression")] = False
     ) -> Annotated[bool, Field(description="True if ZIP creation was successful")]:
 
     """
     This function creates a ZIP file at the specified path.
+    Members are compressed in parallel and written to the archive in the order of file_paths.
     """
-    return ZipUtil.create_zip(file_paths, output_zip, password)
+    return await ExecutorUtil.run_in_thread(
+        "zip", ZipUtil.create_zip, file_paths, output_zip, password,
+        max_workers=max_workers, compression_level=compression_level, store_only=store_only)
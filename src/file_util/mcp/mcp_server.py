@@ -5,15 +5,34 @@ from fastmcp import FastMCP
 from file_util.core.app import (
     get_document_type,
     get_mime_type,
+    get_document_types,
+    detect_encoding,
     get_sheet_names,
     extract_excel_sheet,
     extract_text_from_file,
     extract_base64_to_text,
     extract_text_from_file,
     list_zip_contents,
+    list_zip_members,
+    extract_zip_member,
+    extract_text_from_zip_member,
     extract_zip,
     create_zip,
+    extract_text_from_zip,
+    extract_chunks_from_file,
+    get_extraction_cache_stats,
+    get_executor_stats,
+    get_storage_stats,
+    get_encoding_stats,
+    get_classifier_stats,
+    get_diagnostics,
+    extract_text_from_directory,
+    index_directory,
+    extract_binary_resource_to_text,
 )
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.util.file_util import FileUtil
+from file_util.util.executor_util import ExecutorUtil
 mcp = FastMCP("file_util") #type :ignore
 
 # 引数解析用の関数
@@ -27,6 +46,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("-p", "--port", type=int, default=5001, help="Port number to run the server on. Default is 5001.")
     # -v LOG_LEVEL オプションを追加 ログレベルを指定する. デフォルトは空白文字
     parser.add_argument("-v", "--log_level", type=str, default="", help="Log level to set for the server. Default is empty, which uses the default log level.")
+    # --prewarm オプションを追加 起動後にバックグラウンドでパーサーとMagikaのモデルをロードする. 指定されていない場合はPREWARM_ON_STARTUPの値
+    parser.add_argument("--prewarm", action="store_true", help="Load the parsers and the Magika model in the background after startup.")
 
     return parser.parse_args()
 
@@ -51,26 +72,53 @@ async def main():
         # デフォルトのツールを登録
         mcp.tool()(get_document_type)
         mcp.tool()(get_mime_type)
+        mcp.tool()(get_document_types)
+        mcp.tool()(detect_encoding)
         mcp.tool()(get_sheet_names)
         mcp.tool()(extract_excel_sheet)
         mcp.tool()(extract_text_from_file)
+        mcp.tool()(extract_chunks_from_file)
+        mcp.tool()(extract_text_from_directory)
+        mcp.tool()(index_directory)
         mcp.tool()(list_zip_contents)
+        mcp.tool()(list_zip_members)
+        mcp.tool()(extract_zip_member)
+        mcp.tool()(extract_text_from_zip_member)
         mcp.tool()(extract_zip)
         mcp.tool()(create_zip)
+        mcp.tool()(extract_text_from_zip)
         mcp.tool()(extract_base64_to_text)
+        mcp.tool()(extract_binary_resource_to_text)
+        mcp.tool()(get_extraction_cache_stats)
+        mcp.tool()(get_executor_stats)
+        mcp.tool()(get_storage_stats)
+        mcp.tool()(get_encoding_stats)
+        mcp.tool()(get_classifier_stats)
+        mcp.tool()(get_diagnostics)
 
-    if mode == "stdio":
-        await mcp.run_async()
+    # パーサーとMagikaのモデルは初回の利用時にロードする。
+    # 事前ロードを指定した場合も、起動を待たせないようにバックグラウンドでロードする
+    prewarm_task = None
+    if args.prewarm or FileUtilConfig.get_instance().prewarm_on_startup:
+        prewarm_task = asyncio.create_task(asyncio.to_thread(FileUtil.prewarm))
 
-    elif mode == "sse":
-        # port番号を取得
-        port = args.port
-        await mcp.run_async(transport="sse", host="0.0.0.0", port=port)
+    try:
+        if mode == "stdio":
+            await mcp.run_async()
 
-    elif mode == "http":
-        # port番号を取得
-        port = args.port
-        await mcp.run_async(transport="streamable-http", host="0.0.0.0", port=port)
+        elif mode == "sse":
+            # port番号を取得
+            port = args.port
+            await mcp.run_async(transport="sse", host="0.0.0.0", port=port)
+
+        elif mode == "http":
+            # port番号を取得
+            port = args.port
+            await mcp.run_async(transport="streamable-http", host="0.0.0.0", port=port)
+    finally:
+        # 事前ロードが完了していない場合はキャンセルしてから、ワーカープールを終了する
+        await ExecutorUtil.cancel_task(prewarm_task)
+        ExecutorUtil.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())
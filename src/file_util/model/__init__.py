@@ -1,10 +1,14 @@
-from magika import Magika
-from magika.types import MagikaResult 
-from chardet.universaldetector import UniversalDetector
-from pathlib import Path
+from typing import BinaryIO, Sequence
+import io
+import mmap
+import os
 
-from pydantic import BaseModel, Field, PrivateAttr
+from pydantic import BaseModel, Field, PrivateAttr, SkipValidation
 import file_util.log.log_settings as log_settings
+from file_util.util.storage_util import BufferReader, StorageUtil
+from file_util.util.encoding_util import EncodingUtil
+from file_util.util.metrics_util import MetricsUtil
+from file_util.model.classifier import DocumentClassifier
 logger = log_settings.getLogger(__name__)
 
 from enum import StrEnum
@@ -19,132 +23,100 @@ class FileUtilDocumentType(StrEnum):
     UNSUPPORTED = "unsupported"
 
 
-class FileUtilDocument(BaseModel):
-    
-    data: bytes = Field(..., description="Document data as bytes")
-    identifier: str = Field(..., description="Identifier of the document")
-    __mime_type: str = PrivateAttr("")
-    __encoding: str | None = PrivateAttr(None)
+class FileUtilExtractionResult(BaseModel):
+    file_path: str = Field(..., description="Path to the source file")
+    text: str = Field("", description="Extracted and sanitized text")
+    mime_type: str = Field("", description="MIME type of the file")
+    error: str | None = Field(None, description="Error message if the extraction failed")
 
-    @property
-    def mime_type(self) -> str:
-        """MIMEタイプを取得する"""
-        return self.__mime_type
-    @property
-    def encoding(self) -> str | None:
-        """エンコーディングを取得する"""
-        return self.__encoding
-    
-    def __init__(self, **data):
-        super().__init__(**data)
-        mime_type, encoding = self.identify_data_type(self.data)
-        self.__mime_type = mime_type if mime_type else ""
-        self.__encoding = encoding
 
-    @classmethod
-    def from_file(cls, document_path: str) -> "FileUtilDocument":
-        """ファイルパスからDocumentTypeインスタンスを作成する
+class FileUtilStreamExtractionResult(BaseModel):
+    text: str = Field("", description="Extracted and sanitized text")
+    mime_type: str = Field("", description="MIME type of the uploaded data")
+    size: int = Field(0, description="Number of bytes received")
+    elapsed_seconds: float = Field(0.0, description="Time spent receiving and extracting the data")
+    bytes_per_second: float = Field(0.0, description="Throughput in bytes per second")
 
-        Args:
-            document_path: ドキュメントのファイルパス
 
-        Returns:
-            DocumentType: 作成されたDocumentTypeインスタンス
-        """
-        # ファイルのバイト列を取得
-        with open(document_path, "rb") as f:
-            byte_data = f.read()
-        
-        return cls(data=byte_data, identifier=document_path)
+class FileUtilZipMemberInfo(BaseModel):
+    name: str = Field(..., description="Decoded member name")
+    file_size: int = Field(0, description="Uncompressed size in bytes")
+    compress_size: int = Field(0, description="Compressed size in bytes")
+    crc: int = Field(0, description="CRC-32 of the uncompressed data")
+    header_offset: int = Field(0, description="Offset of the local file header in the archive")
+    compress_type: int = Field(0, description="Compression method (0: stored, 8: deflated)")
+    is_dir: bool = Field(False, description="Whether the member is a directory")
+    encrypted: bool = Field(False, description="Whether the member is encrypted")
 
-    @classmethod
-    def identify_data_type(cls, data: bytes) -> tuple[str | None, str | None]:
-        """バイト列のMIMEタイプとエンコーディングを判定する
 
-        Args:
-            data: 判定対象のバイト列
+class FileUtilZipListing(BaseModel):
+    total: int = Field(0, description="Number of members matching the pattern")
+    offset: int = Field(0, description="Offset of the first returned member")
+    members: list[FileUtilZipMemberInfo] = Field(default_factory=list, description="Members in archive order")
 
-        Returns:
-            tuple[str | None, str | None]:
-                MIMEタイプ文字列とエンコーディング文字列のタプル。
-                判定失敗時は(None, None)
-        """
-        m = Magika()
-        try:
-            res: MagikaResult = m.identify_bytes(data) # type: ignore
-            encoding = None
-            if res.dl.is_text:
-                encoding = cls.get_encoding_from_bytes(data)
 
-        except Exception as e:
-            logger.debug(e)
-            return None, None
+class FileUtilIndexEntry(BaseModel):
+    file_path: str = Field(..., description="Path to the file")
+    status: str = Field(..., description="Change status: 'new', 'changed' or 'deleted'")
+    mime_type: str = Field("", description="MIME type of the file")
+    content_hash: str = Field("", description="SHA-256 of the file content")
+    text_path: str = Field("", description="Path to the file holding the extracted text")
+    error: str | None = Field(None, description="Error message if the extraction failed")
 
-        return res.output.mime_type , encoding
 
-    @classmethod
-    def identify_file_type(cls, filename) -> tuple[str | None, str | None]:
-        """ファイルのMIMEタイプとエンコーディングを判定する
+class FileUtilIndexReport(BaseModel):
+    root_path: str = Field(..., description="Indexed directory")
+    new: int = Field(0, description="Number of new files")
+    changed: int = Field(0, description="Number of files whose content changed")
+    unchanged: int = Field(0, description="Number of files skipped because they were not changed")
+    deleted: int = Field(0, description="Number of files removed since the previous run")
+    failed: int = Field(0, description="Number of files that failed to extract")
+    elapsed_seconds: float = Field(0.0, description="Time spent on the run")
+    entries: list[FileUtilIndexEntry] = Field(default_factory=list, description="New, changed, deleted and failed files")
 
-        Args:
-            filename: 判定対象のファイルパス
 
-        Returns:
-            tuple[str | None, str | None]:
-                MIMEタイプ文字列とエンコーディング文字列のタプル。
-                判定失敗時は(None, None)
-        """
-        m = Magika()
-        # ファイルの種類を判定
-        path = Path(filename)
-        try:
-            res: MagikaResult = m.identify_path(path) # type: ignore
-            encoding = None
-            if res.dl.is_text:
-                encoding = cls.get_encoding(filename)
+class FileUtilTextChunk(BaseModel):
+    index: int = Field(..., description="Sequence number of the chunk (0-based)")
+    text: str = Field("", description="Sanitized text of the chunk")
+    size: int = Field(0, description="Size of the chunk in the chunking unit (characters or tokens)")
+    start_offset: int = Field(0, description="Character offset of the chunk in the whole extracted text")
+    end_offset: int = Field(0, description="Character offset just after the chunk in the whole extracted text")
+    start_page: int | None = Field(None, description="First PDF page of the chunk (1-based)")
+    end_page: int | None = Field(None, description="Last PDF page of the chunk (1-based)")
+    sheet_name: str | None = Field(None, description="Excel sheet of the chunk")
+    start_row: int | None = Field(None, description="First Excel row of the chunk (1-based)")
+    end_row: int | None = Field(None, description="Last Excel row of the chunk (1-based)")
+    start_slide: int | None = Field(None, description="First PowerPoint slide of the chunk (1-based)")
+    end_slide: int | None = Field(None, description="Last PowerPoint slide of the chunk (1-based)")
 
-        except Exception as e:
-            logger.debug(e)
-            return None, None
 
-        return res.output.mime_type , encoding
+class FileUtilTextChunkPage(BaseModel):
+    file_path: str = Field(..., description="Path to the source file")
+    mime_type: str = Field("", description="MIME type of the file")
+    chunks: list[FileUtilTextChunk] = Field(default_factory=list, description="Chunks in document order")
+    next_cursor: str | None = Field(None, description="Cursor to pass to get the next chunks. None if there are no more chunks")
 
-    @classmethod
-    def get_encoding(cls, filename) -> str | None:
-        """ファイルのエンコーディングを判定する
 
-        ファイルの先頭8192バイトを読み込んで、エンコーディングを判定します。
+class FileUtilEncodingInfo(BaseModel):
+    encoding: str | None = Field(None, description="Detected encoding. None if undetectable")
+    confidence: float = Field(0.0, description="Confidence of the detection (0.0-1.0)")
+    method: str = Field("", description="Stage that decided the encoding: 'bom', 'ascii', 'utf-8' or 'chardet'")
+    sampled_bytes: int = Field(0, description="Number of bytes examined by the UTF-8 check or chardet")
+    elapsed_seconds: float = Field(0.0, description="Time spent on the detection")
 
-        Args:
-            filename: 判定対象のファイルパス
 
-        Returns:
-            str | None: エンコーディング文字列。判定失敗時はNone
-        """
-        # ファイルのbyte列を取得
-        # アクセスできない場合は例外をキャッチ
-        with open(filename, "rb") as f:
-            # 1KB読み込む
-            byte_data = f.read(8192)
-            # エンコーディング判定
-            encoding = cls.get_encoding_from_bytes(byte_data)
-            return encoding
-    
-    @classmethod
-    def get_encoding_from_bytes(cls, byte_data: bytes) -> str | None:
-        """バイト列からエンコーディングを判定する
+class FileUtilDocumentTypeResult(BaseModel):
+    file_path: str = Field(..., description="Path to the file")
+    document_type: FileUtilDocumentType = Field(FileUtilDocumentType.UNSUPPORTED, description="Type of the document")
+    mime_type: str = Field("", description="MIME type of the file. Empty if undetectable")
+    encoding: str | None = Field(None, description="Encoding of the file if it is a text file")
+    error: str | None = Field(None, description="Error message if the file could not be read")
 
-        Args:
-            byte_data: 判定対象のバイト列
 
-        Returns:
-            str | None: エンコーディング文字列。判定失敗時はNone
-        """
-        detector = UniversalDetector()
-        detector.feed(byte_data)
-        detector.close()
-        encoding = detector.result['encoding']  
-        return encoding
+class FileUtilDocumentTypeMixin:
+    """MIMEタイプからドキュメントの種類を判定するメソッド"""
+
+    __slots__ = ()
 
     def get_document_type(self) -> FileUtilDocumentType:
         """Determine the document type based on its MIME type.
@@ -199,4 +171,322 @@ class FileUtilDocument(BaseModel):
     def is_unsupported(self) -> bool:
         """Check if the document type is unsupported based on its MIME type."""
         return not (self.is_text() or self.is_pdf() or self.is_office_document() or self.is_image())
+
+
+class FileUtilDocumentHandle(FileUtilDocumentTypeMixin):
+    """ドキュメントの識別子・MIMEタイプ・エンコーディングと本体の参照を保持する軽量なハンドル
+
+    本体はbytes, memoryview, mmapなどのバッファをコピーせずに参照します。本体を渡さない場合は
+    識別子のファイルを必要になった時点で開きます。MIMEタイプとエンコーディングは初回の参照時に
+    DocumentClassifierで判定します。判定に必要な先頭・末尾の一部のみを読み込み、ファイル全体は読み込みません。
+    """
+
+    __slots__ = ("identifier", "__data", "__mime_type", "__encoding")
+
+    def __init__(
+        self, identifier: str, data: "bytes | bytearray | memoryview | mmap.mmap | None" = None,
+        mime_type: str | None = None, encoding: str | None = None,
+        ):
+        """
+        Args:
+            identifier: ドキュメントの識別子。本体を渡さない場合はファイルパスまたは smb://, mem:// 形式のパス
+            data: ドキュメント本体。Noneの場合は識別子のファイルから読み込む
+            mime_type: 判定済みのMIMEタイプ。Noneの場合は初回の参照時に判定する
+            encoding: 判定済みのエンコーディング
+        """
+        self.identifier = identifier
+        self.__data = data
+        self.__mime_type = mime_type
+        self.__encoding = encoding
+
+    @classmethod
+    def from_file(cls, document_path: str, identify: bool = False) -> "FileUtilDocumentHandle":
+        """ファイルのハンドルを作成する。ファイル全体は読み込まない
+
+        Args:
+            document_path: ドキュメントのファイルパスまたは smb://, mem:// 形式のパス
+            identify: Trueの場合はMIMEタイプとエンコーディングを判定してから返す
+
+        Returns:
+            FileUtilDocumentHandle: 作成したハンドル
+        """
+        # ファイルにアクセスできない場合は全体読み込み時と同じ例外を送出する
+        with StorageUtil.open(document_path):
+            pass
+        handle = cls(document_path)
+        if identify:
+            handle.identify()
+        return handle
+
+    @property
+    def mime_type(self) -> str:
+        """MIMEタイプを取得する。判定できない場合は空文字列"""
+        return self.identify()[0]
+
+    @property
+    def encoding(self) -> str | None:
+        """エンコーディングを取得する"""
+        return self.identify()[1]
+
+    @property
+    def data(self) -> "bytes | bytearray | memoryview | mmap.mmap | None":
+        """メモリ上の本体を取得する。読み込まれていない場合はNone"""
+        return self.__data
+
+    def is_identified(self) -> bool:
+        """MIMEタイプが判定済みかどうかを返す"""
+        return self.__mime_type is not None
+
+    def is_loaded(self) -> bool:
+        """ドキュメント本体がメモリ上にあるかどうかを返す"""
+        return self.__data is not None
+
+    def identify(self) -> tuple[str, str | None]:
+        """MIMEタイプとエンコーディングを判定する。判定済みの場合は判定結果を返す
+
+        Returns:
+            tuple[str, str | None]: MIMEタイプとエンコーディング。判定失敗時は("", None)
+        """
+        if self.__mime_type is None:
+            try:
+                with self.open() as f:
+                    with MetricsUtil.span("classify") as span:
+                        mime_type, is_text = DocumentClassifier.classify(f, self.identifier)
+                        span.set_format(_MimeTypeView(mime_type).get_document_type().value)
+                    encoding = None
+                    if is_text:
+                        with MetricsUtil.span("encoding", FileUtilDocumentType.TEXT.value) as span:
+                            f.seek(0)
+                            result = EncodingUtil.detect_stream(f)
+                            span.add_bytes(result.sampled_bytes)
+                        encoding = result.encoding
+                self.__mime_type, self.__encoding = mime_type, encoding
+            except Exception as e:
+                logger.debug(e)
+                self.__mime_type, self.__encoding = "", None
+        return self.__mime_type, self.__encoding
+
+    @classmethod
+    def identify_many(
+        cls, handles: Sequence["FileUtilDocumentHandle"], batch_size: int | None = None
+        ) -> list[str | None]:
+        """複数のハンドルのMIMEタイプとエンコーディングをまとめて判定する
+
+        Magikaで判定するファイルはbatch_size件ごとに1回の推論で判定します。判定済みのハンドルは判定しません。
+
+        Args:
+            handles: 判定対象のハンドル
+            batch_size: 1回の推論で判定する最大件数。未指定の場合はMAGIKA_BATCH_SIZE
+
+        Returns:
+            list[str | None]: handlesの順の、読み込みに失敗した場合のエラーメッセージ
+        """
+        errors: list[str | None] = [None] * len(handles)
+        targets = [index for index, handle in enumerate(handles) if not handle.is_identified()]
+        with MetricsUtil.span("classify_batch"):
+            results = DocumentClassifier.classify_many(
+                [(handles[index].identifier, handles[index].open) for index in targets], batch_size
+            )
+        for index, (mime_type, is_text, error) in zip(targets, results):
+            handle = handles[index]
+            encoding = None
+            if is_text and error is None:
+                try:
+                    with handle.open() as f:
+                        encoding = EncodingUtil.detect_stream(f).encoding
+                except Exception as e:
+                    logger.debug(e)
+            handle.__mime_type, handle.__encoding = mime_type, encoding
+            errors[index] = error
+        return errors
+
+    def open(self) -> BinaryIO:
+        """ドキュメント本体を読み込むためのストリームを開く。呼び出し側でcloseしてください
+
+        Returns:
+            BinaryIO: ドキュメント本体のストリーム
+        """
+        data = self.__data
+        if data is None:
+            return StorageUtil.open(self.identifier)
+        if isinstance(data, bytes):
+            # io.BytesIOはbytesをコピーせずに参照する
+            return io.BytesIO(data)
+        return BufferReader(data)
+
+    def read(self) -> "bytes | bytearray | memoryview | mmap.mmap":
+        """ドキュメント本体を取得する
+
+        本体がメモリ上にない場合はファイルをメモリマップして返します。
+        メモリマップはページ単位で遅延読み込みされるため、ファイル全体をコピーしません。
+        リモートのファイルはメモリマップできないため、ファイル全体を読み込みます。
+
+        Returns:
+            bytes | bytearray | memoryview | mmap.mmap: ドキュメント本体
+        """
+        if self.__data is not None:
+            return self.__data
+        if StorageUtil.is_remote(self.identifier):
+            return StorageUtil.get_storage(self.identifier).read_bytes(self.identifier)
+        with open(self.identifier, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _MimeTypeView(FileUtilDocumentTypeMixin):
+    """判定中のMIMEタイプから種類を求めるためのビュー"""
+
+    __slots__ = ("mime_type",)
+
+    def __init__(self, mime_type: str):
+        self.mime_type = mime_type
+
+
+class FileUtilDocument(FileUtilDocumentTypeMixin, BaseModel):
+    """FileUtilDocumentHandleのpydanticモデルのビュー
+
+    本体はハンドルと同じオブジェクトを参照するため、モデルの作成時にコピーしません。
+    dataは検証しないため、bytesのほかmemoryview, mmapなどのバッファもそのまま保持します。
+    """
+
+    identifier: str = Field(..., description="Identifier of the document")
+    data: SkipValidation[bytes] = Field(b"", description="Document data as bytes. Empty if only the header was read")
+    __handle: FileUtilDocumentHandle = PrivateAttr()
+
+    @property
+    def mime_type(self) -> str:
+        """MIMEタイプを取得する"""
+        return self.__handle.mime_type
+    @property
+    def encoding(self) -> str | None:
+        """エンコーディングを取得する"""
+        return self.__handle.encoding
+
+    @property
+    def handle(self) -> FileUtilDocumentHandle:
+        """ハンドルを取得する"""
+        return self.__handle
+
+    def __init__(
+        self, mime_type: str | None = None, encoding: str | None = None,
+        data: "bytes | bytearray | memoryview | mmap.mmap | None" = None,
+        handle: FileUtilDocumentHandle | None = None, **fields,
+        ):
+        if handle is not None:
+            fields.setdefault("identifier", handle.identifier)
+            data = handle.data
+        super().__init__(data=b"" if data is None else data, **fields)
+        if handle is None:
+            handle = FileUtilDocumentHandle(self.identifier, data, mime_type, encoding)
+        # MIMEタイプが判定済みの場合はデータからの判定を省略する
+        handle.identify()
+        self.__handle = handle
+
+    @classmethod
+    def from_file(cls, document_path: str, header_only: bool = False) -> "FileUtilDocument":
+        """ファイルパスからFileUtilDocumentインスタンスを作成する
+
+        Args:
+            document_path: ドキュメントのファイルパスまたは smb://, mem:// 形式のパス
+            header_only: Trueの場合はファイル全体を読み込まず、先頭・末尾の一部のみで
+                種類とエンコーディングを判定する。本体が必要な場合は open_data() または read_data() を使用する
+
+        Returns:
+            FileUtilDocument: 作成されたFileUtilDocumentインスタンス
+        """
+        if header_only:
+            return cls(handle=FileUtilDocumentHandle.from_file(document_path, identify=True))
+
+        # ファイルのバイト列を取得
+        with StorageUtil.open(document_path) as f:
+            byte_data = f.read()
+
+        return cls(data=byte_data, identifier=document_path)
+
+    def is_data_loaded(self) -> bool:
+        """ドキュメント本体がメモリ上に読み込まれているかどうかを返す"""
+        return self.__handle.is_loaded()
+
+    def open_data(self) -> BinaryIO:
+        """ドキュメント本体を読み込むためのストリームを開く
+
+        本体が読み込まれていない場合はファイルを開いて返します。呼び出し側でcloseしてください。
+
+        Returns:
+            BinaryIO: ドキュメント本体のストリーム
+        """
+        return self.__handle.open()
+
+    def read_data(self) -> "bytes | bytearray | memoryview | mmap.mmap":
+        """ドキュメント本体を取得する
+
+        本体が読み込まれていない場合はファイルをメモリマップして返します。
+
+        Returns:
+            bytes | bytearray | memoryview | mmap.mmap: ドキュメント本体
+        """
+        return self.__handle.read()
+
+    @classmethod
+    def identify_data_type(cls, data: bytes) -> tuple[str | None, str | None]:
+        """バイト列のMIMEタイプとエンコーディングを判定する
+
+        Args:
+            data: 判定対象のバイト列(bytes, memoryview, mmapなど)
+
+        Returns:
+            tuple[str | None, str | None]:
+                MIMEタイプ文字列とエンコーディング文字列のタプル。
+                判定失敗時は(None, None)
+        """
+        mime_type, encoding = FileUtilDocumentHandle("<bytes>", data).identify()
+        return mime_type or None, encoding
+
+    @classmethod
+    def identify_file_type(cls, filename) -> tuple[str | None, str | None]:
+        """ファイルのMIMEタイプとエンコーディングを判定する
+
+        ファイルはストレージ経由で開き、判定に必要な先頭・末尾の一部のみを読み込みます。
+
+        Args:
+            filename: 判定対象のファイルパスまたは smb://, mem:// 形式のパス
+
+        Returns:
+            tuple[str | None, str | None]:
+                MIMEタイプ文字列とエンコーディング文字列のタプル。
+                判定失敗時は(None, None)
+        """
+        mime_type, encoding = FileUtilDocumentHandle(str(filename)).identify()
+        return mime_type or None, encoding
+
+    @classmethod
+    def get_encoding(cls, filename) -> str | None:
+        """ファイルのエンコーディングを判定する
+
+        BOM、UTF-8の順に判定し、判定できない場合は最初の非ASCIIのバイトから
+        ENCODING_SAMPLE_BYTESまでをchardetで判定します。ファイル全体は読み込みません。
+
+        Args:
+            filename: 判定対象のファイルパス
+
+        Returns:
+            str | None: エンコーディング文字列。判定失敗時はNone
+        """
+        with StorageUtil.open(str(filename)) as f:
+            return EncodingUtil.detect_stream(f).encoding
     
+    @classmethod
+    def get_encoding_from_bytes(cls, byte_data: bytes) -> str | None:
+        """バイト列からエンコーディングを判定する
+
+        データ全体ではなく、最初の非ASCIIのバイトからENCODING_SAMPLE_BYTESまでのみで判定します。
+
+        Args:
+            byte_data: 判定対象のバイト列
+
+        Returns:
+            str | None: エンコーディング文字列。判定失敗時はNone
+        """
+        return EncodingUtil.detect(byte_data).encoding
+
@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+import zipfile
+from typing import BinaryIO, Callable, Iterator, Sequence
+
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.util.magika_util import MagikaUtil
+import file_util.log.log_settings as log_settings
+logger = log_settings.getLogger(__name__)
+
+
+class DocumentClassifier:
+    """ファイルの種類を段階的に判定するクラス
+
+    以下の順に判定し、判定できた段階で終了します。Magikaのモデルは前の段階で判定できない場合のみ実行します。
+
+    1. signature: マジックナンバー。PDFのヘッダー、OOXML(docx, xlsx, pptx)のZIP内の[Content_Types].xml
+    2. extension: 拡張子。テキストの拡張子で、先頭にNULなどのバイナリのバイトを含まない場合
+    3. magika: Magikaのモデル
+
+    前の段階をどこまで信頼するかはCLASSIFIER_TRUSTで指定します。
+
+    - signature: マジックナンバーのみで判定する(既定)
+    - strict: マジックナンバーと拡張子が一致する場合のみ判定する
+    - magika: 常にMagikaで判定する
+    """
+
+    SIGNATURE = "signature"
+    EXTENSION = "extension"
+    MAGIKA = "magika"
+    STRICT = "strict"
+    TRUST_POLICIES = (SIGNATURE, STRICT, MAGIKA)
+
+    # マジックナンバーと拡張子の判定で読み込む先頭のバイト数
+    HEAD_SIZE = 4096
+    # 読み込む[Content_Types].xmlの最大サイズ
+    CONTENT_TYPES_MAX_BYTES = 64 * 1024
+
+    PDF_MIME_TYPE = "application/pdf"
+    ZIP_MIME_TYPE = "application/zip"
+    # [Content_Types].xmlのメインパートのコンテンツタイプとMIMEタイプ、拡張子
+    OOXML_MAIN_CONTENT_TYPES = (
+        ("application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+         "application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"),
+        ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml",
+         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+        ("application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml",
+         "application/vnd.openxmlformats-officedocument.presentationml.presentation", ".pptx"),
+    )
+    # 拡張子で判定するテキストのMIMEタイプ(Magikaの判定結果と同じ名前)
+    TEXT_EXTENSIONS = {
+        ".txt": "text/plain",
+        ".csv": "text/csv",
+        ".md": "text/markdown",
+    }
+    # テキストに含まれない制御文字(タブ・改行・改ページ・ESCを除く)
+    BINARY_BYTES = bytes(range(0, 8)) + bytes(range(14, 27)) + bytes(range(28, 32))
+    # UTF-16, UTF-32のテキストはNULを含むため、BOMがある場合はバイナリのバイトを確認しない
+    TEXT_BOMS = (b"\xff\xfe", b"\xfe\xff", b"\xef\xbb\xbf")
+
+    __stats_lock = threading.Lock()
+    __stats: dict[str, dict[str, float]] = {}
+
+    @classmethod
+    def classify(cls, stream: BinaryIO, identifier: str = "") -> tuple[str, bool]:
+        """ストリームのMIMEタイプを判定する
+
+        Args:
+            stream: 判定対象のシーク可能なストリーム
+            identifier: ファイルパスまたは拡張子を含む識別子
+
+        Returns:
+            tuple[str, bool]: MIMEタイプ(判定できない場合は空文字列)とテキストかどうか
+        """
+        start = time.perf_counter()
+        result = cls.__classify_without_model(stream, identifier)
+        if result is None:
+            stream.seek(0)
+            res = MagikaUtil.identify_stream(stream)
+            result = (res.output.mime_type or "", res.dl.is_text, cls.MAGIKA)
+
+        mime_type, is_text, tier = result
+        elapsed = time.perf_counter() - start
+        cls.__record(tier, 1, elapsed)
+        logger.debug(f"Classified {identifier} as {mime_type} ({tier}) in {elapsed * 1000:.2f} ms")
+        return mime_type, is_text
+
+    @classmethod
+    def classify_many(
+        cls, sources: Sequence[tuple[str, Callable[[], BinaryIO]]], batch_size: int | None = None
+        ) -> list[tuple[str, bool, str | None]]:
+        """複数のファイルのMIMEタイプをまとめて判定する
+
+        マジックナンバー・拡張子で判定できないファイルは、Magikaでbatch_size件ごとに1回の推論で判定します。
+        ファイルは1度だけ開き、判定に必要な部分を読み込んだ時点で閉じます。
+
+        Args:
+            sources: 識別子とストリームを開く関数の組
+            batch_size: 1回の推論で判定する最大件数。未指定の場合はMAGIKA_BATCH_SIZE
+
+        Returns:
+            list[tuple[str, bool, str | None]]: sourcesの順のMIMEタイプ(判定できない場合は空文字列)、
+                テキストかどうか、読み込みに失敗した場合のエラーメッセージ
+        """
+        results: list[tuple[str, bool, str | None]] = [("", False, None)] * len(sources)
+        # Magikaで判定するファイルの番号
+        pending: list[int] = []
+        # Magikaを使わずに判定したファイルの処理時間の合計
+        elapsed_without_model = 0.0
+
+        def iter_ambiguous_streams() -> Iterator[BinaryIO]:
+            nonlocal elapsed_without_model
+            for index, (identifier, open_stream) in enumerate(sources):
+                start = time.perf_counter()
+                try:
+                    with open_stream() as stream:
+                        result = cls.__classify_without_model(stream, identifier)
+                        if result is None:
+                            pending.append(index)
+                            stream.seek(0)
+                            yield stream
+                            continue
+                except Exception as e:
+                    logger.debug(f"Failed to classify {identifier}: {e}")
+                    results[index] = ("", False, str(e))
+                    elapsed_without_model += time.perf_counter() - start
+                    continue
+                mime_type, is_text, tier = result
+                elapsed = time.perf_counter() - start
+                elapsed_without_model += elapsed
+                cls.__record(tier, 1, elapsed)
+                results[index] = (mime_type, is_text, None)
+
+        start = time.perf_counter()
+        outputs = MagikaUtil.identify_streams(iter_ambiguous_streams(), batch_size)
+        if pending:
+            cls.__record(cls.MAGIKA, len(pending), time.perf_counter() - start - elapsed_without_model)
+        for index, res in zip(pending, outputs):
+            if res is None:
+                results[index] = ("", False, "Failed to read the file")
+            else:
+                results[index] = (res.output.mime_type or "", res.dl.is_text, None)
+        return results
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """判定した段階ごとの回数と合計の処理時間を返す
+
+        Returns:
+            dict: 段階(signature, extension, magika)ごとの統計情報
+        """
+        with cls.__stats_lock:
+            return {tier: dict(stats) for tier, stats in cls.__stats.items()}
+
+    @classmethod
+    def __classify_without_model(cls, stream: BinaryIO, identifier: str) -> tuple[str, bool, str] | None:
+        # マジックナンバー・拡張子で判定する。判定できない場合またはCLASSIFIER_TRUSTがmagikaの場合はNone
+        trust = FileUtilConfig.get_instance().classifier_trust
+        if trust == cls.MAGIKA:
+            return None
+        extension = os.path.splitext(identifier)[1].lower()
+        stream.seek(0)
+        head = stream.read(cls.HEAD_SIZE)
+        result = cls.__classify_signature(stream, head, extension, trust == cls.STRICT)
+        if result is None:
+            result = cls.__classify_extension(head, extension)
+        return result
+
+    @classmethod
+    def __record(cls, tier: str, count: int, elapsed: float) -> None:
+        with cls.__stats_lock:
+            stats = cls.__stats.setdefault(tier, {"count": 0, "total_seconds": 0.0})
+            stats["count"] += count
+            stats["total_seconds"] += elapsed
+
+    @classmethod
+    def __classify_signature(
+        cls, stream: BinaryIO, head: bytes, extension: str, strict: bool
+        ) -> tuple[str, bool, str] | None:
+        # PDFのヘッダーは先頭1024バイト以内にあればよいが、先頭以外の場合は本文中の文字列の可能性があるため、
+        # 前のバイトがテキストではなく、拡張子がテキストのものでない場合のみPDFと判定する
+        position = head.find(b"%PDF-", 0, 1024)
+        if position == 0 or (
+            position > 0 and extension not in cls.TEXT_EXTENSIONS and cls.__has_binary_bytes(head[:position])
+            ):
+            if strict and extension != ".pdf":
+                return None
+            return cls.PDF_MIME_TYPE, False, cls.SIGNATURE
+        if not head.startswith(b"PK\x03\x04"):
+            return None
+
+        # セントラルディレクトリと[Content_Types].xmlのみを読み込む
+        try:
+            stream.seek(0)
+            with zipfile.ZipFile(stream) as zip_ref:
+                if "[Content_Types].xml" not in zip_ref.NameToInfo:
+                    # Office文書ではないZIPファイルは、Magikaが格納されたファイルの形式と判定することがあるため拡張子で判定する
+                    return (cls.ZIP_MIME_TYPE, False, cls.SIGNATURE) if extension == ".zip" else None
+                with zip_ref.open("[Content_Types].xml") as f:
+                    content_types = f.read(cls.CONTENT_TYPES_MAX_BYTES).decode("utf-8", errors="replace")
+        except (zipfile.BadZipFile, OSError, ValueError) as e:
+            logger.debug(f"Failed to read the ZIP signature: {e}")
+            return None
+
+        for content_type, mime_type, ooxml_extension in cls.OOXML_MAIN_CONTENT_TYPES:
+            if content_type in content_types:
+                if strict and extension != ooxml_extension:
+                    return None
+                return mime_type, False, cls.SIGNATURE
+        # テンプレートやマクロ有効の文書などはMagikaで判定する
+        return None
+
+    @classmethod
+    def __classify_extension(cls, head: bytes, extension: str) -> tuple[str, bool, str] | None:
+        mime_type = cls.TEXT_EXTENSIONS.get(extension)
+        if mime_type is None or not head:
+            return None
+        if not head.startswith(cls.TEXT_BOMS) and cls.__has_binary_bytes(head):
+            return None
+        return mime_type, True, cls.EXTENSION
+
+    @classmethod
+    def __has_binary_bytes(cls, data: bytes) -> bool:
+        return len(data.translate(None, cls.BINARY_BYTES)) != len(data)
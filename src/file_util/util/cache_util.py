@@ -0,0 +1,225 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from pydantic import BaseModel, Field
+
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.util.storage_util import StorageUtil
+from file_util.util.text_sanitizer import TextSanitizer
+import file_util.log.log_settings as log_settings
+logger = log_settings.getLogger(__name__)
+
+
+class ExtractionCacheEntry(BaseModel):
+    text: str = Field(..., description="Sanitized extracted text")
+    mime_type: str = Field("", description="MIME type of the source document")
+    encoding: str | None = Field(None, description="Encoding of the source document")
+
+
+class ExtractionCache:
+    """テキスト抽出結果をディスク上に保存するキャッシュ
+
+    抽出結果はファイル内容のハッシュ値(SHA-256)をキーとしてSQLiteに保存します。
+    抽出結果は設定によって変わるため、キーには正規化したTEXT_SANITIZE_RULESの規則、WORD_EXTRACTOR・
+    PPT_EXTRACTORの抽出エンジン、CLASSIFIER_TRUSTを含め
+    ("<ハッシュ値>|rules=crlf,nfkc;word=python-docx;ppt=python-pptx;trust=signature")、
+    設定を変更した場合は別のエントリとします。キーの形式を変えた場合はKEY_VERSIONを上げます。
+    ファイルパスからの検索では(パス, サイズ, 更新日時, inode)が一致する場合は
+    ハッシュ計算を省略し、一致しない場合のみファイル内容からハッシュを計算します。
+    保存したテキストの合計サイズが上限を超えた場合は、最も長く参照されていない
+    エントリから削除します(LRU)。
+    """
+
+    DB_FILE_NAME = "extraction_cache.sqlite3"
+    # 抽出処理の変更で以前のエントリを使わないようにする場合に上げる
+    KEY_VERSION = 1
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    __instance: "ExtractionCache | None" = None
+    __instance_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(os.path.join(cache_dir, self.DB_FILE_NAME), check_same_thread=False)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " content_hash TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " mime_type TEXT NOT NULL,"
+            " encoding TEXT,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self.__conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_keys ("
+            " path TEXT PRIMARY KEY,"
+            " file_size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " content_hash TEXT NOT NULL)"
+        )
+        self.__conn.commit()
+
+    @classmethod
+    def get_instance(cls) -> "ExtractionCache | None":
+        """設定に基づいて共有キャッシュを取得する
+
+        Returns:
+            ExtractionCache | None: キャッシュ。EXTRACTION_CACHE_DIRが未設定の場合はNone
+        """
+        if cls.__instance is not None:
+            return cls.__instance
+        config = FileUtilConfig.get_instance()
+        if not config.extraction_cache_dir:
+            return None
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = cls(config.extraction_cache_dir, config.extraction_cache_max_bytes)
+            return cls.__instance
+
+    @classmethod
+    def hash_bytes(cls, data: bytes) -> str:
+        """バイト列のハッシュ値を計算する"""
+        return hashlib.sha256(data).hexdigest()
+
+    @classmethod
+    def hash_file(cls, filename: str) -> str:
+        """ファイル内容のハッシュ値を計算する。ファイルは一定サイズずつ読み込む"""
+        digest = hashlib.sha256()
+        with StorageUtil.open(filename) as f:
+            while chunk := f.read(cls.HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_content_hash(self, filename: str) -> str:
+        """ファイルのハッシュ値を取得する
+
+        (パス, サイズ, 更新日時, inode)が前回と一致する場合は保存済みのハッシュ値を返し、
+        一致しない場合はファイル内容からハッシュ値を計算して保存します。
+
+        Args:
+            filename: 対象のファイルパス
+
+        Returns:
+            str: ファイル内容のハッシュ値
+        """
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT file_size, mtime_ns, inode, content_hash FROM file_keys WHERE path = ?", (path,)
+            ).fetchone()
+        if row is not None and tuple(row[:3]) == (st.st_size, st.st_mtime_ns, st.st_ino):
+            return row[3]
+
+        content_hash = self.hash_file(path)
+        with self.__lock:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO file_keys (path, file_size, mtime_ns, inode, content_hash) VALUES (?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, content_hash),
+            )
+            self.__conn.commit()
+        return content_hash
+
+    def get(self, content_hash: str) -> ExtractionCacheEntry | None:
+        """キャッシュから抽出結果を取得する
+
+        Args:
+            content_hash: ファイル内容のハッシュ値
+
+        Returns:
+            ExtractionCacheEntry | None: 抽出結果。キャッシュにない場合はNone
+        """
+        key = self.__get_entry_key(content_hash)
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT text, mime_type, encoding FROM entries WHERE content_hash = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.__conn.execute(
+                "UPDATE entries SET last_access = ? WHERE content_hash = ?", (time.time(), key)
+            )
+            self.__conn.commit()
+            self.hits += 1
+        return ExtractionCacheEntry(text=row[0], mime_type=row[1], encoding=row[2])
+
+    def put(self, content_hash: str, entry: ExtractionCacheEntry) -> None:
+        """抽出結果をキャッシュに保存する。上限を超えた場合は古いエントリを削除する
+
+        Args:
+            content_hash: ファイル内容のハッシュ値
+            entry: 抽出結果
+        """
+        size = len(entry.text.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.debug(f"Skip caching {content_hash}: {size} bytes exceeds the cache limit")
+            return
+        with self.__lock:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO entries (content_hash, text, mime_type, encoding, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self.__get_entry_key(content_hash), entry.text, entry.mime_type, entry.encoding, size, time.time()),
+            )
+            self.__evict()
+            self.__conn.commit()
+
+    def __evict(self) -> None:
+        total = self.__conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.__conn.execute("SELECT content_hash, size FROM entries ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.__conn.execute("DELETE FROM entries WHERE content_hash = ?", (key,))
+            self.__conn.execute("DELETE FROM file_keys WHERE content_hash = ?", (key.partition("|")[0],))
+            total -= size
+            self.evictions += 1
+
+    def __get_entry_key(self, content_hash: str) -> str:
+        # 抽出結果に影響する設定をハッシュ値に付けてキーとする
+        config = FileUtilConfig.get_instance()
+        rules = ",".join(TextSanitizer.normalize_rules(config.text_sanitize_rules))
+        return (
+            f"{content_hash}|v={self.KEY_VERSION};rules={rules};word={config.word_extractor};"
+            f"ppt={config.ppt_extractor};trust={config.classifier_trust}"
+        )
+
+    def clear(self) -> None:
+        """キャッシュをすべて削除する"""
+        with self.__lock:
+            self.__conn.execute("DELETE FROM entries")
+            self.__conn.execute("DELETE FROM file_keys")
+            self.__conn.commit()
+
+    def get_stats(self) -> dict:
+        """キャッシュの統計情報を返す
+
+        Returns:
+            dict: ヒット数、ミス数、削除数、エントリ数、合計サイズ
+        """
+        with self.__lock:
+            entries, total = self.__conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "total_bytes": total,
+                "max_bytes": self.max_bytes,
+            }
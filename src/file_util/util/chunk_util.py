@@ -0,0 +1,231 @@
+from typing import Callable
+
+from file_util.model import FileUtilTextChunk
+
+
+class TextChunker:
+    """テキストを文字数またはトークン数の上限で分割するクラス
+
+    feed()で抽出したテキストを位置情報(PDFのページ、Excelのシートと行、PowerPointのスライド)と
+    ともに順に渡すと、上限に達したチャンクから返します。保持するのは作成中のチャンクのみです。
+    チャンクは行の境界で区切り、上限を超える行は途中で分割します。
+    次のチャンクの先頭には前のチャンクの末尾をoverlapのサイズまで含めます。
+    Excelのシートが変わる場合は、シートをまたがないようにチャンクを区切ります。
+
+    トークン数はtiktokenで数えます(`pip install file_util[tokens]`)。チャンクのサイズは連結したテキストの
+    トークン数です。行ごとのトークン数の合計は連結したテキストのトークン数以上のため、合計が上限を超えた場合のみ
+    連結したテキストのトークン数を数え直します。
+    """
+
+    CHARS = "chars"
+    TOKENS = "tokens"
+    UNITS = (CHARS, TOKENS)
+
+    def __init__(self, max_size: int, overlap: int = 0, unit: str = CHARS, token_encoding: str = "cl100k_base"):
+        """
+        Args:
+            max_size: 1チャンクの最大サイズ(文字数またはトークン数)
+            overlap: 前のチャンクと重複させるサイズ。max_size未満
+            unit: サイズの単位。chars または tokens
+            token_encoding: unitがtokensの場合のtiktokenのエンコーディング名
+
+        Raises:
+            ValueError: パラメーターが不正な場合、またはtokensの指定でtiktokenがインストールされていない場合
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if overlap < 0 or overlap >= max_size:
+            raise ValueError("overlap must be between 0 and max_size - 1")
+        if unit not in self.UNITS:
+            raise ValueError(f"Unknown chunk unit: {unit}. Use one of {', '.join(self.UNITS)}")
+        self.max_size = max_size
+        self.overlap = overlap
+        self.unit = unit
+        self.__measure: Callable[[str], int] = len
+        if unit == self.TOKENS:
+            try:
+                import tiktoken
+            except ImportError as e:
+                raise ValueError(
+                    "tiktoken is required to split text by tokens. Install it with `pip install file_util[tokens]`"
+                ) from e
+            encoding = tiktoken.get_encoding(token_encoding)
+            self.__measure = lambda text: len(encoding.encode(text, disallowed_special=()))
+
+        # 作成中のチャンクの行(全体のテキストでの開始位置, テキスト, 位置情報)
+        self.__pieces: list[tuple[int, str, dict]] = []
+        # 作成中のチャンクのサイズ。tokensの場合は連結したテキストのトークン数以上の値
+        self.__size = 0
+        # 次に渡されるテキストの全体のテキストでの位置
+        self.__offset = 0
+        self.__index = 0
+        self.__sheet_name: str | None = None
+        # set_stateで復元した行の長さ。restoreでテキストを設定する
+        self.__lengths: list[int] = []
+
+    def feed(self, text: str, location: dict | None = None) -> list[FileUtilTextChunk]:
+        """テキストを追加する
+
+        Args:
+            text: 追加するテキスト
+            location: テキストの位置情報。page, sheet_name, row, slide(いずれも1始まり)
+
+        Returns:
+            list[FileUtilTextChunk]: 上限に達して確定したチャンク
+        """
+        location = location or {}
+        chunks: list[FileUtilTextChunk] = []
+        sheet_name = location.get("sheet_name")
+        if sheet_name != self.__sheet_name:
+            # シートをまたがないように、重複させずにチャンクを区切る
+            if self.__pieces:
+                chunks.append(self.__emit(keep_overlap=False))
+            self.__sheet_name = sheet_name
+
+        for line in text.splitlines(keepends=True):
+            for part in self.__split(line):
+                size = self.__measure(part)
+                if not self.__add(part, size, location):
+                    chunks.append(self.__emit(keep_overlap=True))
+                    # 重複させた部分と合わせて上限を超える場合は、重複を減らす
+                    while not self.__add(part, size, location):
+                        self.__pieces.pop(0)
+                        self.__size = self.__measure(self.__text())
+                self.__offset += len(part)
+        return chunks
+
+    def finish(self) -> list[FileUtilTextChunk]:
+        """作成中のチャンクを確定する
+
+        Returns:
+            list[FileUtilTextChunk]: 最後のチャンク。テキストがない場合は空のリスト
+        """
+        if not self.__pieces:
+            return []
+        return [self.__emit(keep_overlap=False)]
+
+    def get_state(self) -> dict:
+        """作成中のチャンクの行の位置と次のチャンクの番号・位置を返す
+
+        作成中のチャンクのテキストは含めないため、状態の大きさはチャンクのサイズによりません。
+
+        Returns:
+            dict: set_stateで復元できるJSONに変換可能な状態。piecesは行の(開始位置, 長さ, 位置情報)
+        """
+        return {
+            "pieces": [[start, len(text), location] for start, text, location in self.__pieces],
+            "offset": self.__offset,
+            "index": self.__index,
+            "sheet_name": self.__sheet_name,
+        }
+
+    def set_state(self, state: dict) -> None:
+        """get_stateで取得した状態を復元する。分割の条件(max_size, overlap, unit)は同じである必要がある
+
+        作成中のチャンクのテキストは、続けてrestoreで設定します。
+        """
+        self.__pieces = [(start, "", location) for start, _, location in state["pieces"]]
+        self.__lengths = [length for _, length, _ in state["pieces"]]
+        self.__size = 0
+        self.__offset = state["offset"]
+        self.__index = state["index"]
+        self.__sheet_name = state["sheet_name"]
+
+    def restore(self, text: str, start: int) -> None:
+        """set_stateで復元した作成中のチャンクのテキストを設定する
+
+        作成中のチャンクの先頭から状態を取得した位置までのテキストを、位置の順に1回以上に分けて渡します。
+
+        Args:
+            text: 全体のテキストのstartの位置からのテキスト
+            start: textの全体のテキストでの位置
+        """
+        end = start + len(text)
+        pieces = []
+        for (piece_start, piece_text, location), length in zip(self.__pieces, self.__lengths):
+            piece_end = piece_start + length
+            if piece_start < end and start < piece_end:
+                piece_text += text[max(piece_start, start) - start:min(piece_end, end) - start]
+            pieces.append((piece_start, piece_text, location))
+        self.__pieces = pieces
+        self.__size = self.__measure(self.__text())
+
+    def __split(self, text: str) -> list[str]:
+        # 上限を超える行を上限以下に分割する
+        parts = []
+        while self.__measure(text) > self.max_size:
+            length = self.__fit(text, self.max_size)
+            parts.append(text[:length])
+            text = text[length:]
+        if text:
+            parts.append(text)
+        return parts
+
+    def __fit(self, text: str, size: int, from_end: bool = False) -> int:
+        # サイズがsize以下となる先頭(from_endの場合は末尾)からの最大の文字数を返す
+        if self.unit == self.CHARS:
+            return min(size, len(text))
+        total = self.__measure(text)
+        if total <= size:
+            return len(text)
+        # トークン数の比率から文字数を見積もり、収まるまで縮める
+        length = max(1, len(text) * size // total)
+        while length > 1:
+            part = text[-length:] if from_end else text[:length]
+            if self.__measure(part) <= size:
+                break
+            length = length * 9 // 10
+        return length
+
+    def __text(self) -> str:
+        return "".join(piece[1] for piece in self.__pieces)
+
+    def __add(self, part: str, size: int, location: dict) -> bool:
+        # 上限を超えない場合はpartを作成中のチャンクに追加する。sizeはpartのみのサイズ
+        total = self.__size + size
+        if total > self.max_size and self.unit == self.TOKENS and self.__pieces:
+            # 行ごとのトークン数の合計が上限を超える場合のみ、連結したテキストのトークン数を数える
+            total = self.__measure(self.__text() + part)
+        if self.__pieces and total > self.max_size:
+            return False
+        self.__pieces.append((self.__offset, part, location))
+        self.__size = total
+        return True
+
+    def __emit(self, keep_overlap: bool) -> FileUtilTextChunk:
+        pieces = self.__pieces
+        text = self.__text()
+        locations = [piece[2] for piece in pieces]
+        pages = [loc["page"] for loc in locations if "page" in loc]
+        rows = [loc["row"] for loc in locations if "row" in loc]
+        slides = [loc["slide"] for loc in locations if "slide" in loc]
+        chunk = FileUtilTextChunk(
+            index=self.__index,
+            text=text,
+            size=self.__measure(text) if self.unit == self.TOKENS else self.__size,
+            start_offset=pieces[0][0],
+            end_offset=pieces[0][0] + len(text),
+            start_page=min(pages) if pages else None,
+            end_page=max(pages) if pages else None,
+            sheet_name=self.__sheet_name,
+            start_row=min(rows) if rows else None,
+            end_row=max(rows) if rows else None,
+            start_slide=min(slides) if slides else None,
+            end_slide=max(slides) if slides else None,
+        )
+        self.__index += 1
+
+        # 末尾の行を重複させるサイズまで残す。収まらない行は末尾の一部のみを残す
+        self.__pieces = []
+        if keep_overlap and self.overlap > 0:
+            tail = ""
+            for start, piece_text, location in reversed(pieces):
+                if self.__measure(piece_text + tail) > self.overlap:
+                    length = self.__fit(piece_text, self.overlap - self.__measure(tail), from_end=True)
+                    if length > 0 and self.__measure(piece_text[-length:] + tail) <= self.overlap:
+                        self.__pieces.insert(0, (start + len(piece_text) - length, piece_text[-length:], location))
+                    break
+                self.__pieces.insert(0, (start, piece_text, location))
+                tail = piece_text + tail
+        self.__size = self.__measure(self.__text())
+        return chunk
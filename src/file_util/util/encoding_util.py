@@ -0,0 +1,167 @@
+import codecs
+import re
+import threading
+import time
+from typing import BinaryIO
+
+from file_util.config.file_util_config import FileUtilConfig
+import file_util.log.log_settings as log_settings
+logger = log_settings.getLogger(__name__)
+
+
+class EncodingResult:
+    """エンコーディングの判定結果"""
+
+    def __init__(self, encoding: str | None, confidence: float, method: str, sampled_bytes: int, elapsed_seconds: float):
+        self.encoding = encoding
+        self.confidence = confidence
+        # 判定した段階(bom, ascii, utf-8, chardet)
+        self.method = method
+        self.sampled_bytes = sampled_bytes
+        self.elapsed_seconds = elapsed_seconds
+
+
+class EncodingUtil:
+    """テキストのエンコーディングを判定するユーティリティクラス
+
+    以下の順に判定し、判定できた段階で終了します。
+
+    1. BOM(UTF-8, UTF-16, UTF-32)
+    2. ASCIIのみのデータ。最初の非ASCIIのバイトまでは正規表現で読み飛ばす。
+       読み飛ばした範囲の後に非ASCIIの文字があっても失われないように、ASCIIの上位互換のutf-8と判定する
+    3. 最初の非ASCIIのバイトからENCODING_SAMPLE_BYTESまでがUTF-8として正しいかどうか
+    4. 同じ範囲をchardetに少しずつ渡し、判定が確定した時点で終了する
+
+    chardetにはデータ全体ではなく上限までのサンプルのみを渡します。
+    """
+
+    # chardetに1度に渡すバイト数
+    FEED_SIZE = 4096
+
+    # BOMとエンコーディング名(chardetと同じ名前)。UTF-32はUTF-16より先に判定する
+    BOMS = (
+        (codecs.BOM_UTF8, "UTF-8-SIG"),
+        (codecs.BOM_UTF32_LE, "UTF-32"),
+        (codecs.BOM_UTF32_BE, "UTF-32"),
+        (codecs.BOM_UTF16_LE, "UTF-16"),
+        (codecs.BOM_UTF16_BE, "UTF-16"),
+    )
+
+    # 非ASCIIのバイトまたはISO-2022-JPなどのエスケープシーケンスの開始
+    NON_ASCII_PATTERN = re.compile(rb"[\x80-\xff\x1b]")
+
+    __stats_lock = threading.Lock()
+    __stats: dict[str, dict[str, float]] = {}
+
+    @classmethod
+    def detect(cls, data: bytes, max_sample_bytes: int | None = None) -> EncodingResult:
+        """バイト列のエンコーディングを判定する
+
+        Args:
+            data: 判定対象のバイト列(bytes, memoryview, mmapなど)
+            max_sample_bytes: UTF-8・chardetで判定するサンプルの最大サイズ。未指定の場合はENCODING_SAMPLE_BYTES
+
+        Returns:
+            EncodingResult: 判定結果
+        """
+        start = time.perf_counter()
+        max_sample_bytes = max_sample_bytes or FileUtilConfig.get_instance().encoding_sample_bytes
+        result = cls.__detect_bom(bytes(data[:4]))
+        if result is None:
+            match = cls.NON_ASCII_PATTERN.search(data)
+            if match is None:
+                result = ("utf-8", 1.0, "ascii", 0) if len(data) else (None, 0.0, "ascii", 0)
+            else:
+                end = match.start() + max_sample_bytes
+                result = cls.__detect_sample(bytes(data[match.start():end]), final=end >= len(data))
+        return cls.__record(result, start)
+
+    @classmethod
+    def detect_stream(
+        cls, stream: BinaryIO, max_sample_bytes: int | None = None, max_scan_bytes: int | None = None
+        ) -> EncodingResult:
+        """ストリームのエンコーディングを判定する
+
+        ストリームを先頭から読み込み、ASCIIのみの部分は読み飛ばします。最初の非ASCIIのバイトから
+        サンプルの上限までを読み込んだ時点で読み込みを終了します。
+
+        Args:
+            stream: 判定対象のストリーム
+            max_sample_bytes: UTF-8・chardetで判定するサンプルの最大サイズ。未指定の場合はENCODING_SAMPLE_BYTES
+            max_scan_bytes: ASCIIのみの部分を読み飛ばす最大サイズ。未指定の場合はENCODING_MAX_SCAN_BYTES。
+                これを超えてもASCIIのみの場合は、その後の非ASCIIの文字を失わないようにutf-8と判定する
+
+        Returns:
+            EncodingResult: 判定結果
+        """
+        start = time.perf_counter()
+        config = FileUtilConfig.get_instance()
+        max_sample_bytes = max_sample_bytes or config.encoding_sample_bytes
+        max_scan_bytes = max_scan_bytes or config.encoding_max_scan_bytes
+
+        block = stream.read(max_sample_bytes)
+        result = cls.__detect_bom(block[:4])
+        scanned = 0
+        while result is None:
+            match = cls.NON_ASCII_PATTERN.search(block)
+            if match is not None:
+                sample = block[match.start():]
+                if len(sample) < max_sample_bytes:
+                    sample += stream.read(max_sample_bytes - len(sample))
+                result = cls.__detect_sample(sample, final=len(sample) < max_sample_bytes)
+                break
+            scanned += len(block)
+            if len(block) < max_sample_bytes or scanned >= max_scan_bytes:
+                result = ("utf-8", 1.0, "ascii", 0) if scanned else (None, 0.0, "ascii", 0)
+                break
+            block = stream.read(max_sample_bytes)
+        return cls.__record(result, start)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """判定した段階ごとの回数、サンプルの合計バイト数、合計の処理時間を返す
+
+        Returns:
+            dict: 段階(bom, ascii, utf-8, chardet)ごとの統計情報
+        """
+        with cls.__stats_lock:
+            return {method: dict(stats) for method, stats in cls.__stats.items()}
+
+    @classmethod
+    def __detect_bom(cls, head: bytes) -> tuple[str | None, float, str, int] | None:
+        for bom, encoding in cls.BOMS:
+            if head.startswith(bom):
+                return encoding, 1.0, "bom", 0
+        return None
+
+    @classmethod
+    def __detect_sample(cls, sample: bytes, final: bool) -> tuple[str | None, float, str, int]:
+        # 最初の非ASCIIのバイトからのサンプルを判定する。finalがFalseの場合、サンプルの末尾は途中で切れている
+        if not sample.isascii():
+            try:
+                # 末尾で切れたマルチバイト文字はエラーとしない
+                codecs.getincrementaldecoder("utf-8")().decode(sample, final=final)
+                return "utf-8", 0.99, "utf-8", len(sample)
+            except UnicodeDecodeError:
+                pass
+
+        from chardet import UniversalDetector
+        detector = UniversalDetector()
+        fed = 0
+        while fed < len(sample) and not detector.done:
+            detector.feed(sample[fed:fed + cls.FEED_SIZE])
+            fed += cls.FEED_SIZE
+        detector.close()
+        return detector.result["encoding"], detector.result["confidence"] or 0.0, "chardet", min(fed, len(sample))
+
+    @classmethod
+    def __record(cls, result: tuple[str | None, float, str, int], start: float) -> EncodingResult:
+        elapsed = time.perf_counter() - start
+        encoding, confidence, method, sampled_bytes = result
+        with cls.__stats_lock:
+            stats = cls.__stats.setdefault(method, {"count": 0, "sampled_bytes": 0, "total_seconds": 0.0})
+            stats["count"] += 1
+            stats["sampled_bytes"] += sampled_bytes
+            stats["total_seconds"] += elapsed
+        logger.debug(f"Detected encoding {encoding} ({method}, confidence {confidence:.2f}) in {elapsed * 1000:.2f} ms")
+        return EncodingResult(encoding, confidence, method, sampled_bytes, elapsed)
@@ -1,41 +1,99 @@
 import datetime
-import openpyxl
+import zipfile
+import xml.etree.ElementTree as ET
 from io import StringIO
+from typing import IO, Iterator
+
 
 class ExcelUtil:
 
     # application/vnd.openxmlformats-officedocument.spreadsheetml.sheetのファイルを読み込んで文字列として返す関数
     @classmethod
-    def extract_text_from_sheet(cls, filename:str, sheet_name:str=""):
+    def extract_text_from_sheet(cls, filename: str | IO[bytes], sheet_name:str="", max_rows: int | None = None, columns: list[str] | None = None):
         # 出力用のストリームを作成
         output = StringIO()
-        wb = openpyxl.load_workbook(filename)
-        for sheet in wb:
-            # シート名が指定されている場合はそのシートのみ処理
-            if sheet_name and sheet.title != sheet_name:
-                continue
-            for row in sheet.iter_rows(values_only=True):
-                # 1行分のデータを格納するリスト
-                cells = []
-                for cell in row:
-                    # cell.valueがNoneの場合はcontinue
-                    if cell is None:
-                        continue
-                    # cell.valueがdatetime.datetimeの場合はisoformat()で文字列に変換
-                    if isinstance(cell, datetime.datetime):
-                        cells.append(cell.isoformat())
-                    else:
-                        cells.append(str(cell))
-                    
-                output.write("\t".join(cells))
-                output.write("\n")
-        
+        for _, _, line in cls.iter_rows_from_sheet(filename, sheet_name, max_rows, columns):
+            output.write(line)
+            output.write("\n")
+
         return output.getvalue()
 
+    # シートの行を1行ずつタブ区切りの文字列として返す関数
+    @classmethod
+    def iter_rows_from_sheet(
+        cls, filename: str | IO[bytes], sheet_name: str = "", max_rows: int | None = None, columns: list[str] | None = None,
+        start_sheet: str = "", start_row: int = 1,
+        ) -> Iterator[tuple[str, int, str]]:
+        """Excelファイルのシートを読み取り専用モードで1行ずつ読み込む
+
+        セルのオブジェクトをブック全体分作成せず、行を読み込みながら順に返します。
+
+        Args:
+            filename: Excelファイルのパスまたはファイルオブジェクト
+            sheet_name: 対象のシート名。空の場合はすべてのシート
+            max_rows: シートごとに読み込む最大行数(読み込みを開始する行から数える)
+            columns: 対象の列("A", "C"など)。未指定の場合はすべての列
+            start_sheet: 読み込みを開始するシート名。これより前のシートは読み込まない
+            start_row: start_sheetで読み込みを開始する行番号(1始まり)
+
+        Yields:
+            tuple[str, int, str]: シート名、行番号(1始まり)、タブ区切りの行の文字列
+        """
+        import openpyxl
+        from openpyxl.utils import column_index_from_string
+
+        column_indexes = [column_index_from_string(c.strip().upper()) - 1 for c in columns] if columns else None
+        wb = openpyxl.load_workbook(filename, read_only=True)
+        try:
+            sheets = [wb[sheet_name]] if sheet_name and sheet_name in wb.sheetnames else wb.worksheets
+            titles = [sheet.title for sheet in sheets]
+            if start_sheet in titles:
+                # 開始するシートより前のシートは読み込まない
+                sheets = sheets[titles.index(start_sheet):]
+            for sheet in sheets:
+                # シート名が指定されている場合はそのシートのみ処理
+                if sheet_name and sheet.title != sheet_name:
+                    continue
+                min_row = start_row if sheet.title == start_sheet else 1
+                max_row = min_row + max_rows - 1 if max_rows is not None else None
+                rows = sheet.iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+                for row_number, row in enumerate(rows, start=min_row):
+                    if column_indexes is not None:
+                        row = tuple(row[i] if i < len(row) else None for i in column_indexes)
+                    # 1行分のデータを格納するリスト
+                    cells = []
+                    for cell in row:
+                        # cell.valueがNoneの場合はcontinue
+                        if cell is None:
+                            continue
+                        # cell.valueがdatetime.datetimeの場合はisoformat()で文字列に変換
+                        if isinstance(cell, datetime.datetime):
+                            cells.append(cell.isoformat())
+                        else:
+                            cells.append(str(cell))
+
+                    yield sheet.title, row_number, "\t".join(cells)
+        finally:
+            # 読み取り専用モードではファイルを開いたままになるため明示的に閉じる
+            wb.close()
+
     # excelのシート名一覧を取得する関数
     @classmethod
     def get_sheet_names(cls, filename):
+        # ブックのメタデータ(xl/workbook.xml)のみを読み込み、シートの内容は読み込まない。
+        # Transitional・Strictで名前空間が異なるため、要素名のみで判定する
+        with zipfile.ZipFile(filename) as zf:
+            if "xl/workbook.xml" in zf.namelist():
+                with zf.open("xl/workbook.xml") as f:
+                    return [
+                        elem.attrib["name"]
+                        for _, elem in ET.iterparse(f)
+                        if elem.tag.rpartition("}")[2] == "sheet"
+                    ]
+        # 標準的でない構成のファイルはopenpyxlで読み込む
         import openpyxl
-        wb = openpyxl.load_workbook(filename)
-        return wb.sheetnames
-
+        wb = openpyxl.load_workbook(filename, read_only=True)
+        try:
+            return wb.sheetnames
+        finally:
+            wb.close()
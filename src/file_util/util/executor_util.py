@@ -0,0 +1,214 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+
+from file_util.config.file_util_config import FileUtilConfig
+import file_util.log.log_settings as log_settings
+logger = log_settings.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ExecutorUtil:
+    """ブロッキング処理をイベントループの外で実行するためのユーティリティクラス
+
+    I/O中心の処理(ZIP操作、ファイル種別判定など)はスレッドプールで、
+    CPU負荷の高いパーサー(pdfminer、openpyxlなど)はプロセスプールで実行します。
+    処理種別(kind)ごとに同時実行数の上限を設定でき、待ち数・実行数などを集計します。
+    """
+
+    __lock = threading.Lock()
+    __thread_pool: ThreadPoolExecutor | None = None
+    __process_pool: ProcessPoolExecutor | None = None
+    # イベントループごとの処理種別ごとのセマフォ
+    __semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+    __stats: dict[str, dict[str, int]] = {}
+
+    @classmethod
+    async def run_in_thread(cls, kind: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """I/O中心の処理をスレッドプールで実行する
+
+        Args:
+            kind: 処理種別。同時実行数の制限と集計に使用する
+            func: 実行する関数
+            *args, **kwargs: 関数の引数
+
+        Returns:
+            Any: 関数の戻り値
+        """
+        return await cls.__run(kind, cls.__get_thread_pool(), func, *args, **kwargs)
+
+    @classmethod
+    async def iter_in_thread(cls, kind: str, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """ブロッキングなイテレーターをスレッドプールで1件ずつ進める
+
+        呼び出し元が途中で終了・キャンセルされた場合も、実行中の要素の取得が終わるのを待ってから
+        イテレーター(ジェネレーター)を閉じます。
+
+        Args:
+            kind: 処理種別。同時実行数の制限と集計に使用する
+            iterator: 進めるイテレーター
+
+        Yields:
+            T: イテレーターの要素
+        """
+        end = object()
+        pending: asyncio.Future | None = None
+        try:
+            while True:
+                # キャンセルされてもスレッドでの取得は止まらないため、完了を待てるようにshieldする
+                pending = asyncio.ensure_future(cls.run_in_thread(kind, next, iterator, end))
+                item = await asyncio.shield(pending)
+                pending = None
+                if item is end:
+                    break
+                yield item
+        finally:
+            if pending is not None:
+                # 実行中のジェネレーターを閉じるとValueError(generator already executing)になるため完了を待つ
+                await asyncio.wait([pending])
+                if not pending.cancelled():
+                    pending.exception()
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    @classmethod
+    async def run_in_process(cls, kind: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """CPU負荷の高い処理をプロセスプールで実行する
+
+        EXECUTOR_PROCESS_WORKERSが0の場合はスレッドプールで実行します。
+        関数と引数はpickle可能である必要があります。
+
+        Args:
+            kind: 処理種別。同時実行数の制限と集計に使用する
+            func: 実行する関数
+            *args, **kwargs: 関数の引数
+
+        Returns:
+            Any: 関数の戻り値
+        """
+        executor = cls.__get_process_pool() or cls.__get_thread_pool()
+        try:
+            return await cls.__run(kind, executor, func, *args, **kwargs)
+        except BrokenProcessPool:
+            # ワーカープロセスが異常終了した場合は次回の呼び出しでプールを作り直す
+            with cls.__lock:
+                if cls.__process_pool is executor:
+                    cls.__process_pool = None
+            raise
+
+    @classmethod
+    async def cancel_task(cls, task: asyncio.Task | None) -> None:
+        """バックグラウンドのタスクを終了時にキャンセルし、終了を待つ
+
+        完了していないタスクはキャンセルし、タスクで発生した例外はログに出力します。
+        スレッドで実行中の処理は中断できないため、完了を待たずに戻ります。
+
+        Args:
+            task: 対象のタスク。Noneの場合は何もしない
+        """
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            # 呼び出し元がキャンセルされた場合は伝播する
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+        except Exception as e:
+            logger.warning(f"Background task {task.get_name()} failed: {e}")
+
+    @classmethod
+    def get_stats(cls) -> dict[str, dict[str, int]]:
+        """処理種別ごとの待ち数、実行数、完了数、失敗数を返す
+
+        Returns:
+            dict[str, dict[str, int]]: 処理種別をキーとした集計値
+        """
+        with cls.__lock:
+            return {kind: dict(stats) for kind, stats in cls.__stats.items()}
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """スレッドプールとプロセスプールを終了する"""
+        with cls.__lock:
+            thread_pool, process_pool = cls.__thread_pool, cls.__process_pool
+            cls.__thread_pool = None
+            cls.__process_pool = None
+        if thread_pool is not None:
+            thread_pool.shutdown(wait=False, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    async def __run(cls, kind: str, executor: Executor, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        semaphore = cls.__get_semaphore(loop, kind)
+        cls.__update_stats(kind, queued=1)
+        if semaphore is not None:
+            try:
+                await semaphore.acquire()
+            except BaseException:
+                cls.__update_stats(kind, queued=-1, failed=1)
+                raise
+        cls.__update_stats(kind, queued=-1, running=1)
+        try:
+            result = await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            cls.__update_stats(kind, running=-1, failed=1)
+            raise
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+        cls.__update_stats(kind, running=-1, completed=1)
+        return result
+
+    @classmethod
+    def __get_thread_pool(cls) -> ThreadPoolExecutor:
+        with cls.__lock:
+            if cls.__thread_pool is None:
+                workers = FileUtilConfig.get_instance().executor_thread_workers
+                cls.__thread_pool = ThreadPoolExecutor(
+                    max_workers=workers if workers > 0 else None, thread_name_prefix="file_util"
+                )
+            return cls.__thread_pool
+
+    @classmethod
+    def __get_process_pool(cls) -> ProcessPoolExecutor | None:
+        with cls.__lock:
+            workers = FileUtilConfig.get_instance().executor_process_workers
+            if workers <= 0:
+                return None
+            if cls.__process_pool is None:
+                # ONNX Runtimeなどのスレッドを持つ親プロセスをforkしないようにspawnを使用する
+                cls.__process_pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Process pool started with {workers} workers")
+            return cls.__process_pool
+
+    @classmethod
+    def __get_semaphore(cls, loop: asyncio.AbstractEventLoop, kind: str) -> asyncio.Semaphore | None:
+        limit = FileUtilConfig.get_instance().executor_concurrency_limits.get(kind)
+        if not limit or limit <= 0:
+            return None
+        with cls.__lock:
+            semaphores = cls.__semaphores.setdefault(loop, {})
+            if kind not in semaphores:
+                semaphores[kind] = asyncio.Semaphore(limit)
+            return semaphores[kind]
+
+    @classmethod
+    def __update_stats(cls, kind: str, **delta: int) -> None:
+        with cls.__lock:
+            stats = cls.__stats.setdefault(kind, {"queued": 0, "running": 0, "completed": 0, "failed": 0})
+            for key, value in delta.items():
+                stats[key] += value
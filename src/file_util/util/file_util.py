@@ -1,25 +1,62 @@
+import asyncio
 import base64
+import contextlib
+import fnmatch
+import hashlib
+import importlib
+import io
+import json
 import os
+import tempfile
+import time
+from typing import IO, AsyncIterator, Awaitable, Callable, Iterable, Iterator, TypeVar
 from file_util.util.excel_util import ExcelUtil
 from file_util.util.ppt_util import PPTUtil
 from file_util.util.word_util import WordUtil
 from file_util.util.text_util import TextUtil
 from file_util.util.pdf_util import PDFUtil
+from file_util.util.zip_util import ZipUtil
 
-from file_util.model import FileUtilDocument
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.model import (
+    FileUtilDocument, FileUtilDocumentHandle, FileUtilDocumentType, FileUtilDocumentTypeResult, FileUtilExtractionResult, FileUtilIndexEntry, FileUtilIndexReport, FileUtilStreamExtractionResult,
+    FileUtilTextChunk, FileUtilTextChunkPage,
+)
+from file_util.util.cache_util import ExtractionCache, ExtractionCacheEntry
+from file_util.util.executor_util import ExecutorUtil
+from file_util.util.index_util import IndexManifest, IndexManifestEntry
+from file_util.util.storage_util import StorageUtil
+from file_util.util.text_sanitizer import TextSanitizer
+from file_util.util.chunk_util import TextChunker
+from file_util.util.ooxml_util import OOXMLUtil
+from file_util.util.magika_util import MagikaUtil
+from file_util.util.metrics_util import MetricsUtil
 
 import file_util.log.log_settings as log_settings
 logger = log_settings.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 class FileUtil:
     """ファイル操作のユーティリティクラス"""
 
+    # 入れ子のアーカイブとして展開するメンバーのMIMEタイプ
+    ZIP_MIME_TYPE = "application/zip"
+    # インクリメンタルな抽出で、処理済みのファイルをマニフェストに記録する件数の単位
+    INDEX_BATCH_SIZE = 100
+    # チャンクの分割で再開位置を記録する間隔(サニタイズ済みのテキストの文字数)。改行の位置で区切る
+    CHUNK_RESUME_INTERVAL = 4096
+    # prewarm()で事前にインポートするパーサーのモジュール
+    PREWARM_MODULES = ("pdfminer.high_level", "openpyxl", "docx", "pptx", "pyzipper", "chardet")
+
     @classmethod
     def sanitize_text(cls, text: str) -> str:
         """テキストをサニタイズする
 
         複数の改行や空白を1つにまとめて、テキストを整形します。
+        TEXT_SANITIZE_RULESの規則(CRLF・Unicodeの空白・NFKC)も適用します。
 
         Args:
             text: サニタイズ対象のテキスト
@@ -30,59 +67,873 @@ class FileUtil:
         # textが空の場合は空の文字列を返す
         if not text or len(text) == 0:
             return ""
-        import re
-        # 1. 複数の改行を1つの改行に変換
-        text = re.sub(r'\n+', '\n', text)
-        # 2. 複数のスペースを1つのスペースに変換
-        text = re.sub(r' +', ' ', text)
+        return cls.create_sanitizer().sanitize(text)
+
+    @classmethod
+    def create_sanitizer(cls) -> TextSanitizer:
+        """TEXT_SANITIZE_RULESの規則でチャンク単位にサニタイズするTextSanitizerを作成する
 
-        return text
+        Returns:
+            TextSanitizer: 作成したTextSanitizer
+        """
+        return TextSanitizer(FileUtilConfig.get_instance().text_sanitize_rules)
+
+    @classmethod
+    def prewarm(cls) -> float:
+        """各形式のパーサーのモジュールとMagikaのモデルを事前にロードする
+
+        パーサーは初回の抽出時にインポートされるため、サーバー起動後にバックグラウンドで呼び出すと
+        最初のリクエストの待ち時間を短縮できます。
+
+        Returns:
+            float: ロードに要した秒数
+        """
+        start = time.perf_counter()
+        for module in cls.PREWARM_MODULES:
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                logger.warning(f"Failed to prewarm {module}: {e}")
+        MagikaUtil.warm_up()
+        elapsed = time.perf_counter() - start
+        logger.info(f"Prewarmed parsers in {elapsed * 1000:.1f} ms")
+        return elapsed
 
     @classmethod
-    async def extract_text_from_file_async(cls, filename) -> str:
+    async def extract_text_from_file_async(
+        cls, filename, page_range: str | None = None, max_chars: int | None = None
+        ) -> str:
         """ファイルからテキストを非同期で抽出する
 
         対応形式: テキストファイル、PDF、Excel、Word、PowerPoint
+        抽出結果のキャッシュが有効な場合、内容が同じファイルはキャッシュから返します。
 
         Args:
             filename: 抽出対象のファイルパス
+            page_range: 抽出するページ範囲("1-3,5"形式)。PDFの場合のみ有効
+            max_chars: 抽出する最大文字数
 
         Returns:
             str: 抽出されたテキスト。サニタイズ済み。非対応形式の場合は空文字列
         """
-        document_type = FileUtilDocument.from_file(document_path=filename)
+        with MetricsUtil.span("request") as span:
+            if page_range or max_chars is not None:
+                chunks = [chunk async for chunk in cls.iter_text_from_file_async(filename, page_range, max_chars)]
+                return "".join(chunks)
+
+            entry = await cls.__get_entry_from_file_async(filename)
+            span.set_format(FileUtilDocumentHandle(filename, mime_type=entry.mime_type).get_document_type().value)
+            return entry.text
+
+    @classmethod
+    async def iter_text_from_file_async(
+        cls, filename, page_range: str | None = None, max_chars: int | None = None
+        ) -> AsyncIterator[str]:
+        """ファイルからテキストを順次抽出する
+
+        PDFの場合は1ページずつ解析してページごとのテキストを返し、max_charsに達した時点で
+        残りのページを解析せずに終了します。PDF以外の場合は抽出したテキスト全体を1度に返します。
+
+        Args:
+            filename: 抽出対象のファイルパス
+            page_range: 抽出するページ範囲("1-3,5"形式)。PDFの場合のみ有効
+            max_chars: 抽出する最大文字数
+
+        Yields:
+            str: 抽出されたテキスト。サニタイズ済み
+        """
+        # リモートのファイルも先頭・末尾のみを読み込んで種類を判定する
+        document_type = await ExecutorUtil.run_in_thread(
+            "detect", FileUtilDocument.from_file, document_path=filename, header_only=True
+        )
+        if not document_type.is_pdf():
+            entry = await cls.__get_entry_from_file_async(filename, document_type)
+            yield entry.text[:max_chars] if max_chars is not None else entry.text
+            return
+
+        async with cls.__open_source_async(filename) as source:
+            page_numbers = PDFUtil.parse_page_range(page_range) if page_range else None
+            pages = PDFUtil.iter_pages_from_pdf(
+                io.BytesIO(source) if isinstance(source, bytes) else source, page_numbers, max_chars
+            )
+            # ページの境界をまたぐ改行・空白の連続もまとめるため、1つのサニタイザーに順に渡す
+            sanitizer = cls.create_sanitizer()
+            # ページの解析はブロッキング処理のためワーカースレッドで1ページずつ進める
+            async for item in ExecutorUtil.iter_in_thread("pdf", pages):
+                yield sanitizer.feed(item[1])
+            if text := sanitizer.finish():
+                yield text
+
+    @classmethod
+    async def iter_chunks_from_file_async(
+        cls, filename, max_size: int | None = None, overlap: int | None = None, unit: str = TextChunker.CHARS,
+        start_index: int = 0,
+        ) -> AsyncIterator[FileUtilTextChunk]:
+        """ファイルから抽出したテキストを文字数またはトークン数の上限で分割したチャンクを順次返す
+
+        PDFはページ、Excelは行、PowerPointはスライドの単位で抽出しながら分割するため、
+        ファイル全体のテキストを保持しません。チャンクにはページ番号・シート名と行番号・スライド番号と
+        抽出したテキスト全体での位置を付けます。
+
+        Args:
+            filename: 抽出対象のファイルパス
+            max_size: 1チャンクの最大サイズ。未指定の場合はCHUNK_MAX_SIZE
+            overlap: 前のチャンクと重複させるサイズ。未指定の場合はCHUNK_OVERLAP
+            unit: サイズの単位。chars または tokens
+            start_index: 返す最初のチャンクの番号。これより前のチャンクは返さない
+
+        Yields:
+            FileUtilTextChunk: チャンク
+        """
+        chunker = cls.__create_chunker(max_size, overlap, unit)
+        document_type = await ExecutorUtil.run_in_thread(
+            "detect", FileUtilDocument.from_file, document_path=filename, header_only=True
+        )
+        async for chunk, _ in cls.__iter_document_chunks_async(filename, document_type, chunker, start_index):
+            yield chunk
+
+    @classmethod
+    async def __iter_document_chunks_async(
+        cls, filename: str, document_type: FileUtilDocument, chunker: TextChunker, start_index: int,
+        resume: dict | None = None,
+        ) -> AsyncIterator[tuple[FileUtilTextChunk, dict]]:
+        # チャンクと、そのチャンクから抽出を再開するための状態を返す
+        if not cls.__is_extractable(document_type):
+            logger.error("Unsupported file type: " + document_type.mime_type)
+            return
+
+        kind = document_type.get_document_type().value
+        async with cls.__open_source_async(filename) as source:
+            chunks = cls.__iter_chunks(document_type, source, chunker, cls.create_sanitizer(), resume)
+            # 解析はブロッキング処理のためワーカースレッドで1チャンクずつ進める
+            async for chunk, state in ExecutorUtil.iter_in_thread(kind, chunks):
+                if chunk.index >= start_index:
+                    yield chunk, state
+
+    @classmethod
+    async def extract_chunks_from_file_async(
+        cls, filename, max_size: int | None = None, overlap: int | None = None, unit: str = TextChunker.CHARS,
+        cursor: str | None = None, limit: int = 100,
+        ) -> FileUtilTextChunkPage:
+        """ファイルから抽出したテキストのチャンクをlimit件ずつ返す
+
+        続きのチャンクは、返したnext_cursorを指定して取得します。カーソルは作成時のファイルと
+        分割の条件でのみ有効です。カーソルには作成中のチャンクの先頭を含むページ(PDF)・シートと行(Excel)・
+        スライド(PowerPoint)と、分割の途中の状態(テキストではなく位置)を保存し、続きはその位置から抽出します。
+        Wordとテキストファイルは先頭から読み込み直しますが、カーソルより前の部分はサニタイズ・分割しません。
+
+        Args:
+            filename: 抽出対象のファイルパス
+            max_size: 1チャンクの最大サイズ。未指定の場合はCHUNK_MAX_SIZE
+            overlap: 前のチャンクと重複させるサイズ。未指定の場合はCHUNK_OVERLAP
+            unit: サイズの単位。chars または tokens
+            cursor: 前回の結果のnext_cursor。未指定の場合は最初のチャンクから返す
+            limit: 返すチャンクの最大数
+
+        Returns:
+            FileUtilTextChunkPage: チャンクと次のカーソル
+
+        Raises:
+            ValueError: カーソルが不正な場合、またはファイルがカーソルの作成後に変更された場合
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        chunker = cls.__create_chunker(max_size, overlap, unit)
+        st = await ExecutorUtil.run_in_thread("storage", StorageUtil.stat, filename)
+        rules = ",".join(TextSanitizer.normalize_rules(FileUtilConfig.get_instance().text_sanitize_rules))
+        key = hashlib.sha256(
+            f"{filename}|{st.st_size}|{st.st_mtime_ns}|{max_size}|{overlap}|{unit}|{rules}".encode("utf-8")
+        ).hexdigest()[:16]
+        start_index = 0
+        resume = None
+        if cursor:
+            try:
+                state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+                start_index = int(state["index"])
+                resume = state.get("resume")
+            except Exception as e:
+                raise ValueError(f"Invalid cursor: {cursor}") from e
+            if state.get("key") != key:
+                raise ValueError("The cursor does not match the file or the chunking parameters")
+
+        document_type = await ExecutorUtil.run_in_thread(
+            "detect", FileUtilDocument.from_file, document_path=filename, header_only=True
+        )
+        page = FileUtilTextChunkPage(file_path=filename, mime_type=document_type.mime_type)
+        async for chunk, resume_state in cls.__iter_document_chunks_async(
+            filename, document_type, chunker, start_index, resume
+            ):
+            if len(page.chunks) >= limit:
+                # 次のチャンクがある場合のみカーソルを返す
+                state = {"index": chunk.index, "key": key, "resume": resume_state}
+                page.next_cursor = base64.urlsafe_b64encode(json.dumps(state).encode("utf-8")).decode("ascii")
+                break
+            page.chunks.append(chunk)
+        return page
+
+    @classmethod
+    def __create_chunker(cls, max_size: int | None, overlap: int | None, unit: str) -> TextChunker:
+        # 未指定のサイズはCHUNK_MAX_SIZE, CHUNK_OVERLAPを使用する
+        config = FileUtilConfig.get_instance()
+        return TextChunker(
+            max_size or config.chunk_max_size, config.chunk_overlap if overlap is None else overlap,
+            unit, config.chunk_token_encoding,
+        )
+
+    @classmethod
+    def __iter_chunks(
+        cls, document_type: FileUtilDocument, source: str | bytes, chunker: TextChunker, sanitizer: TextSanitizer,
+        resume: dict | None = None,
+        ) -> Iterator[tuple[FileUtilTextChunk, dict]]:
+        # 抽出したテキストを位置情報とともにサニタイズしてから分割する。チャンクとともに、そのチャンクから
+        # 抽出を再開するための状態を返す。状態は作成中のチャンクの先頭を含むセグメントの位置(location)、
+        # セグメントの直前のサニタイザーの状態、サニタイズ済みのテキスト全体でのセグメントの位置(segment_offset)と、
+        # 再開する位置(offset)とその直前の分割の状態。作成中のチャンクのテキストは状態に含めず、再開時に
+        # セグメントから抽出し直して復元する
+        location: dict = {}
+        done = False
+        position = 0
+        offset = 0
+        if resume is not None:
+            sanitizer.set_state(resume["sanitizer"])
+            chunker.set_state(resume["chunker"])
+            location, done = resume["location"], resume["done"]
+            position, offset = resume["segment_offset"], resume["offset"]
+        # 作成中のチャンクを含むセグメント
+        segments: list[dict] = []
+        if not done:
+            for text, location in cls.__iter_segments(document_type, source, location if resume else None):
+                segment = {"location": location, "done": False, "sanitizer": sanitizer.get_state(), "segment_offset": position}
+                text = sanitizer.feed(text)
+                yield from cls.__feed_chunker(chunker, text, segment, segments, offset)
+                position += len(text)
+        segment = {"location": location, "done": True, "sanitizer": sanitizer.get_state(), "segment_offset": position}
+        text = sanitizer.finish()
+        yield from cls.__feed_chunker(chunker, text, segment, segments, offset)
+        state = cls.__get_resume_state(chunker, segments, position + len(text))
+        for chunk in chunker.finish():
+            yield chunk, state
+
+    @classmethod
+    def __feed_chunker(
+        cls, chunker: TextChunker, text: str, segment: dict, segments: list[dict], resume_offset: int
+        ) -> Iterator[tuple[FileUtilTextChunk, dict]]:
+        # セグメントのテキストをCHUNK_RESUME_INTERVALごとに改行の後で区切って分割し、確定したチャンクと
+        # 区切りの直前の状態を返す。改行の後で区切るため、一度に渡した場合と同じチャンクになる。
+        # resume_offsetより前の部分は分割せず、作成中のチャンクのテキストとして復元する
+        segments.append(segment)
+        start = segment["segment_offset"]
+        position = 0
+        if resume_offset > start:
+            position = min(resume_offset - start, len(text))
+            chunker.restore(text[:position], start)
+        while True:
+            end = text.find("\n", position + cls.CHUNK_RESUME_INTERVAL) + 1 or len(text)
+            state = cls.__get_resume_state(chunker, segments, start + position)
+            for chunk in chunker.feed(text[position:end], segment["location"]):
+                yield chunk, state
+            position = end
+            if position >= len(text):
+                break
+
+    @classmethod
+    def __get_resume_state(cls, chunker: TextChunker, segments: list[dict], offset: int) -> dict:
+        # offsetの位置から再開するための状態を返す。作成中のチャンクの先頭より前のセグメントは削除する
+        state = chunker.get_state()
+        start = state["pieces"][0][0] if state["pieces"] else offset
+        while len(segments) > 1 and segments[1]["segment_offset"] <= start:
+            segments.pop(0)
+        return dict(segments[0], chunker=state, offset=offset)
+
+    @classmethod
+    def __iter_segments(
+        cls, document_type: FileUtilDocument, source: str | bytes, start: dict | None = None
+        ) -> Iterator[tuple[str, dict]]:
+        # ページ・行・スライドの単位でテキストと位置情報を返す。Wordとマークアップはテキスト全体を返す。
+        # startを指定した場合はその位置のセグメントから返す。PDF・Excel・PowerPointは前の部分を解析しない
+        start = start or {}
+        stream = io.BytesIO(source) if isinstance(source, bytes) else source
+        if document_type.is_pdf():
+            for page_number, text in PDFUtil.iter_pages_from_pdf(stream, start_page=start.get("page", 1) - 1):
+                yield text, {"page": page_number + 1}
+        elif document_type.is_excel():
+            rows = ExcelUtil.iter_rows_from_sheet(
+                stream, start_sheet=start.get("sheet_name", ""), start_row=start.get("row", 1)
+            )
+            for sheet_name, row_number, line in rows:
+                yield line + "\n", {"sheet_name": sheet_name, "row": row_number}
+        elif document_type.is_ppt():
+            for slide_number, lines in OOXMLUtil.iter_slides_from_pptx(stream, start_slide=start.get("slide", 1)):
+                yield "".join(line + "\n" for line in lines), {"slide": slide_number}
+        else:
+            # Word・テキストファイルはセグメントの番号で再開位置を表し、前のセグメントは読み飛ばす
+            start_segment = start.get("segment", 0)
+            for segment, text in enumerate(cls.__iter_text_segments(document_type, source, stream)):
+                if segment >= start_segment:
+                    yield text, {"segment": segment}
+
+    @classmethod
+    def __iter_text_segments(
+        cls, document_type: FileUtilDocument, source: str | bytes, stream: str | IO[bytes]
+        ) -> Iterator[str]:
+        if document_type.is_word():
+            yield WordUtil.extract_text_from_docx(stream)
+        elif isinstance(source, bytes):
+            yield TextUtil.process_text(source, document_type.mime_type, document_type.encoding)
+        elif document_type.mime_type in TextUtil.MARKUP_MIME_TYPES:
+            with open(source, "rb") as f:
+                yield TextUtil.process_text(f.read(), document_type.mime_type, document_type.encoding)
+        else:
+            yield from TextUtil.iter_text(source, document_type.encoding)
+
+    @classmethod
+    def __is_extractable(cls, document_type: FileUtilDocument) -> bool:
+        # テキストを抽出できる種類かどうかを返す
+        return document_type.is_text() or document_type.is_pdf() or document_type.is_office_document()
+
+    @classmethod
+    def get_document_types(
+        cls, file_paths: Iterable[str], batch_size: int | None = None
+        ) -> list[FileUtilDocumentTypeResult]:
+        """複数のファイルの種類をまとめて判定する
+
+        マジックナンバー・拡張子で判定できないファイルは、Magikaでbatch_size件ごとに1回の推論で判定します。
+
+        Args:
+            file_paths: 判定対象のファイルパスまたは smb://, mem:// 形式のパス
+            batch_size: 1回の推論で判定する最大件数。未指定の場合はMAGIKA_BATCH_SIZE
+
+        Returns:
+            list[FileUtilDocumentTypeResult]: file_pathsの順の判定結果
+        """
+        handles = [FileUtilDocumentHandle(file_path) for file_path in file_paths]
+        errors = FileUtilDocumentHandle.identify_many(handles, batch_size)
+        return [
+            FileUtilDocumentTypeResult(
+                file_path=handle.identifier,
+                document_type=handle.get_document_type() if error is None else FileUtilDocumentType.UNSUPPORTED,
+                mime_type=handle.mime_type,
+                encoding=handle.encoding,
+                error=error,
+            )
+            for handle, error in zip(handles, errors)
+        ]
+
+    @classmethod
+    def list_files(
+        cls, root_path: str, include_patterns: list[str] | None = None,
+        exclude_patterns: list[str] | None = None, recursive: bool = True
+        ) -> Iterator[str]:
+        """ディレクトリ配下のファイルを列挙する
+
+        パターンはroot_pathからの相対パス(区切り文字は"/")とファイル名の両方に対して
+        fnmatch形式で照合します。
+
+        Args:
+            root_path: 列挙対象のディレクトリ
+            include_patterns: 対象とするファイルのパターン。未指定の場合はすべてのファイル
+            exclude_patterns: 除外するファイルのパターン
+            recursive: Trueの場合はサブディレクトリも列挙する
+
+        Yields:
+            str: ファイルパス
+        """
+        for entry in cls.scan_files(root_path, include_patterns, exclude_patterns, recursive):
+            yield entry.path
+
+    @classmethod
+    def scan_files(
+        cls, root_path: str, include_patterns: list[str] | None = None,
+        exclude_patterns: list[str] | None = None, recursive: bool = True
+        ) -> Iterator[os.DirEntry]:
+        """ディレクトリ配下のファイルをos.scandir(リモートのパスの場合はストレージのscandir)で列挙する
+
+        list_filesと同じ順序(ディレクトリごとに名前順)でファイルを返します。
+        DirEntryはディレクトリの読み込み時に取得した情報を保持するため、
+        ファイルごとの種類の判定やstatの呼び出しを減らせます。
+
+        Args:
+            root_path: 列挙対象のディレクトリ(ローカルのパスまたは smb://server/share/path 形式のパス)
+            include_patterns: 対象とするファイルのパターン。未指定の場合はすべてのファイル
+            exclude_patterns: 除外するファイルのパターン
+            recursive: Trueの場合はサブディレクトリも列挙する
+
+        Yields:
+            os.DirEntry: ファイルのエントリ(リモートの場合は同じ属性を持つストレージのエントリ)
+        """
+        def matches(rel_path: str, name: str, patterns: list[str]) -> bool:
+            return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+        storage = StorageUtil.get_storage(root_path)
+        # (ディレクトリのパス, root_pathからの相対パス)のスタック
+        stack = [(root_path, "")]
+        while stack:
+            directory, rel_dir = stack.pop()
+            try:
+                entries = sorted(storage.scandir(directory), key=lambda e: e.name)
+            except OSError as e:
+                logger.warning(f"Failed to scan {directory}: {e}")
+                continue
+            subdirs = []
+            for entry in entries:
+                rel_path = rel_dir + entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # os.walkと同様にシンボリックリンクのディレクトリはたどらない
+                    if recursive and not entry.is_symlink():
+                        subdirs.append((entry.path, rel_path + "/"))
+                    continue
+                if include_patterns and not matches(rel_path, entry.name, include_patterns):
+                    continue
+                if exclude_patterns and matches(rel_path, entry.name, exclude_patterns):
+                    continue
+                yield entry
+            stack.extend(reversed(subdirs))
+
+    @classmethod
+    async def extract_text_from_files_async(
+        cls, file_paths: Iterable[str], concurrency: int = 0
+        ) -> AsyncIterator[FileUtilExtractionResult]:
+        """複数のファイルからテキストを並列に抽出する
+
+        抽出が完了したファイルから順に結果を返します。ファイルごとのエラーは結果のerrorに
+        格納し、処理は継続します。
+
+        Args:
+            file_paths: 抽出対象のファイルパス
+            concurrency: 同時に処理するファイル数。0の場合はCPU数の2倍
+
+        Yields:
+            FileUtilExtractionResult: ファイルごとの抽出結果
+        """
+        async def extract(file_path: str) -> FileUtilExtractionResult:
+            try:
+                entry = await cls.__get_entry_from_file_async(file_path)
+                return FileUtilExtractionResult(
+                    file_path=file_path, text=entry.text, mime_type=entry.mime_type
+                )
+            except Exception as e:
+                logger.error(f"Failed to extract text from {file_path}: {e}")
+                return FileUtilExtractionResult(file_path=file_path, error=f"{type(e).__name__}: {e}")
+
+        async for result in cls.__run_bounded_async(extract, file_paths, concurrency):
+            yield result
+
+    @classmethod
+    async def __run_bounded_async(
+        cls, func: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int = 0
+        ) -> AsyncIterator[R]:
+        # 大量の要素でもタスクを一度に生成しないよう、処理中のタスク数を制限して完了順に結果を返す
+        if concurrency <= 0:
+            concurrency = (os.cpu_count() or 1) * 2
+        it = iter(items)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                for item in it:
+                    pending.add(asyncio.create_task(func(item)))
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @classmethod
+    async def index_directory_async(
+        cls, root_path: str, manifest_dir: str, include_patterns: list[str] | None = None,
+        exclude_patterns: list[str] | None = None, recursive: bool = True, concurrency: int = 0
+        ) -> FileUtilIndexReport:
+        """ディレクトリ配下のファイルのうち、前回の実行から追加・変更されたファイルのみテキストを抽出する
+
+        処理済みのファイルはマニフェスト(IndexManifest)に記録し、サイズと更新日時が前回と同じ
+        ファイルは読み込まずにスキップします。サイズか更新日時が異なる場合でも、内容のハッシュ値が
+        同じであれば抽出は行いません。前回の実行後に削除されたファイルはマニフェストから削除して報告します。
+        抽出に失敗したファイルはマニフェストに記録しないため、次回の実行で再度処理します。
+
+        Args:
+            root_path: 対象のディレクトリ
+            manifest_dir: マニフェストと抽出したテキストを保存するディレクトリ
+            include_patterns: 対象とするファイルのパターン。未指定の場合はすべてのファイル
+            exclude_patterns: 除外するファイルのパターン
+            recursive: Trueの場合はサブディレクトリも対象とする
+            concurrency: 同時に処理するファイル数。0の場合はCPU数の2倍
+
+        Returns:
+            FileUtilIndexReport: 追加・変更・削除されたファイルの件数と一覧
+        """
+        start = time.perf_counter()
+        if not StorageUtil.is_remote(root_path):
+            root_path = os.path.abspath(root_path)
+        report = FileUtilIndexReport(root_path=root_path)
+        manifest = await ExecutorUtil.run_in_thread("index", IndexManifest, manifest_dir)
+        try:
+            previous = await ExecutorUtil.run_in_thread("index", manifest.get_entries, root_path)
+
+            def scan() -> list[tuple[str, int, int]]:
+                files = []
+                for entry in cls.scan_files(root_path, include_patterns, exclude_patterns, recursive):
+                    try:
+                        st = entry.stat()
+                    except OSError as e:
+                        logger.warning(f"Failed to stat {entry.path}: {e}")
+                        continue
+                    files.append((entry.path, st.st_size, st.st_mtime_ns))
+                return files
+
+            files = await ExecutorUtil.run_in_thread("index", scan)
+            seen = {path for path, _, _ in files}
+            candidates = []
+            for path, size, mtime_ns in files:
+                old = previous.get(path)
+                if old is not None and old.size == size and old.mtime_ns == mtime_ns:
+                    report.unchanged += 1
+                else:
+                    candidates.append((path, size, mtime_ns))
+
+            async def index_file(item: tuple[str, int, int]) -> tuple[IndexManifestEntry | None, FileUtilIndexEntry | None]:
+                path, size, mtime_ns = item
+                old = previous.get(path)
+                try:
+                    content_hash = await ExecutorUtil.run_in_thread("hash", ExtractionCache.hash_file, path)
+                    if old is not None and old.content_hash == content_hash:
+                        # 更新日時のみ変わった場合は抽出せずにマニフェストを更新する
+                        return IndexManifestEntry(path, size, mtime_ns, content_hash, old.mime_type, old.text_path), None
+                    entry = await cls.__get_entry_from_file_async(path)
+                    text_path = await ExecutorUtil.run_in_thread("index", manifest.write_text, content_hash, entry.text)
+                except Exception as e:
+                    logger.error(f"Failed to index {path}: {e}")
+                    return None, FileUtilIndexEntry(
+                        file_path=path, status="new" if old is None else "changed", error=f"{type(e).__name__}: {e}"
+                    )
+                return (
+                    IndexManifestEntry(path, size, mtime_ns, content_hash, entry.mime_type, text_path),
+                    FileUtilIndexEntry(
+                        file_path=path, status="new" if old is None else "changed",
+                        mime_type=entry.mime_type, content_hash=content_hash, text_path=text_path,
+                    ),
+                )
+
+            # 途中で中断しても処理済みのファイルが失われないよう、一定件数ごとにマニフェストに記録する。
+            # テキストはファイル間で共有するため、参照されなくなったテキストはすべての記録の後に削除する
+            batch: list[IndexManifestEntry] = []
+            stale_hashes: set[str] = set()
+            async for manifest_entry, index_entry in cls.__run_bounded_async(index_file, candidates, concurrency):
+                if manifest_entry is not None:
+                    batch.append(manifest_entry)
+                if index_entry is None:
+                    report.unchanged += 1
+                elif index_entry.error is not None:
+                    report.failed += 1
+                    report.entries.append(index_entry)
+                else:
+                    if index_entry.status == "new":
+                        report.new += 1
+                    else:
+                        report.changed += 1
+                    report.entries.append(index_entry)
+                if len(batch) >= cls.INDEX_BATCH_SIZE:
+                    stale_hashes |= await ExecutorUtil.run_in_thread("index", manifest.put_entries, root_path, batch)
+                    batch = []
+            if batch:
+                stale_hashes |= await ExecutorUtil.run_in_thread("index", manifest.put_entries, root_path, batch)
+
+            deleted = sorted(path for path in previous if path not in seen)
+            if deleted:
+                stale_hashes |= await ExecutorUtil.run_in_thread("index", manifest.delete_entries, deleted)
+            if stale_hashes:
+                await ExecutorUtil.run_in_thread("index", manifest.remove_unreferenced_texts, stale_hashes)
+            for path in deleted:
+                report.entries.append(FileUtilIndexEntry(
+                    file_path=path, status="deleted", mime_type=previous[path].mime_type,
+                    content_hash=previous[path].content_hash,
+                ))
+            report.deleted = len(deleted)
+        finally:
+            manifest.close()
+
+        report.elapsed_seconds = time.perf_counter() - start
+        logger.info(
+            f"Indexed {root_path}: {report.new} new, {report.changed} changed, {report.unchanged} unchanged, "
+            f"{report.deleted} deleted, {report.failed} failed in {report.elapsed_seconds:.3f} s"
+        )
+        return report
+
+    @classmethod
+    async def extract_text_from_zip_async(
+        cls, source: str | bytes, password: str | None = None, max_depth: int | None = None, identifier: str = "<zip>"
+        ) -> AsyncIterator[FileUtilExtractionResult]:
+        """ZIPファイルのメンバーからディスクに展開せずにテキストを抽出する
+
+        メンバーは1つずつメモリ上に読み込み、種類の判定とテキストの抽出を行います。
+        メンバーがZIPファイルの場合はmax_depthの深さまで再帰的に処理します。
+        結果のfile_pathは "<ZIPファイル>!/<メンバー名>" の形式です。
+
+        Args:
+            source: ZIPファイルのパスまたはZIPファイルのバイト列
+            password: ZIPファイルのパスワード。入れ子のZIPファイルにも同じパスワードを使用する
+            max_depth: 展開する入れ子のZIPファイルの深さ。Noneの場合は設定(ZIP_MAX_DEPTH)の値
+            identifier: sourceがバイト列の場合に結果のfile_pathに使用する名前
+
+        Yields:
+            FileUtilExtractionResult: メンバーごとの抽出結果
+        """
+        if max_depth is None:
+            max_depth = FileUtilConfig.get_instance().zip_max_depth
+        archive_name = source if isinstance(source, str) else identifier
+        async for result in cls.__iter_text_from_zip_async(source, archive_name, password, max_depth):
+            yield result
+
+    @classmethod
+    async def __iter_text_from_zip_async(
+        cls, source: str | bytes, archive_name: str, password: str | None, depth: int
+        ) -> AsyncIterator[FileUtilExtractionResult]:
+        members = ZipUtil.iter_member_data(source, password, FileUtilConfig.get_instance().zip_member_max_bytes)
+        # メンバーの読み込み(展開)はイベントループをブロックしないようスレッドで行う
+        async for name, data, error in ExecutorUtil.iter_in_thread("zip", members):
+            member_path = f"{archive_name}!/{name}"
+            if error is not None:
+                logger.error(f"Failed to read {member_path}: {error}")
+                yield FileUtilExtractionResult(file_path=member_path, error=error)
+                continue
+            if not data:
+                yield FileUtilExtractionResult(file_path=member_path)
+                continue
+            try:
+                entry = await cls.__get_entry_from_member_async(data, name)
+            except Exception as e:
+                logger.error(f"Failed to extract text from {member_path}: {e}")
+                yield FileUtilExtractionResult(file_path=member_path, error=f"{type(e).__name__}: {e}")
+                continue
+            if entry is not None:
+                yield FileUtilExtractionResult(file_path=member_path, text=entry.text, mime_type=entry.mime_type)
+            elif depth <= 0:
+                yield FileUtilExtractionResult(
+                    file_path=member_path, mime_type=cls.ZIP_MIME_TYPE, error="Nested archive depth limit exceeded"
+                )
+            else:
+                async for result in cls.__iter_text_from_zip_async(data, member_path, password, depth - 1):
+                    yield result
+
+    @classmethod
+    async def __get_entry_from_member_async(cls, data: bytes, name: str) -> ExtractionCacheEntry | None:
+        # ZIPファイルのメンバーからテキストを抽出する。メンバーがZIPファイルの場合はNoneを返す
+        cache = ExtractionCache.get_instance()
+        content_hash = ""
+        if cache is not None:
+            content_hash = ExtractionCache.hash_bytes(data)
+            entry = cache.get(content_hash)
+            if entry is not None:
+                return entry
+
+        if await ExecutorUtil.run_in_thread("detect", ZipUtil.is_archive, data):
+            return None
+        document_type = await ExecutorUtil.run_in_thread("detect", FileUtilDocument, data=data, identifier=name)
+        entry = await cls.__extract_entry_from_document_async(document_type, data)
+        if cache is not None:
+            cache.put(content_hash, entry)
+        return entry
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def __open_source_async(cls, filename: str) -> AsyncIterator[str | bytes]:
+        # ローカルファイルはパスをそのまま返す。リモートのファイルはUPLOAD_SPOOL_MAX_BYTES以下の場合は
+        # メモリ上に読み込んだバイト列を、超える場合は一時ファイルにコピーしてそのパスを返す
+        if not StorageUtil.is_remote(filename):
+            yield filename
+            return
+        storage = StorageUtil.get_storage(filename)
+        st = await ExecutorUtil.run_in_thread("storage", storage.stat, filename)
+        if st.st_size <= FileUtilConfig.get_instance().upload_spool_max_bytes:
+            with MetricsUtil.span("read") as span:
+                data = await ExecutorUtil.run_in_thread("storage", storage.read_bytes, filename)
+                span.add_bytes(len(data))
+            yield data
+            return
+        temp = tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1], delete=False)
+        temp.close()
+        try:
+            with MetricsUtil.span("read") as span:
+                await ExecutorUtil.run_in_thread("storage", storage.download, filename, temp.name)
+                span.add_bytes(st.st_size)
+            yield temp.name
+        finally:
+            os.remove(temp.name)
+
+    @classmethod
+    async def __get_entry_from_bytes_async(cls, data: bytes, identifier: str) -> ExtractionCacheEntry:
+        # バイト列から抽出する。キャッシュが有効な場合は内容のハッシュ値で検索する
+        cache = ExtractionCache.get_instance()
+        if cache is None:
+            return await cls.__extract_entry_from_bytes_async(data, identifier)
+        content_hash = ExtractionCache.hash_bytes(data)
+        entry = cache.get(content_hash)
+        if entry is not None:
+            return entry
+        entry = await cls.__extract_entry_from_bytes_async(data, identifier)
+        cache.put(content_hash, entry)
+        return entry
+
+    @classmethod
+    async def __get_entry_from_file_async(
+        cls, filename, document_type: FileUtilDocument | None = None
+        ) -> ExtractionCacheEntry:
+        if StorageUtil.is_remote(filename):
+            return await cls.__get_entry_from_remote_async(filename, document_type)
+
+        cache = ExtractionCache.get_instance()
+        if cache is None:
+            return await cls.__extract_entry_from_file_async(filename, document_type)
+
+        content_hash = await ExecutorUtil.run_in_thread("hash", cache.get_content_hash, filename)
+        entry = cache.get(content_hash)
+        if entry is not None:
+            logger.debug(f"Extraction cache hit: {filename}")
+            return entry
+
+        entry = await cls.__extract_entry_from_file_async(filename, document_type)
+        cache.put(content_hash, entry)
+        return entry
+
+    @classmethod
+    async def __get_entry_from_remote_async(
+        cls, filename: str, document_type: FileUtilDocument | None = None
+        ) -> ExtractionCacheEntry:
+        # 先頭・末尾のみを読み込んで種類を判定し、抽出対象外の種類の場合は本体を読み込まない
+        if document_type is None:
+            document_type = await ExecutorUtil.run_in_thread(
+                "detect", FileUtilDocument.from_file, document_path=filename, header_only=True
+            )
+        if not cls.__is_extractable(document_type):
+            logger.error("Unsupported file type: " + document_type.mime_type)
+            return ExtractionCacheEntry(text="", mime_type=document_type.mime_type, encoding=document_type.encoding)
+
+        async with cls.__open_source_async(filename) as source:
+            cache = ExtractionCache.get_instance()
+            if cache is None:
+                return await cls.__extract_entry_from_document_async(document_type, source)
+            if isinstance(source, bytes):
+                content_hash = ExtractionCache.hash_bytes(source)
+            else:
+                content_hash = await ExecutorUtil.run_in_thread("hash", cache.get_content_hash, source)
+            entry = cache.get(content_hash)
+            if entry is not None:
+                logger.debug(f"Extraction cache hit: {filename}")
+                return entry
+            entry = await cls.__extract_entry_from_document_async(document_type, source)
+            cache.put(content_hash, entry)
+            return entry
+
+    @classmethod
+    async def __extract_entry_from_file_async(
+        cls, filename, document_type: FileUtilDocument | None = None
+        ) -> ExtractionCacheEntry:
+        if document_type is None:
+            document_type = await ExecutorUtil.run_in_thread(
+                "detect", FileUtilDocument.from_file, document_path=filename, header_only=True
+            )
+        return await cls.__extract_entry_from_document_async(document_type, filename)
+
+    @classmethod
+    async def __extract_entry_from_document_async(
+        cls, document_type: FileUtilDocument, source: str | bytes
+        ) -> ExtractionCacheEntry:
+        # sourceがファイルパスの場合はファイルから、バイト列の場合はメモリ上のデータから抽出する
         encoding = document_type.encoding
         mime_type = document_type.mime_type
         
         if mime_type is None:
-            return ""
+            return ExtractionCacheEntry(text="")
         logger.debug(mime_type)
         result = None        
 
+        kind = document_type.get_document_type().value
+        with MetricsUtil.span("extract", kind) as span:
+            if MetricsUtil.is_enabled():
+                span.add_bytes(len(source) if isinstance(source, bytes) else os.path.getsize(source))
+            result = await cls.__run_document_extractor_async(document_type, source)
+        if isinstance(result, ExtractionCacheEntry):
+            return result
+
+        with MetricsUtil.span("sanitize", kind):
+            text = cls.sanitize_text(result if result is not None else "")
+        return ExtractionCacheEntry(text=text, mime_type=mime_type, encoding=encoding)
+
+    @classmethod
+    async def __run_document_extractor_async(
+        cls, document_type: FileUtilDocument, source: str | bytes
+        ) -> str | ExtractionCacheEntry | None:
+        # 形式ごとの抽出処理を実行する。テキストファイルをチャンク単位でサニタイズした場合は抽出結果を返す
+        encoding = document_type.encoding
+        mime_type = document_type.mime_type
+        result = None
+
         if document_type.is_text():
             # テキストファイルの場合
-            result = await TextUtil.process_text_async(filename, mime_type, encoding)
+            if isinstance(source, bytes):
+                result = await ExecutorUtil.run_in_thread("text", TextUtil.process_text, source, mime_type, encoding)
+            elif mime_type not in TextUtil.MARKUP_MIME_TYPES:
+                # マークアップ以外はチャンク単位で読み込みながらサニタイズし、元のテキスト全体を保持しない
+                sanitizer = cls.create_sanitizer()
+                texts = [sanitizer.feed(chunk) async for chunk in TextUtil.iter_text_async(source, encoding)]
+                texts.append(sanitizer.finish())
+                return ExtractionCacheEntry(text="".join(texts), mime_type=mime_type, encoding=encoding)
+            else:
+                result = await TextUtil.process_text_async(source, mime_type, encoding)
 
         # application/pdf
         elif document_type.is_pdf():
-            result = PDFUtil.extract_text_from_pdf(filename)
+            if isinstance(source, bytes):
+                result = await ExecutorUtil.run_in_thread("pdf", _call_with_stream, PDFUtil.extract_text_from_pdf, source)
+            else:
+                result = await cls.__extract_text_from_pdf_async(source)
             
         # application/vnd.openxmlformats-officedocument.spreadsheetml.sheet
         elif document_type.is_excel():
-            result = ExcelUtil.extract_text_from_sheet(filename)
+            result = await cls.__run_extractor_async("excel", ExcelUtil.extract_text_from_sheet, source)
             
         # application/vnd.openxmlformats-officedocument.wordprocessingml.document
         elif document_type.is_word():
-            result = WordUtil.extract_text_from_docx(filename)
+            result = await cls.__run_extractor_async("word", WordUtil.extract_text_from_docx, source)
             
         # application/vnd.openxmlformats-officedocument.presentationml.presentation
         elif document_type.is_ppt():
-            result = PPTUtil.extract_text_from_pptx(filename)
+            result = await cls.__run_extractor_async("ppt", PPTUtil.extract_text_from_pptx, source)
 
         else:
             logger.error("Unsupported file type: " + mime_type)
+        return result
+
+    @classmethod
+    async def __run_extractor_async(cls, kind: str, func: Callable[..., str], source: str | bytes) -> str:
+        # 抽出関数をプロセスプールで実行する。バイト列はプロセスへのコピーを避けるため、
+        # スレッドプールでファイルオブジェクトとして渡す
+        if isinstance(source, bytes):
+            return await ExecutorUtil.run_in_thread(kind, _call_with_stream, func, source)
+        return await ExecutorUtil.run_in_process(kind, func, source)
 
-        return cls.sanitize_text(result if result is not None else "")
+    @classmethod
+    async def __extract_text_from_pdf_async(cls, filename) -> str:
+        # ページ数が多いPDFはページを分割してプロセスプールで並列に抽出し、ページ順に連結する
+        config = FileUtilConfig.get_instance()
+        if config.pdf_parallel_min_pages > 0 and config.executor_process_workers > 1:
+            page_count = await ExecutorUtil.run_in_thread("detect", PDFUtil.get_page_count, filename)
+            if page_count >= config.pdf_parallel_min_pages:
+                ranges = PDFUtil.split_page_ranges(page_count, config.pdf_parallel_pages_per_task)
+                logger.debug(f"Extracting {page_count} pages of {filename} in {len(ranges)} tasks")
+                texts = await asyncio.gather(*[
+                    ExecutorUtil.run_in_process("pdf", PDFUtil.extract_text_from_page_range, filename, start, end)
+                    for start, end in ranges
+                ])
+                return "".join(texts)
+        return await ExecutorUtil.run_in_process("pdf", PDFUtil.extract_text_from_pdf, filename)
 
     @classmethod
     async def extract_base64_to_text(cls, extension: str, base64_data: str) -> str:
@@ -98,16 +949,100 @@ class FileUtil:
         suffix = ""
         if extension is not None and extension != "":
             suffix = "." + extension
-        # base64データから一時ファイルを生成
-        import aiofiles.tempfile
-        async with aiofiles.tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=suffix) as temp:
-            await temp.write(base64_data_bytes)
-            await temp.close()
-            # 一時ファイルからテキストを抽出
-            temp_path = temp.name if isinstance(temp.name, str) else str(temp.name)
-            text = await FileUtil.extract_text_from_file_async(temp_path)
-            # 一時ファイルを削除
-            os.remove(temp_path)
-            return text
-
-        return text
+        # 一時ファイルを作成せず、デコードしたバイト列から直接判定・抽出する
+        entry = await cls.__get_entry_from_bytes_async(base64_data_bytes, f"<base64>{suffix}")
+        return entry.text
+
+    @classmethod
+    async def extract_text_from_bytes_async(cls, data: bytes, extension: str = "") -> str:
+        """バイト列からテキストを非同期で抽出する
+
+        一時ファイルを作成せず、メモリ上のデータから種類の判定とテキストの抽出を行います。
+
+        Args:
+            data: 抽出対象のデータ
+            extension: データの拡張子(識別用)
+
+        Returns:
+            str: 抽出されたテキスト。サニタイズ済み。非対応形式の場合は空文字列
+        """
+        if not data:
+            return ""
+        suffix = "." + extension if extension else ""
+        entry = await cls.__get_entry_from_bytes_async(data, f"<bytes>{suffix}")
+        return entry.text
+
+    @classmethod
+    async def __extract_entry_from_bytes_async(cls, data: bytes, identifier: str) -> ExtractionCacheEntry:
+        document_type = await ExecutorUtil.run_in_thread("detect", FileUtilDocument, data=data, identifier=identifier)
+        return await cls.__extract_entry_from_document_async(document_type, data)
+
+    @classmethod
+    async def extract_text_from_stream_async(
+        cls, chunks: AsyncIterator[bytes], extension: str = ""
+        ) -> FileUtilStreamExtractionResult:
+        """チャンク単位で受信するデータからテキストを抽出する
+
+        データがUPLOAD_SPOOL_MAX_BYTES以下の場合はメモリ上で、超えた場合は一時ファイルに
+        書き出してから抽出するため、データサイズによらずメモリ使用量は一定に保たれます。
+        一時ファイルは抽出後に必ず削除します。キャッシュが有効な場合は受信しながら
+        内容のハッシュ値を計算し、抽出結果をキャッシュから取得・保存します。
+
+        Args:
+            chunks: データのチャンク
+            extension: データの拡張子(識別用)
+
+        Returns:
+            FileUtilStreamExtractionResult: 抽出結果と受信バイト数・スループット
+        """
+        start = time.perf_counter()
+        spool_max_bytes = FileUtilConfig.get_instance().upload_spool_max_bytes
+        suffix = "." + extension if extension else ""
+        cache = ExtractionCache.get_instance()
+        digest = hashlib.sha256() if cache is not None else None
+        buffer = bytearray()
+        temp = None
+        size = 0
+        entry = None
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                if temp is None:
+                    buffer += chunk
+                    if len(buffer) <= spool_max_bytes:
+                        continue
+                    temp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+                    chunk = bytes(buffer)
+                    buffer = bytearray()
+                await ExecutorUtil.run_in_thread("upload", temp.write, chunk)
+
+            if digest is not None:
+                content_hash = digest.hexdigest()
+                entry = cache.get(content_hash)
+            if entry is None:
+                if temp is None:
+                    entry = await cls.__extract_entry_from_bytes_async(bytes(buffer), f"<stream>{suffix}")
+                else:
+                    temp.close()
+                    entry = await cls.__extract_entry_from_file_async(temp.name)
+                if digest is not None:
+                    cache.put(content_hash, entry)
+        finally:
+            if temp is not None:
+                temp.close()
+                os.remove(temp.name)
+
+        elapsed = time.perf_counter() - start
+        bytes_per_second = size / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Extracted {size} bytes in {elapsed:.3f} s ({bytes_per_second / 1024 / 1024:.2f} MB/s)")
+        return FileUtilStreamExtractionResult(
+            text=entry.text, mime_type=entry.mime_type, size=size,
+            elapsed_seconds=elapsed, bytes_per_second=bytes_per_second,
+        )
+
+
+def _call_with_stream(func: Callable[..., str], data: bytes, *args) -> str:
+    """バイト列をファイルオブジェクトとして抽出関数に渡す"""
+    return func(io.BytesIO(data), *args)
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+
+import file_util.log.log_settings as log_settings
+logger = log_settings.getLogger(__name__)
+
+
+class IndexManifestEntry:
+    """マニフェストに記録したファイルの情報"""
+
+    def __init__(self, path: str, size: int, mtime_ns: int, content_hash: str, mime_type: str, text_path: str):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+        self.mime_type = mime_type
+        self.text_path = text_path
+
+
+class IndexManifest:
+    """インクリメンタルなテキスト抽出のために処理済みのファイルを記録するマニフェスト
+
+    ファイルごとに(パス, サイズ, 更新日時, 内容のハッシュ値, MIMEタイプ, テキストの保存先)を
+    SQLiteに保存します。抽出したテキストはマニフェストのディレクトリ配下に内容のハッシュ値を
+    ファイル名として保存するため、同じ内容のファイルはテキストを共有します。
+    共有しているテキストを記録の途中で削除しないように、put_entries・delete_entriesはテキストを削除せず、
+    参照されなくなった可能性のあるハッシュ値を返します。テキストは処理の最後に
+    remove_unreferenced_textsでまとめて削除します。
+    """
+
+    DB_FILE_NAME = "index_manifest.sqlite3"
+    TEXT_DIR_NAME = "texts"
+
+    def __init__(self, manifest_dir: str):
+        os.makedirs(manifest_dir, exist_ok=True)
+        self.manifest_dir = manifest_dir
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(os.path.join(manifest_dir, self.DB_FILE_NAME), check_same_thread=False)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " root_path TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " mime_type TEXT NOT NULL,"
+            " text_path TEXT NOT NULL,"
+            " indexed_at REAL NOT NULL)"
+        )
+        self.__conn.execute("CREATE INDEX IF NOT EXISTS files_root_path ON files(root_path)")
+        self.__conn.execute("CREATE INDEX IF NOT EXISTS files_content_hash ON files(content_hash)")
+        self.__conn.commit()
+
+    def close(self) -> None:
+        """データベースの接続を閉じる"""
+        with self.__lock:
+            self.__conn.close()
+
+    def get_entries(self, root_path: str) -> dict[str, IndexManifestEntry]:
+        """ディレクトリについて記録したファイルの情報を取得する
+
+        Args:
+            root_path: 対象のディレクトリ
+
+        Returns:
+            dict[str, IndexManifestEntry]: ファイルパスをキーとしたファイルの情報
+        """
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, mime_type, text_path FROM files WHERE root_path = ?",
+                (root_path,),
+            ).fetchall()
+        return {row[0]: IndexManifestEntry(*row) for row in rows}
+
+    def get_text_path(self, content_hash: str) -> str:
+        """抽出したテキストの保存先のパスを返す"""
+        return os.path.join(self.manifest_dir, self.TEXT_DIR_NAME, content_hash[:2], content_hash + ".txt")
+
+    def write_text(self, content_hash: str, text: str) -> str:
+        """抽出したテキストを保存し、保存先のパスを返す。同じ内容のテキストが保存済みの場合は書き込まない"""
+        text_path = self.get_text_path(content_hash)
+        if not os.path.exists(text_path):
+            os.makedirs(os.path.dirname(text_path), exist_ok=True)
+            temp_path = f"{text_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp_path, text_path)
+        return text_path
+
+    def put_entries(self, root_path: str, entries: list[IndexManifestEntry]) -> set[str]:
+        """ファイルの情報をまとめて記録する
+
+        Args:
+            root_path: 対象のディレクトリ
+            entries: 記録するファイルの情報
+
+        Returns:
+            set[str]: 内容が変わったファイルの以前のハッシュ値。remove_unreferenced_textsに渡す
+        """
+        now = time.time()
+        with self.__lock:
+            old_hashes = set()
+            for e in entries:
+                row = self.__conn.execute("SELECT content_hash FROM files WHERE path = ?", (e.path,)).fetchone()
+                if row is not None and row[0] != e.content_hash:
+                    old_hashes.add(row[0])
+            self.__conn.executemany(
+                "INSERT OR REPLACE INTO files (path, root_path, size, mtime_ns, content_hash, mime_type, text_path, indexed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(e.path, root_path, e.size, e.mtime_ns, e.content_hash, e.mime_type, e.text_path, now) for e in entries],
+            )
+            self.__conn.commit()
+        return old_hashes
+
+    def delete_entries(self, paths: list[str]) -> set[str]:
+        """ファイルの情報を削除する
+
+        Args:
+            paths: 削除するファイルのパス
+
+        Returns:
+            set[str]: 削除したファイルのハッシュ値。remove_unreferenced_textsに渡す
+        """
+        with self.__lock:
+            hashes = set()
+            for path in paths:
+                row = self.__conn.execute("SELECT content_hash FROM files WHERE path = ?", (path,)).fetchone()
+                if row is not None:
+                    hashes.add(row[0])
+                self.__conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            self.__conn.commit()
+        return hashes
+
+    def remove_unreferenced_texts(self, hashes: set[str]) -> int:
+        """どのファイルからも参照されていないテキストを削除する
+
+        テキストを共有するファイルの記録が終わった後に呼び出します。
+
+        Args:
+            hashes: 削除の候補とするハッシュ値
+
+        Returns:
+            int: 削除したテキストの数
+        """
+        removed = 0
+        with self.__lock:
+            for content_hash in hashes:
+                referenced = self.__conn.execute(
+                    "SELECT 1 FROM files WHERE content_hash = ? LIMIT 1", (content_hash,)
+                ).fetchone()
+                if referenced is None:
+                    try:
+                        os.remove(self.get_text_path(content_hash))
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+        return removed
@@ -0,0 +1,324 @@
+import inspect
+import io
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterable
+
+from file_util.config.file_util_config import FileUtilConfig
+import file_util.log.log_settings as log_settings
+logger = log_settings.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from magika import Magika
+    from magika.types import MagikaResult
+
+
+class MagikaUtil:
+    """プロセス全体で共有するMagika分類器のユーティリティクラス
+
+    Magikaのモデル(ONNX)は初回利用時に1度だけロードし、以降の呼び出しでは
+    同じインスタンスを再利用します。
+    """
+
+    __magika: "Magika | None" = None
+    __lock = threading.Lock()
+    __stats_lock = threading.Lock()
+
+    # 計測値
+    __model_load_seconds: float | None = None
+    __inference_count: int = 0
+    __inference_total_seconds: float = 0.0
+    __inference_max_seconds: float = 0.0
+    __batch_count: int = 0
+    __batch_item_count: int = 0
+    # Magikaの内部のメソッドでまとめて判定できるかどうか(未確認の場合はNone)
+    __batch_supported: bool | None = None
+
+    @classmethod
+    def get_magika(cls) -> "Magika":
+        """共有Magikaインスタンスを取得する。未ロードの場合はロードする
+
+        Returns:
+            Magika: 共有Magikaインスタンス
+        """
+        magika = cls.__magika
+        if magika is not None:
+            return magika
+
+        with cls.__lock:
+            # ロック取得待ちの間に他スレッドがロードしている場合がある
+            if cls.__magika is None:
+                start = time.perf_counter()
+                from magika import Magika
+                cls.__magika = Magika()
+                elapsed = time.perf_counter() - start
+                cls.__model_load_seconds = elapsed
+                logger.info(f"Magika model loaded in {elapsed * 1000:.1f} ms")
+            return cls.__magika
+
+    @classmethod
+    def warm_up(cls) -> float:
+        """モデルを事前にロードする。サーバー起動時に呼び出す
+
+        Returns:
+            float: モデルのロードに要した秒数
+        """
+        cls.get_magika()
+        return cls.__model_load_seconds or 0.0
+
+    @classmethod
+    def is_loaded(cls) -> bool:
+        """モデルがロード済みかどうかを返す"""
+        return cls.__magika is not None
+
+    @classmethod
+    def identify_bytes(cls, data: bytes) -> "MagikaResult":
+        """バイト列の種類を判定する
+
+        Args:
+            data: 判定対象のバイト列
+
+        Returns:
+            MagikaResult: 判定結果
+        """
+        magika = cls.get_magika()
+        start = time.perf_counter()
+        result = magika.identify_bytes(data)
+        cls.__record_inference(time.perf_counter() - start)
+        return result
+
+    @classmethod
+    def identify_path(cls, path: str | Path) -> "MagikaResult":
+        """ファイルの種類を判定する
+
+        Magikaはファイルの先頭・末尾の一部のみを読み込んで判定します。
+
+        Args:
+            path: 判定対象のファイルパス
+
+        Returns:
+            MagikaResult: 判定結果
+        """
+        magika = cls.get_magika()
+        start = time.perf_counter()
+        result = magika.identify_path(Path(path))
+        cls.__record_inference(time.perf_counter() - start)
+        return result
+
+    @classmethod
+    def identify_stream(cls, stream: BinaryIO) -> "MagikaResult":
+        """ストリームの種類を判定する
+
+        Magikaはストリームの先頭・末尾の一部のみをシークして読み込むため、
+        リモートのファイルでもファイル全体は読み込みません。
+
+        Args:
+            stream: 判定対象のシーク可能なストリーム(io.BufferedIOBase)
+
+        Returns:
+            MagikaResult: 判定結果
+        """
+        magika = cls.get_magika()
+        start = time.perf_counter()
+        result = magika.identify_stream(stream)
+        cls.__record_inference(time.perf_counter() - start)
+        return result
+
+    @classmethod
+    def identify_streams(cls, streams: Iterable[BinaryIO], batch_size: int | None = None) -> list["MagikaResult | None"]:
+        """複数のストリームの種類をまとめて判定する
+
+        ストリームは受け取った時点で判定に必要な先頭・末尾のみを読み込むため、streamsにジェネレーターを渡すと
+        次のストリームを要求された時点で前のストリームを閉じることができます。モデルの推論は
+        batch_size件ごとに1回にまとめて実行します。Magikaの公開APIはパスのリストのみに対応するため、
+        ストリームの特徴量の抽出と推論にはMagikaの内部のメソッドを使用します。内部のメソッドが
+        存在しない、または引数が異なる場合は、ストリームごとにidentify_streamで判定します。
+        まとめての推論に失敗した場合は、特徴量の抽出時に読み込んだ先頭・末尾のデータから
+        1件ずつidentify_streamで判定し直します。
+
+        Args:
+            streams: 判定対象のシーク可能なストリーム(io.BufferedIOBase)
+            batch_size: 1回の推論で判定する最大件数。未指定の場合はMAGIKA_BATCH_SIZE
+
+        Returns:
+            list[MagikaResult | None]: streamsの順の判定結果。読み込みに失敗したストリームはNone
+        """
+        magika = cls.get_magika()
+        if not cls.__can_batch(magika):
+            return [cls.__identify_stream_or_none(index, stream) for index, stream in enumerate(streams)]
+
+        from magika.types import Seekable
+        batch_size = batch_size or FileUtilConfig.get_instance().magika_batch_size
+        results: list["MagikaResult | None"] = []
+        # 推論が必要なストリームの番号と特徴量
+        features: list = []
+        # 特徴量の抽出時に読み込んだデータ。まとめての推論に失敗した場合の判定し直しに使用する
+        recordings: dict[int, _ReplayStream] = {}
+
+        def infer() -> None:
+            start = time.perf_counter()
+            try:
+                outputs = magika._get_results_from_features(features)
+                for path, _ in features:
+                    results[int(path.name)] = outputs[str(path)]
+                cls.__record_inference(time.perf_counter() - start, len(features))
+            except Exception as e:
+                logger.warning(f"Magika batch inference failed, identifying {len(features)} streams one by one: {e}")
+                if isinstance(e, (AttributeError, TypeError, KeyError)):
+                    cls.__batch_supported = False
+                # 読み込み済みのストリームは閉じられている場合があるため、読み込んだデータから判定する
+                for path, _ in features:
+                    index = int(path.name)
+                    results[index] = cls.__identify_stream_or_none(index, recordings[index])
+            features.clear()
+            recordings.clear()
+
+        for index, stream in enumerate(streams):
+            results.append(None)
+            if not cls.__batch_supported:
+                results[index] = cls.__identify_stream_or_none(index, stream)
+                continue
+            path = Path(str(index))
+            recording = _RecordingStream(stream)
+            try:
+                seekable = Seekable(recording)
+                result, feature = magika._get_result_or_features_from_seekable(seekable, path)
+            except (AttributeError, TypeError) as e:
+                logger.warning(f"Magika batch inference is not supported by this version: {e}")
+                cls.__batch_supported = False
+                results[index] = cls.__identify_stream_or_none(index, stream)
+                continue
+            except Exception as e:
+                logger.debug(f"Failed to read stream {index}: {e}")
+                continue
+            if result is not None:
+                # 空や極端に小さいデータはモデルを使わずに判定される
+                results[index] = result
+                continue
+            features.append((path, feature))
+            recordings[index] = _ReplayStream(seekable.size, recording.reads)
+            if len(features) >= batch_size:
+                infer()
+        if features:
+            infer()
+        return results
+
+    @classmethod
+    def __can_batch(cls, magika: "Magika") -> bool:
+        # まとめて判定に使用する内部のメソッドが存在し、同じ引数で呼び出せるかを1度だけ確認する
+        if cls.__batch_supported is None:
+            try:
+                from magika.types import Seekable  # noqa: F401
+                inspect.signature(magika._get_result_or_features_from_seekable).bind(None, Path("0"))
+                inspect.signature(magika._get_results_from_features).bind([])
+                cls.__batch_supported = True
+            except (ImportError, AttributeError, TypeError) as e:
+                logger.warning(f"Magika batch inference is not supported by this version: {e}")
+                cls.__batch_supported = False
+        return cls.__batch_supported
+
+    @classmethod
+    def __identify_stream_or_none(cls, index: int, stream: BinaryIO) -> "MagikaResult | None":
+        try:
+            return cls.identify_stream(stream)
+        except Exception as e:
+            logger.debug(f"Failed to read stream {index}: {e}")
+            return None
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """モデルのロード時間と推論時間の統計を返す
+
+        Returns:
+            dict: 統計情報
+        """
+        with cls.__stats_lock:
+            count = cls.__inference_count
+            total = cls.__inference_total_seconds
+            return {
+                "model_loaded": cls.__magika is not None,
+                "model_load_seconds": cls.__model_load_seconds,
+                "inference_count": count,
+                "inference_total_seconds": total,
+                "inference_avg_seconds": total / count if count else 0.0,
+                "inference_max_seconds": cls.__inference_max_seconds,
+                "batch_count": cls.__batch_count,
+                "batch_item_count": cls.__batch_item_count,
+            }
+
+    @classmethod
+    def __record_inference(cls, elapsed: float, batch_size: int | None = None) -> None:
+        # batch_sizeを指定した場合はまとめて推論した件数として記録する
+        with cls.__stats_lock:
+            cls.__inference_count += 1
+            cls.__inference_total_seconds += elapsed
+            if elapsed > cls.__inference_max_seconds:
+                cls.__inference_max_seconds = elapsed
+            if batch_size is not None:
+                cls.__batch_count += 1
+                cls.__batch_item_count += batch_size
+        logger.debug(f"Magika inference took {elapsed * 1000:.2f} ms" + (f" for {batch_size} items" if batch_size else ""))
+
+
+class _RecordingStream:
+    """読み込んだ範囲のデータを保持するストリームのラッパー"""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.__stream = stream
+        self.__position = 0
+        # 読み込みを開始した位置と読み込んだデータ
+        self.reads: dict[int, bytes] = {}
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self.__position = self.__stream.seek(offset, whence)
+        return self.__position
+
+    def tell(self) -> int:
+        return self.__position
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.__stream.read(size)
+        self.reads[self.__position] = data
+        self.__position += len(data)
+        return data
+
+
+class _ReplayStream(io.BufferedIOBase):
+    """_RecordingStreamで読み込んだ範囲のみを返すストリーム
+
+    Magikaは同じサイズのストリームからは同じ範囲を読み込むため、元のストリームを
+    閉じた後でも同じ判定結果が得られます。記録していない範囲を読み込んだ場合はOSErrorを送出します。
+    """
+
+    def __init__(self, size: int, reads: dict[int, bytes]) -> None:
+        super().__init__()
+        self.__size = size
+        self.__reads = reads
+        self.__position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.__position, io.SEEK_END: self.__size}[whence]
+        self.__position = base + offset
+        return self.__position
+
+    def tell(self) -> int:
+        return self.__position
+
+    def read(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0 or self.__position + size > self.__size:
+            size = max(self.__size - self.__position, 0)
+        if size == 0:
+            return b""
+        for offset, data in self.__reads.items():
+            if offset <= self.__position and self.__position + size <= offset + len(data):
+                start = self.__position - offset
+                self.__position += size
+                return data[start:start + size]
+        raise OSError(f"Range {self.__position}-{self.__position + size} was not read from the stream")
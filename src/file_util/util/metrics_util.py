@@ -0,0 +1,189 @@
+import bisect
+import threading
+import time
+
+from file_util.config.file_util_config import FileUtilConfig
+
+
+class MetricsSpan:
+    """処理段階の処理時間と処理したバイト数を計測するコンテキストマネージャー
+
+    withブロックを抜けた時点でMetricsUtilに記録します。ブロック内で例外が発生した場合はエラーとして数えます。
+    """
+
+    __slots__ = ("stage", "format", "bytes", "__start")
+
+    def __init__(self, stage: str, format: str = ""):
+        self.stage = stage
+        self.format = format
+        self.bytes = 0
+        self.__start = 0.0
+
+    def __enter__(self) -> "MetricsSpan":
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        MetricsUtil.record(self.stage, time.perf_counter() - self.__start, self.format, self.bytes, exc_type is not None)
+
+    def add_bytes(self, size: int) -> None:
+        """処理したバイト数を加算する"""
+        self.bytes += size
+
+    def set_format(self, format: str) -> None:
+        """形式を設定する。処理の途中で形式が判明する場合に使用する"""
+        self.format = format
+
+
+class NoopMetricsSpan:
+    """計測が無効な場合に返す何もしないMetricsSpan"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NoopMetricsSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def add_bytes(self, size: int) -> None:
+        pass
+
+    def set_format(self, format: str) -> None:
+        pass
+
+
+class MetricsUtil:
+    """処理段階・形式ごとの処理時間のヒストグラムと処理したバイト数を集計するユーティリティクラス
+
+    段階はファイルの読み込み(read)、種類の判定(classify)、エンコーディングの判定(encoding)、
+    テキストの抽出(extract)、サニタイズ(sanitize)、ZIPファイルの操作(zip_*)、リクエスト全体(request)です。
+    METRICS_ENABLEDがfalseの場合は何もしないspanを返すため、計測の負荷はほとんどありません。
+    """
+
+    # 処理時間のヒストグラムの上限(秒)
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    __NOOP_SPAN = NoopMetricsSpan()
+
+    __enabled: bool | None = None
+    __lock = threading.Lock()
+    # (段階, 形式)ごとの集計値
+    __series: dict[tuple[str, str], dict] = {}
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """計測が有効かどうかを返す。初回の呼び出し時にMETRICS_ENABLEDを読み込む"""
+        enabled = cls.__enabled
+        if enabled is None:
+            enabled = cls.__enabled = FileUtilConfig.get_instance().metrics_enabled
+        return enabled
+
+    @classmethod
+    def set_enabled(cls, enabled: bool) -> None:
+        """計測の有効・無効を切り替える"""
+        cls.__enabled = enabled
+
+    @classmethod
+    def span(cls, stage: str, format: str = "") -> MetricsSpan | NoopMetricsSpan:
+        """処理段階を計測するspanを作成する
+
+        Args:
+            stage: 処理段階
+            format: ファイルの形式(text, pdf, excel, word, ppt など)
+
+        Returns:
+            MetricsSpan | NoopMetricsSpan: withブロックで使用するspan。計測が無効な場合は何もしない
+        """
+        if not cls.is_enabled():
+            return cls.__NOOP_SPAN
+        return MetricsSpan(stage, format)
+
+    @classmethod
+    def record(cls, stage: str, seconds: float, format: str = "", size: int = 0, error: bool = False) -> None:
+        """処理段階の処理時間と処理したバイト数を記録する
+
+        Args:
+            stage: 処理段階
+            seconds: 処理時間(秒)
+            format: ファイルの形式
+            size: 処理したバイト数
+            error: 処理に失敗した場合はTrue
+        """
+        if not cls.is_enabled():
+            return
+        index = bisect.bisect_left(cls.BUCKETS, seconds)
+        with cls.__lock:
+            series = cls.__series.get((stage, format))
+            if series is None:
+                series = cls.__series[(stage, format)] = {
+                    "count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "bytes": 0, "errors": 0,
+                    "buckets": [0] * (len(cls.BUCKETS) + 1),
+                }
+            series["count"] += 1
+            series["total_seconds"] += seconds
+            series["max_seconds"] = max(series["max_seconds"], seconds)
+            series["bytes"] += size
+            series["errors"] += int(error)
+            series["buckets"][index] += 1
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """処理段階・形式ごとの回数、処理時間、バイト数、エラー数を返す
+
+        Returns:
+            dict: {段階: {形式: 集計値}}。ヒストグラムは上限(秒)ごとの累積の回数
+        """
+        stats: dict[str, dict[str, dict]] = {}
+        with cls.__lock:
+            for (stage, format), series in sorted(cls.__series.items()):
+                item = {key: value for key, value in series.items() if key != "buckets"}
+                item["avg_seconds"] = series["total_seconds"] / series["count"] if series["count"] else 0.0
+                item["histogram"] = dict(zip([str(b) for b in cls.BUCKETS] + ["+Inf"], cls.__cumulate(series["buckets"])))
+                stats.setdefault(stage, {})[format] = item
+        return stats
+
+    @classmethod
+    def render_prometheus(cls) -> str:
+        """集計値をPrometheusのテキスト形式で返す
+
+        Returns:
+            str: file_util_stage_duration_seconds(ヒストグラム)、file_util_stage_bytes_total、
+                file_util_stage_errors_total
+        """
+        with cls.__lock:
+            series_list = sorted((key, dict(series, buckets=list(series["buckets"]))) for key, series in cls.__series.items())
+        lines = [
+            "# HELP file_util_stage_duration_seconds Time spent in each processing stage",
+            "# TYPE file_util_stage_duration_seconds histogram",
+        ]
+        for (stage, format), series in series_list:
+            labels = f'stage="{stage}",format="{format}"'
+            for bound, count in zip([str(b) for b in cls.BUCKETS] + ["+Inf"], cls.__cumulate(series["buckets"])):
+                lines.append(f'file_util_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"file_util_stage_duration_seconds_sum{{{labels}}} {series['total_seconds']}")
+            lines.append(f"file_util_stage_duration_seconds_count{{{labels}}} {series['count']}")
+        for name, key, description in (
+            ("file_util_stage_bytes_total", "bytes", "Bytes processed in each processing stage"),
+            ("file_util_stage_errors_total", "errors", "Failures in each processing stage"),
+        ):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for (stage, format), series in series_list:
+                lines.append(f'{name}{{stage="{stage}",format="{format}"}} {series[key]}')
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls) -> None:
+        """集計値を消去する"""
+        with cls.__lock:
+            cls.__series.clear()
+
+    @classmethod
+    def __cumulate(cls, buckets: list[int]) -> list[int]:
+        counts = []
+        total = 0
+        for count in buckets:
+            total += count
+            counts.append(total)
+        return counts
@@ -0,0 +1,203 @@
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from io import StringIO
+from typing import IO, Iterator
+
+# WordprocessingML / DrawingML の名前空間
+WORDPROCESSINGML_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DRAWINGML_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+MARKUP_COMPATIBILITY_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+# PresentationML / リレーションシップの名前空間
+PRESENTATIONML_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+RELATIONSHIPS_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_RELATIONSHIPS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+class OOXMLUtil:
+    """Office Open XML(docx, pptx)から直接テキストを抽出するユーティリティクラス
+
+    python-docx / python-pptx のオブジェクトモデルを構築せず、ZIP内のXMLを
+    インクリメンタルに解析してテキストのみを取り出します。
+    """
+
+    @classmethod
+    def extract_text_from_docx(cls, filename: str | IO[bytes]) -> str:
+        """Word(DOCX)からテキストを抽出する
+
+        本文に加えて表、ヘッダー、フッターのテキストも抽出します。
+        表は1行を1行のテキストとし、セルをタブで区切ります。
+
+        Args:
+            filename: DOCXファイルのパスまたはファイルオブジェクト
+
+        Returns:
+            str: 抽出されたテキスト
+        """
+        output = StringIO()
+        with zipfile.ZipFile(filename) as zf:
+            names = zf.namelist()
+            parts = (
+                [name for _, name in cls.__sorted_parts(names, r"word/header(\d*)\.xml")]
+                + (["word/document.xml"] if "word/document.xml" in names else [])
+                + [name for _, name in cls.__sorted_parts(names, r"word/footer(\d*)\.xml")]
+            )
+            for part in parts:
+                with zf.open(part) as f:
+                    for line in cls.__iter_docx_lines(f):
+                        output.write(line)
+                        output.write("\n")
+        return output.getvalue()
+
+    @classmethod
+    def extract_text_from_pptx(cls, filename: str | IO[bytes]) -> str:
+        """PowerPoint(PPTX)からテキストを抽出する
+
+        Args:
+            filename: PPTXファイルのパスまたはファイルオブジェクト
+
+        Returns:
+            str: 抽出されたテキスト
+        """
+        output = StringIO()
+        for _, lines in cls.iter_slides_from_pptx(filename):
+            for line in lines:
+                output.write(line)
+                output.write("\n")
+        return output.getvalue()
+
+    @classmethod
+    def iter_slides_from_pptx(cls, filename: str | IO[bytes], start_slide: int = 1) -> Iterator[tuple[int, list[str]]]:
+        """PowerPoint(PPTX)からスライドごとにテキストを抽出する
+
+        スライドはppt/presentation.xmlのスライドの一覧(p:sldIdLst)の順、つまり表示順に処理します。
+        一覧がない場合はファイル名(slide1.xml, slide2.xml, ...)の番号順に処理します。
+
+        Args:
+            filename: PPTXファイルのパスまたはファイルオブジェクト
+            start_slide: 抽出を開始するスライド番号(1始まり)。これより前のスライドは解析しない
+
+        Yields:
+            tuple[int, list[str]]: スライド番号(1始まり)と段落ごとのテキスト
+        """
+        with zipfile.ZipFile(filename) as zf:
+            parts = cls.__get_slide_parts(zf)
+            if parts is None:
+                parts = [name for _, name in cls.__sorted_parts(zf.namelist(), r"ppt/slides/slide(\d+)\.xml")]
+            for number, part in enumerate(parts, start=1):
+                if number < start_slide:
+                    continue
+                with zf.open(part) as f:
+                    yield number, list(cls.__iter_drawingml_lines(f))
+
+    @classmethod
+    def __get_slide_parts(cls, zf: zipfile.ZipFile) -> list[str] | None:
+        # presentation.xmlのp:sldIdLstのr:idを、presentation.xml.relsでスライドのパーツ名に変換する
+        names = set(zf.namelist())
+        if "ppt/presentation.xml" not in names or "ppt/_rels/presentation.xml.rels" not in names:
+            return None
+        with zf.open("ppt/_rels/presentation.xml.rels") as f:
+            targets = {
+                rel.get("Id"): rel.get("Target", "")
+                for rel in ET.parse(f).getroot().iter(PACKAGE_RELATIONSHIPS_NS + "Relationship")
+            }
+        with zf.open("ppt/presentation.xml") as f:
+            slide_ids = ET.parse(f).getroot().find(PRESENTATIONML_NS + "sldIdLst")
+        if slide_ids is None:
+            return None
+        parts = []
+        for slide_id in slide_ids.iter(PRESENTATIONML_NS + "sldId"):
+            target = targets.get(slide_id.get(RELATIONSHIPS_NS + "id"))
+            if not target:
+                continue
+            # Targetはppt/からの相対パスまたはパッケージのルートからの絶対パス
+            part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("ppt", target))
+            if part in names:
+                parts.append(part)
+        return parts
+
+    @classmethod
+    def __sorted_parts(cls, names: list[str], pattern: str) -> list[tuple[int, str]]:
+        # パターンに一致するパーツを番号順に並べる
+        parts = []
+        for name in names:
+            m = re.fullmatch(pattern, name)
+            if m:
+                parts.append((int(m.group(1) or 0), name))
+        return sorted(parts)
+
+    @classmethod
+    def __iter_docx_lines(cls, f: IO[bytes]) -> Iterator[str]:
+        # 段落(w:p)ごとに1行とし、表の中の段落はセル(w:tc)、行(w:tr)単位でまとめる
+        paragraph: list[str] = []
+        # 表の入れ子に対応するため、行ごとのセルのリストとセルの段落のリストをスタックで管理する
+        rows: list[list[str]] = []
+        cells: list[list[str]] = []
+        # mc:Fallback は mc:Choice と同じ内容を持つため読み飛ばす
+        fallback_depth = 0
+        # w:tabは段落のプロパティ(w:pPr/w:tabs)ではタブ位置の定義のため、ラン(w:r)の中のみタブ文字とする
+        run_depth = 0
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            tag = elem.tag
+            if tag == MARKUP_COMPATIBILITY_NS + "Fallback":
+                fallback_depth += 1 if event == "start" else -1
+                continue
+            if fallback_depth > 0:
+                continue
+            if tag == WORDPROCESSINGML_NS + "r":
+                run_depth += 1 if event == "start" else -1
+            if event == "start":
+                if tag == WORDPROCESSINGML_NS + "tr":
+                    rows.append([])
+                elif tag == WORDPROCESSINGML_NS + "tc":
+                    cells.append([])
+                continue
+
+            if tag == WORDPROCESSINGML_NS + "t":
+                paragraph.append(elem.text or "")
+            elif tag == WORDPROCESSINGML_NS + "tab" and run_depth > 0:
+                paragraph.append("\t")
+            elif tag in (WORDPROCESSINGML_NS + "br", WORDPROCESSINGML_NS + "cr"):
+                paragraph.append("\n")
+            elif tag == WORDPROCESSINGML_NS + "p":
+                text = "".join(paragraph)
+                paragraph = []
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif tag == WORDPROCESSINGML_NS + "tc":
+                cell = cells.pop()
+                if rows:
+                    rows[-1].append(" ".join(t for t in cell if t))
+            elif tag == WORDPROCESSINGML_NS + "tr":
+                row = "\t".join(rows.pop())
+                if cells:
+                    cells[-1].append(row)
+                else:
+                    yield row
+            # 処理済みの要素は破棄してメモリ使用量を抑える
+            if tag in (WORDPROCESSINGML_NS + "p", WORDPROCESSINGML_NS + "tbl"):
+                elem.clear()
+
+    @classmethod
+    def __iter_drawingml_lines(cls, f: IO[bytes]) -> Iterator[str]:
+        # 段落(a:p)ごとに1行とする
+        paragraph: list[str] = []
+        fallback_depth = 0
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            tag = elem.tag
+            if tag == MARKUP_COMPATIBILITY_NS + "Fallback":
+                fallback_depth += 1 if event == "start" else -1
+                continue
+            if fallback_depth > 0 or event == "start":
+                continue
+            if tag == DRAWINGML_NS + "t":
+                paragraph.append(elem.text or "")
+            elif tag == DRAWINGML_NS + "br":
+                paragraph.append("\n")
+            elif tag == DRAWINGML_NS + "p":
+                yield "".join(paragraph)
+                paragraph = []
+                elem.clear()
@@ -1,16 +1,158 @@
-from pdfminer.high_level import extract_text
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from typing import IO, Iterator
 
 
 class PDFUtil:
     @classmethod
-    def extract_text_from_pdf(cls, filename: str) -> str:
+    def extract_text_from_pdf(cls, filename: str | IO[bytes]) -> str:
         """
         PDFファイルからテキストを抽出する。
         Args:
-            filename (str): PDFファイルのパス
+            filename (str | IO[bytes]): PDFファイルのパスまたはファイルオブジェクト
         Returns:
             str: 抽出されたテキスト
         """
+        from pdfminer.high_level import extract_text
         text = extract_text(filename)
         return text
 
+    @classmethod
+    def iter_pages_from_pdf(
+        cls, filename: str | IO[bytes], page_numbers: set[int] | None = None, max_chars: int | None = None,
+        start_page: int = 0,
+        ) -> Iterator[tuple[int, str]]:
+        """
+        PDFファイルからページ単位でテキストを抽出する。
+        ページは必要になった時点で1ページずつ解析するため、途中で反復を止めた場合は
+        残りのページを解析しません。各ページのテキストを連結した結果は
+        extract_text_from_pdf と同じになります。
+        Args:
+            filename (str | IO[bytes]): PDFファイルのパスまたはファイルオブジェクト
+            page_numbers (set[int] | None): 抽出するページ番号(0始まり)。Noneの場合は全ページ
+            max_chars (int | None): 抽出する最大文字数。到達した時点でそのページのテキストを切り詰めて終了する
+            start_page (int): 抽出を開始するページ番号(0始まり)。これより前のページは解析しない
+        Yields:
+            tuple[int, str]: ページ番号(0始まり)とそのページのテキスト
+        """
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.utils import open_filename
+
+        last_page = max(page_numbers) if page_numbers else None
+        remaining = max_chars
+        with open_filename(filename, "rb") as fp, StringIO() as output:
+            rsrcmgr = PDFResourceManager(caching=True)
+            device = TextConverter(rsrcmgr, output, codec="utf-8", laparams=LAParams())
+            interpreter = PDFPageInterpreter(rsrcmgr, device)
+            document = PDFDocument(PDFParser(fp), caching=True)
+            for page_number, page in enumerate(PDFPage.create_pages(document)):
+                if last_page is not None and page_number > last_page:
+                    break
+                if page_number < start_page or (page_numbers and page_number not in page_numbers):
+                    continue
+                interpreter.process_page(page)
+                text = output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+                if remaining is not None:
+                    text = text[:remaining]
+                    remaining -= len(text)
+                yield page_number, text
+                if remaining is not None and remaining <= 0:
+                    break
+
+    @classmethod
+    def get_page_count(cls, filename: str) -> int:
+        """
+        PDFファイルのページ数を取得する。ページの内容は解析しない。
+        Args:
+            filename (str): PDFファイルのパス
+        Returns:
+            int: ページ数
+        """
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        with open(filename, "rb") as fp:
+            document = PDFDocument(PDFParser(fp), caching=True)
+            return sum(1 for _ in PDFPage.create_pages(document))
+
+    @classmethod
+    def extract_text_from_page_range(cls, filename: str, start: int, end: int) -> str:
+        """
+        PDFファイルの指定範囲のページからテキストを抽出する。プロセスプールから呼び出す。
+        Args:
+            filename (str): PDFファイルのパス
+            start (int): 開始ページ番号(0始まり)
+            end (int): 終了ページ番号(0始まり、このページは含まない)
+        Returns:
+            str: 抽出されたテキスト
+        """
+        return "".join(text for _, text in cls.iter_pages_from_pdf(filename, set(range(start, end))))
+
+    @classmethod
+    def split_page_ranges(cls, page_count: int, pages_per_task: int) -> list[tuple[int, int]]:
+        """
+        ページを並列抽出用の範囲に分割する。
+        Args:
+            page_count (int): ページ数
+            pages_per_task (int): 1範囲あたりのページ数
+        Returns:
+            list[tuple[int, int]]: (開始ページ, 終了ページ)のリスト
+        """
+        pages_per_task = max(1, pages_per_task)
+        return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+    @classmethod
+    def extract_text_from_pdf_parallel(cls, filename: str, max_workers: int | None = None, pages_per_task: int = 25) -> str:
+        """
+        PDFファイルのページを分割し、プロセスプールで並列にテキストを抽出する。
+        結果はページ順に連結するため、extract_text_from_pdf と同じテキストになります。
+        Args:
+            filename (str): PDFファイルのパス
+            max_workers (int | None): ワーカープロセス数。Noneの場合はCPU数
+            pages_per_task (int): 1タスクで処理するページ数
+        Returns:
+            str: 抽出されたテキスト
+        """
+        ranges = cls.split_page_ranges(cls.get_page_count(filename), pages_per_task)
+        if len(ranges) <= 1:
+            return cls.extract_text_from_pdf(filename)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [executor.submit(cls.extract_text_from_page_range, filename, start, end) for start, end in ranges]
+            return "".join(future.result() for future in futures)
+
+    @classmethod
+    def parse_page_range(cls, page_range: str) -> set[int]:
+        """
+        "1-3,5" 形式のページ範囲(1始まり)を0始まりのページ番号の集合に変換する。
+        Args:
+            page_range (str): ページ範囲
+        Returns:
+            set[int]: ページ番号(0始まり)の集合
+        """
+        page_numbers: set[int] = set()
+        for part in page_range.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                start, end = part.split("-", 1)
+                first, last = int(start), int(end)
+                if first < 1 or last < first:
+                    raise ValueError(f"Invalid page range: {part}")
+                page_numbers.update(range(first - 1, last))
+            else:
+                page = int(part)
+                if page < 1:
+                    raise ValueError(f"Invalid page number: {part}")
+                page_numbers.add(page - 1)
+        return page_numbers
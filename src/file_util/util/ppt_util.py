@@ -1,18 +1,28 @@
-import pptx
 from io import StringIO
 
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.util.ooxml_util import OOXMLUtil
+
 class PPTUtil:
 
     @classmethod
-    def extract_text_from_pptx(cls, filename):
+    def extract_text_from_pptx(cls, filename, engine: str | None = None):
         """PowerPoint(PPTX)からテキストを抽出する
 
         Args:
-            filename: PPTXファイルパス
+            filename: PPTXファイルパスまたはファイルオブジェクト
+            engine: 抽出エンジン。"python-pptx" または "ooxml"。
+                Noneの場合は設定(PPT_EXTRACTOR)に従う
 
         Returns:
             str: 抽出されたテキスト
         """
+        engine = engine or FileUtilConfig.get_instance().ppt_extractor
+        if engine == "ooxml":
+            return OOXMLUtil.extract_text_from_pptx(filename)
+
+        import pptx
+
         # 出力用のストリームを作成
         output = StringIO()
         prs = pptx.Presentation(filename)
@@ -0,0 +1,492 @@
+import abc
+import io
+import os
+import stat
+import threading
+import time
+from typing import IO, Any
+
+from file_util.config.file_util_config import FileUtilConfig
+import file_util.log.log_settings as log_settings
+logger = log_settings.getLogger(__name__)
+
+
+class CountingReader(io.BufferedIOBase):
+    """読み込んだバイト数をストレージに記録するファイルオブジェクトのラッパー"""
+
+    def __init__(self, f: IO[bytes], storage: "FileStorage"):
+        super().__init__()
+        self.__f = f
+        self.__storage = storage
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self.__f.seekable()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self.__f.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.__f.tell()
+
+    def read(self, size: int | None = -1) -> bytes:
+        data = self.__f.read(size)
+        self.__storage.record_read(len(data))
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.read(size)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.__f.close()
+        super().close()
+
+
+class BufferReader(io.BufferedIOBase):
+    """bytes, memoryview, mmapなどのバッファを読み込むファイルオブジェクト
+
+    io.BytesIOはbytes以外を渡すと全体をコピーするため、バッファを参照したまま読み込む範囲のみをコピーします。
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self.__view = memoryview(buffer).cast("B")
+        self.__position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.__position
+        elif whence == os.SEEK_END:
+            offset += len(self.__view)
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.__position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self.__position
+
+    def read(self, size: int | None = -1) -> bytes:
+        start = min(self.__position, len(self.__view))
+        end = len(self.__view) if size is None or size < 0 else min(start + size, len(self.__view))
+        self.__position = max(self.__position, end)
+        return bytes(self.__view[start:end])
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.read(size)
+
+    def readinto(self, b) -> int:
+        start = min(self.__position, len(self.__view))
+        length = min(len(b), len(self.__view) - start)
+        memoryview(b).cast("B")[:length] = self.__view[start:start + length]
+        self.__position = start + length
+        return length
+
+    def close(self) -> None:
+        if not self.closed:
+            # mmapを閉じられるようにバッファの参照を解放する
+            self.__view.release()
+        super().close()
+
+
+class FileStorage(abc.ABC):
+    """ファイルの読み込み元(ストレージ)の基底クラス
+
+    パスの形式はストレージごとに異なります(ローカルはファイルパス、SMBは smb://server/share/path)。
+    scandirが返すエントリはos.DirEntryと同じく name, path, is_dir(), is_symlink(), stat() を持ちます。
+    読み込み用に開いたファイルから読み込んだバイト数をストレージごとに記録します。
+    """
+
+    # read_bytes, downloadで読み込むチャンクサイズ
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self):
+        self.__stats_lock = threading.Lock()
+        self.__opens = 0
+        self.__read_calls = 0
+        self.__bytes_read = 0
+
+    @abc.abstractmethod
+    def _open(self, path: str, mode: str) -> IO[bytes]:
+        """ファイルを開く。サブクラスで実装する"""
+
+    def open(self, path: str, mode: str = "rb") -> IO[bytes]:
+        """ファイルを開く。読み込み用の場合は読み込んだバイト数を記録する"""
+        f = self._open(path, mode)
+        if "r" not in mode:
+            return f
+        with self.__stats_lock:
+            self.__opens += 1
+        return CountingReader(f, self)
+
+    @abc.abstractmethod
+    def stat(self, path: str) -> Any:
+        """ファイルのサイズと更新日時(st_size, st_mtime_ns)を取得する"""
+
+    @abc.abstractmethod
+    def scandir(self, path: str) -> list:
+        """ディレクトリのエントリを取得する"""
+
+    def read_range(self, path: str, offset: int, length: int) -> bytes:
+        """ファイルの指定範囲のみを読み込む
+
+        Args:
+            path: ファイルのパス
+            offset: 読み込みを開始する位置。負の場合はファイルの末尾からの位置
+            length: 読み込むバイト数
+
+        Returns:
+            bytes: 読み込んだデータ。ファイルの末尾を超える部分は含まない
+        """
+        with self.open(path) as f:
+            if offset < 0:
+                f.seek(max(0, self.stat(path).st_size + offset))
+            else:
+                f.seek(offset)
+            return f.read(length)
+
+    def read_bytes(self, path: str) -> bytes:
+        """ファイル全体をチャンク単位で読み込む"""
+        data = bytearray()
+        with self.open(path) as f:
+            while chunk := f.read(self.CHUNK_SIZE):
+                data += chunk
+        return bytes(data)
+
+    def download(self, path: str, local_path: str) -> int:
+        """ファイルをローカルのファイルにチャンク単位でコピーし、コピーしたバイト数を返す"""
+        size = 0
+        with self.open(path) as source, open(local_path, "wb") as target:
+            while chunk := source.read(self.CHUNK_SIZE):
+                target.write(chunk)
+                size += len(chunk)
+        return size
+
+    def record_read(self, size: int) -> None:
+        """読み込んだバイト数を記録する"""
+        with self.__stats_lock:
+            self.__read_calls += 1
+            self.__bytes_read += size
+
+    def get_stats(self) -> dict:
+        """ファイルを開いた回数、読み込みの回数、読み込んだバイト数を返す"""
+        with self.__stats_lock:
+            return {
+                "opens": self.__opens,
+                "read_calls": self.__read_calls,
+                "bytes_read": self.__bytes_read,
+            }
+
+
+class LocalStorage(FileStorage):
+    """ローカルファイルシステムのストレージ"""
+
+    def _open(self, path: str, mode: str) -> IO[bytes]:
+        return open(path, mode)
+
+    def stat(self, path: str) -> os.stat_result:
+        return os.stat(path)
+
+    def scandir(self, path: str) -> list[os.DirEntry]:
+        with os.scandir(path) as it:
+            return list(it)
+
+
+class SMBStorageEntry:
+    """SMBStorage.scandirが返すエントリ。パスは smb:// 形式とする"""
+
+    def __init__(self, entry: Any, path: str):
+        self.__entry = entry
+        self.name: str = entry.name
+        self.path = path
+
+    def is_dir(self) -> bool:
+        return self.__entry.is_dir()
+
+    def is_symlink(self) -> bool:
+        return self.__entry.is_symlink()
+
+    def stat(self) -> Any:
+        return self.__entry.stat()
+
+
+class SMBStorage(FileStorage):
+    """SMB/CIFSの共有フォルダのストレージ
+
+    smbclient(smbprotocol)のセッションをサーバーごとに1度だけ登録し、インスタンスが持つ
+    接続キャッシュを通じて再利用します。SMB2以降は1つの接続で複数の要求を多重化できるため、
+    複数のスレッドから並列に読み込む場合も接続は共有されます。
+    clientにsmbclientと同じ関数(register_session, open_file, scandir, stat)を持つオブジェクトを渡すと、
+    実際のSMBサーバーの代わりに使用します(テストではtests/smb_stub.pyのInMemorySMBClientを使用)。
+    """
+
+    def __init__(
+        self, server: str = "", share: str = "", username: str | None = None, password: str | None = None,
+        client: Any = None,
+        ):
+        super().__init__()
+        if client is None:
+            import smbclient
+            client = smbclient
+        self.__client = client
+        self.__server = server
+        self.__share = share
+        self.__username = username
+        self.__password = password
+        self.__connection_cache: dict = {}
+        self.__sessions: set[str] = set()
+        self.__lock = threading.Lock()
+
+    def to_unc_path(self, path: str) -> tuple[str, str]:
+        """smb://server/share/path 形式のパスをサーバー名とUNCパス(\\\\server\\share\\path)に変換する
+
+        smb:///path のようにサーバー名を省略した場合は、既定のサーバーと共有フォルダのパスとします。
+        """
+        if not path.startswith(StorageUtil.SMB_PREFIX):
+            raise ValueError(f"Not an SMB path: {path}")
+        rest = path[len(StorageUtil.SMB_PREFIX):]
+        if rest.startswith("/"):
+            rest = f"{self.__server}/{self.__share}{rest}"
+        parts = [part for part in rest.split("/") if part]
+        if len(parts) < 2:
+            raise ValueError(f"SMB path must include a server and a share: {path}")
+        return parts[0], "\\\\" + "\\".join(parts)
+
+    def __get_unc_path(self, path: str) -> str:
+        # サーバーごとのセッションは最初のアクセス時に1度だけ登録する
+        server, unc_path = self.to_unc_path(path)
+        if server not in self.__sessions:
+            with self.__lock:
+                if server not in self.__sessions:
+                    logger.info(f"Registering SMB session for {server}")
+                    self.__client.register_session(
+                        server, username=self.__username, password=self.__password,
+                        connection_cache=self.__connection_cache,
+                    )
+                    self.__sessions.add(server)
+        return unc_path
+
+    def _open(self, path: str, mode: str) -> IO[bytes]:
+        return self.__client.open_file(self.__get_unc_path(path), mode=mode, connection_cache=self.__connection_cache)
+
+    def stat(self, path: str) -> Any:
+        return self.__client.stat(self.__get_unc_path(path), connection_cache=self.__connection_cache)
+
+    def scandir(self, path: str) -> list[SMBStorageEntry]:
+        base = path.rstrip("/")
+        return [
+            SMBStorageEntry(entry, f"{base}/{entry.name}")
+            for entry in self.__client.scandir(self.__get_unc_path(path), connection_cache=self.__connection_cache)
+        ]
+
+
+class MemoryStorageStat:
+    """MemoryStorage.statが返すファイルの情報"""
+
+    def __init__(self, size: int, mtime_ns: int, is_dir: bool = False):
+        self.st_size = size
+        self.st_mtime_ns = mtime_ns
+        self.st_mtime = mtime_ns / 1e9
+        self.st_mode = (stat.S_IFDIR | 0o755) if is_dir else (stat.S_IFREG | 0o644)
+
+
+class MemoryStorageEntry:
+    """MemoryStorage.scandirが返すエントリ"""
+
+    def __init__(self, name: str, path: str, stat_result: MemoryStorageStat, is_dir: bool):
+        self.name = name
+        self.path = path
+        self.__stat = stat_result
+        self.__is_dir = is_dir
+
+    def is_dir(self) -> bool:
+        return self.__is_dir
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def stat(self) -> MemoryStorageStat:
+        return self.__stat
+
+
+class MemoryStorage(FileStorage):
+    """メモリ上にデータを保持するストレージ
+
+    mem://name/path 形式のパスでデータを登録し、ファイルと同様に読み込めます。
+    ディレクトリはパスの区切り("/")から暗黙に作成されます。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__files: dict[str, tuple[bytes, int]] = {}
+        self.__lock = threading.Lock()
+
+    def put(self, path: str, data: bytes) -> None:
+        """データを登録する"""
+        with self.__lock:
+            self.__files[path.rstrip("/")] = (data, time.time_ns())
+
+    def remove(self, path: str) -> None:
+        """登録したデータを削除する"""
+        with self.__lock:
+            del self.__files[path.rstrip("/")]
+
+    def __get(self, path: str) -> tuple[bytes, int]:
+        with self.__lock:
+            item = self.__files.get(path.rstrip("/"))
+        if item is None:
+            raise FileNotFoundError(path)
+        return item
+
+    def _open(self, path: str, mode: str) -> IO[bytes]:
+        if mode not in ("r", "rb"):
+            raise ValueError("MemoryStorage is read-only. Use put() to add data")
+        return io.BytesIO(self.__get(path)[0])
+
+    def stat(self, path: str) -> MemoryStorageStat:
+        with self.__lock:
+            item = self.__files.get(path.rstrip("/"))
+            is_dir = item is None and any(p.startswith(path.rstrip("/") + "/") for p in self.__files)
+        if is_dir:
+            return MemoryStorageStat(0, 0, is_dir=True)
+        data, mtime_ns = self.__get(path)
+        return MemoryStorageStat(len(data), mtime_ns)
+
+    def scandir(self, path: str) -> list[MemoryStorageEntry]:
+        prefix = path.rstrip("/") + "/"
+        entries: dict[str, MemoryStorageEntry] = {}
+        with self.__lock:
+            for file_path, (data, mtime_ns) in self.__files.items():
+                if not file_path.startswith(prefix):
+                    continue
+                name, sep, _ = file_path[len(prefix):].partition("/")
+                if name in entries:
+                    continue
+                if sep:
+                    entries[name] = MemoryStorageEntry(name, prefix + name, MemoryStorageStat(0, 0, is_dir=True), True)
+                else:
+                    entries[name] = MemoryStorageEntry(name, file_path, MemoryStorageStat(len(data), mtime_ns), False)
+        if not entries:
+            raise FileNotFoundError(path)
+        return list(entries.values())
+
+
+class StorageUtil:
+    """パスに対応するストレージを取得するユーティリティクラス
+
+    パスの先頭(smb:// など)ごとにストレージを登録し、該当しないパスはローカルファイルとして扱います。
+    smb:// のストレージはENABLE_SMB_CIFSがtrueの場合に、設定のサーバー・共有フォルダ・認証情報で
+    初回使用時に作成します。smb:///path は設定の共有フォルダ(SMB_CIFS_SERVER, SMB_CIFS_SHARE)のパスです。
+    mem:// はメモリ上のデータ(get_memory_storage().put()で登録)を読み込むストレージです。
+    """
+
+    SMB_PREFIX = "smb://"
+    MEMORY_PREFIX = "mem://"
+
+    __local_storage = LocalStorage()
+    __memory_storage = MemoryStorage()
+    __storages: dict[str, FileStorage] = {MEMORY_PREFIX: __memory_storage}
+    __lock = threading.Lock()
+
+    @classmethod
+    def register_storage(cls, prefix: str, storage: FileStorage) -> None:
+        """パスの先頭に対応するストレージを登録する
+
+        Args:
+            prefix: パスの先頭(例: "smb://")
+            storage: ストレージ
+        """
+        with cls.__lock:
+            cls.__storages[prefix] = storage
+
+    @classmethod
+    def unregister_storage(cls, prefix: str) -> None:
+        """登録したストレージを削除する"""
+        with cls.__lock:
+            cls.__storages.pop(prefix, None)
+
+    @classmethod
+    def is_remote(cls, path: str) -> bool:
+        """ローカルファイル以外のパスかどうかを判定する"""
+        return "://" in path
+
+    @classmethod
+    def get_storage(cls, path: str) -> FileStorage:
+        """パスに対応するストレージを取得する
+
+        Args:
+            path: ファイルパスまたは smb://server/share/path 形式のパス
+
+        Returns:
+            FileStorage: ストレージ
+        """
+        if not cls.is_remote(path):
+            return cls.__local_storage
+        with cls.__lock:
+            storages = list(cls.__storages.items())
+        for prefix, storage in storages:
+            if path.startswith(prefix):
+                return storage
+        if path.startswith(cls.SMB_PREFIX):
+            return cls.__get_smb_storage()
+        raise ValueError(f"No storage is registered for {path}")
+
+    @classmethod
+    def __get_smb_storage(cls) -> FileStorage:
+        config = FileUtilConfig.get_instance()
+        if not config.enable_smb_cifs:
+            raise ValueError("SMB/CIFS is disabled. Set ENABLE_SMB_CIFS=true to read smb:// paths")
+        with cls.__lock:
+            if cls.SMB_PREFIX not in cls.__storages:
+                cls.__storages[cls.SMB_PREFIX] = SMBStorage(
+                    config.smb_cifs_server, config.smb_cifs_share, config.smb_cifs_username, config.smb_cifs_password,
+                )
+            return cls.__storages[cls.SMB_PREFIX]
+
+    @classmethod
+    def get_memory_storage(cls) -> MemoryStorage:
+        """mem:// のストレージを取得する"""
+        return cls.__memory_storage
+
+    @classmethod
+    def read_range(cls, path: str, offset: int, length: int) -> bytes:
+        """パスに対応するストレージでファイルの指定範囲のみを読み込む"""
+        return cls.get_storage(path).read_range(path, offset, length)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """ストレージごとの読み込みの統計情報を返す
+
+        Returns:
+            dict: ストレージ(local, smb://, mem:// など)ごとのファイルを開いた回数、読み込みの回数、読み込んだバイト数
+        """
+        with cls.__lock:
+            storages = list(cls.__storages.items())
+        stats = {"local": cls.__local_storage.get_stats()}
+        for prefix, storage in storages:
+            stats[prefix] = storage.get_stats()
+        return stats
+
+    @classmethod
+    def open(cls, path: str, mode: str = "rb") -> IO[bytes]:
+        """パスに対応するストレージでファイルを開く"""
+        return cls.get_storage(path).open(path, mode)
+
+    @classmethod
+    def stat(cls, path: str) -> Any:
+        """パスに対応するストレージでファイルのサイズと更新日時を取得する"""
+        return cls.get_storage(path).stat(path)
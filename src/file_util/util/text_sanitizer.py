@@ -0,0 +1,183 @@
+import re
+import unicodedata
+from typing import Iterable, Iterator
+
+
+class TextSanitizer:
+    """抽出したテキストをチャンク単位でサニタイズするクラス
+
+    feed()で渡したチャンクごとに整形し、整形済みのテキストを返します。
+    チャンクの境界をまたぐ改行・空白の連続も1つにまとめるため、全体を連結してから
+    サニタイズした結果と同じになります。保持するのは境界の数文字のみです。
+    最後にfinish()を呼び出して、保留している末尾のテキストを取得してください。
+
+    既定(規則なし)では複数の改行と複数のスペースをそれぞれ1つにまとめます。
+    以下の規則を追加できます。
+
+    - crlf: CRLF・CRを改行(LF)に変換する
+    - whitespace: タブ・全角スペースなどのUnicodeの空白をスペースとして扱う
+    - nfkc: NFKC正規化を行う(全角英数字・半角カナなどを変換する)
+    """
+
+    CRLF = "crlf"
+    WHITESPACE = "whitespace"
+    NFKC = "nfkc"
+    RULES = (CRLF, WHITESPACE, NFKC)
+
+    # sanitize()で1度に処理する文字数
+    CHUNK_SIZE = 1024 * 1024
+
+    # whitespace規則でスペースとして扱う文字(スペース・改行を除く)
+    UNICODE_SPACES = "\t\v\f\u00a0\u1680\u2000-\u200a\u202f\u205f\u3000"
+
+    # 2文字以上連続する改行・スペース
+    NEWLINES_PATTERN = re.compile(r"\n{2,}")
+    SPACES_PATTERN = re.compile(r" {2,}")
+
+    def __init__(self, rules: Iterable[str] = ()):
+        """
+        Args:
+            rules: 適用する規則(crlf, whitespace, nfkc)
+
+        Raises:
+            ValueError: 不明な規則が指定された場合
+        """
+        rules = self.normalize_rules(rules)
+        self.__crlf = self.CRLF in rules
+        self.__nfkc = self.NFKC in rules
+
+        # 置換後の文字列を固定にして、Cの実装のみで置換する
+        self.__spaces_pattern = self.SPACES_PATTERN
+        if self.WHITESPACE in rules:
+            self.__spaces_pattern = re.compile(f"[ {self.UNICODE_SPACES}]{{2,}}|[{self.UNICODE_SPACES}]")
+
+        # チャンクの末尾で保留している未処理のテキスト
+        self.__pending = ""
+        # 直前に出力した文字
+        self.__last = ""
+
+    @classmethod
+    def normalize_rules(cls, rules: Iterable[str]) -> tuple[str, ...]:
+        """規則の指定を小文字・重複なし・RULESの順に正規化する
+
+        同じ結果になる規則の指定は同じ値になるため、キャッシュのキーなどに使用できます。
+
+        Args:
+            rules: 規則(crlf, whitespace, nfkc)
+
+        Returns:
+            tuple[str, ...]: 正規化した規則
+
+        Raises:
+            ValueError: 不明な規則が指定された場合
+        """
+        rules = {rule.strip().lower() for rule in rules if rule.strip()}
+        unknown = rules - set(cls.RULES)
+        if unknown:
+            raise ValueError(f"Unknown sanitize rules: {', '.join(sorted(unknown))}")
+        return tuple(rule for rule in cls.RULES if rule in rules)
+
+    def feed(self, text: str) -> str:
+        """チャンクをサニタイズする
+
+        Args:
+            text: サニタイズ対象のチャンク
+
+        Returns:
+            str: サニタイズされたテキスト。次のチャンクと結合し得る末尾の文字は含まない
+        """
+        if not text:
+            return ""
+        text = self.__pending + text
+        end = self.__get_stable_end(text)
+        self.__pending = text[end:]
+        return self.__process(text[:end])
+
+    def finish(self) -> str:
+        """保留しているテキストをサニタイズして返し、状態を初期化する
+
+        Returns:
+            str: サニタイズされた末尾のテキスト
+        """
+        text = self.__process(self.__pending)
+        self.__pending = ""
+        self.__last = ""
+        return text
+
+    def get_state(self) -> dict:
+        """処理の途中の状態(保留しているテキストと直前に出力した文字)を返す
+
+        Returns:
+            dict: set_stateで復元できるJSONに変換可能な状態
+        """
+        return {"pending": self.__pending, "last": self.__last}
+
+    def set_state(self, state: dict) -> None:
+        """get_stateで取得した状態を復元する"""
+        self.__pending = state["pending"]
+        self.__last = state["last"]
+
+    def sanitize(self, text: str) -> str:
+        """テキスト全体をサニタイズする
+
+        Args:
+            text: サニタイズ対象のテキスト
+
+        Returns:
+            str: サニタイズされたテキスト。入力が空の場合は空文字列
+        """
+        if not text:
+            return ""
+        return "".join(self.iter_sanitized(
+            text[i:i + self.CHUNK_SIZE] for i in range(0, len(text), self.CHUNK_SIZE)
+        ))
+
+    def iter_sanitized(self, chunks: Iterable[str]) -> Iterator[str]:
+        """チャンクを順にサニタイズする
+
+        Args:
+            chunks: サニタイズ対象のチャンク
+
+        Yields:
+            str: サニタイズされたテキスト。空のテキストは返さない
+        """
+        for chunk in chunks:
+            if text := self.feed(chunk):
+                yield text
+        if text := self.finish():
+            yield text
+
+    def __get_stable_end(self, text: str) -> int:
+        # 次のチャンクの先頭と結合し得る末尾の文字を除いた位置を返す
+        if self.__nfkc:
+            # NFKC正規化では結合文字(濁点など)が直前の文字と合成されるため、最後の基底文字から保留する
+            for i in range(len(text) - 1, -1, -1):
+                if self.__is_starter(text[i]):
+                    return i
+            return 0
+        if self.__crlf and text[-1] == "\r":
+            return len(text) - 1
+        return len(text)
+
+    @classmethod
+    def __is_starter(cls, char: str) -> bool:
+        # 半角の濁点・半濁点、ハングルの中声・終声は結合クラスが0でも直前の文字と合成される
+        if unicodedata.combining(char):
+            return False
+        return char not in "\uff9e\uff9f" and not ("\u1160" <= char <= "\u11ff")
+
+    def __process(self, text: str) -> str:
+        if not text:
+            return ""
+        if self.__nfkc:
+            text = unicodedata.normalize("NFKC", text)
+        if self.__crlf and "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        text = self.NEWLINES_PATTERN.sub("\n", text)
+        text = self.__spaces_pattern.sub(" ", text)
+        # 前のチャンクの末尾から続く改行・空白の連続を1つにまとめる
+        if self.__last and text[0] == self.__last and text[0] in "\n ":
+            text = text[1:]
+        if text:
+            self.__last = text[-1]
+        return text
@@ -1,6 +1,13 @@
+from typing import AsyncIterator, Iterator
+
 import aiofiles
 
 class TextUtil:
+    # 解析してからテキストを取得するマークアップのMIMEタイプ
+    MARKUP_MIME_TYPES = ("text/html", "text/xml", "text/markdown")
+    # iter_text_asyncで1度に読み込む文字数
+    CHUNK_SIZE = 1024 * 1024
+
     # text/*のファイルを読み込んで文字列として返す関数
     @classmethod
     async def process_text_async(cls, filename, mime_type, encoding):
@@ -40,3 +47,58 @@ class TextUtil:
             
         return result
 
+    # text/*のファイルをチャンク単位で読み込んで返す関数
+    @classmethod
+    async def iter_text_async(cls, filename, encoding, chunk_size: int | None = None) -> AsyncIterator[str]:
+        """マークアップ以外のtext/*のファイルをチャンク単位で読み込む
+
+        Args:
+            filename: ファイルのパス
+            encoding: ファイルのエンコーディング
+            chunk_size: 1度に読み込む文字数。未指定の場合はCHUNK_SIZE
+
+        Yields:
+            str: 読み込んだテキスト
+        """
+        async with aiofiles.open(filename, "r", encoding=encoding, errors='ignore') as f:
+            while chunk := await f.read(chunk_size or cls.CHUNK_SIZE):
+                yield chunk
+
+    @classmethod
+    def iter_text(cls, filename, encoding, chunk_size: int | None = None) -> Iterator[str]:
+        """マークアップ以外のtext/*のファイルをチャンク単位で読み込む。iter_text_asyncの同期版
+
+        Args:
+            filename: ファイルのパス
+            encoding: ファイルのエンコーディング
+            chunk_size: 1度に読み込む文字数。未指定の場合はCHUNK_SIZE
+
+        Yields:
+            str: 読み込んだテキスト
+        """
+        with open(filename, "r", encoding=encoding, errors='ignore') as f:
+            while chunk := f.read(chunk_size or cls.CHUNK_SIZE):
+                yield chunk
+
+    # text/*のバイト列を文字列として返す関数
+    @classmethod
+    def process_text(cls, data: bytes, mime_type, encoding):
+        if mime_type == "text/html":
+            # text/htmlの場合
+            from bs4 import BeautifulSoup
+            return BeautifulSoup(data, "html.parser").get_text()
+
+        if mime_type == "text/xml":
+            # text/xmlの場合
+            from bs4 import BeautifulSoup
+            return BeautifulSoup(data, features="xml").get_text()
+
+        text_data = data.decode(encoding or "utf-8", errors='ignore')
+        if mime_type == "text/markdown":
+            # markdownの場合
+            from bs4 import BeautifulSoup
+            from markdown import markdown # type: ignore
+            return BeautifulSoup(markdown(text_data), "html.parser").get_text()
+
+        # その他のtext/*の場合
+        return text_data
@@ -1,17 +1,27 @@
-import docx
 from io import StringIO
 
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.util.ooxml_util import OOXMLUtil
+
 class WordUtil:
     @classmethod
-    def extract_text_from_docx(cls, filename):
+    def extract_text_from_docx(cls, filename, engine: str | None = None):
         """
         指定された.docxファイルからテキストを抽出します。
 
         Args:
-            filename (str): .docxファイルのパス
+            filename (str | IO[bytes]): .docxファイルのパスまたはファイルオブジェクト
+            engine (str | None): 抽出エンジン。"python-docx" または "ooxml"。
+                Noneの場合は設定(WORD_EXTRACTOR)に従う
         Returns:
             str: 抽出されたテキスト
         """
+        engine = engine or FileUtilConfig.get_instance().word_extractor
+        if engine == "ooxml":
+            return OOXMLUtil.extract_text_from_docx(filename)
+
+        import docx
+
         # 出力用のストリームを作成
         output = StringIO()
         doc = docx.Document(filename)
@@ -19,4 +29,4 @@ class WordUtil:
             output.write(para.text)
             output.write("\n")
             
-        return output.getvalue()
\ No newline at end of file
+        return output.getvalue()
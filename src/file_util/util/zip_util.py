@@ -1,10 +1,63 @@
+import contextlib
+import fnmatch
+import io
 import locale, os
-import pyzipper as zipfile
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, Iterator
+
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.model import FileUtilZipListing, FileUtilZipMemberInfo
+from file_util.util.metrics_util import MetricsUtil
+from file_util.util.storage_util import StorageUtil
+import file_util.log.log_settings as log_settings
+
+# pyzipperはインポートに時間がかかるため、ZIPファイルを扱うメソッドの中でインポートする
+if TYPE_CHECKING:
+    import pyzipper as zipfile
+
+logger = log_settings.getLogger(__name__)
+
+
+class ZipIndex:
+    """ZIPファイルのセントラルディレクトリから作成したメンバーの索引"""
+
+    def __init__(self, members: list[FileUtilZipMemberInfo], orig_filenames: list[str]):
+        self.members = members
+        # ZipFileでの読み込みに使用する、デコード前のファイル名
+        self.orig_filenames = orig_filenames
+        self.__positions = {member.name: i for i, member in enumerate(members)}
+
+    def get_position(self, name: str) -> int | None:
+        """メンバー名からアーカイブ内の位置を取得する。存在しない場合はNone"""
+        return self.__positions.get(name)
+
 
 class ZipUtil:
 
+    # 大きなメンバーを読み書きする際のチャンクサイズ
+    CHUNK_SIZE = 1024 * 1024
+    # 圧縮済みデータをメモリ上に保持する上限。超えた場合は一時ファイルに書き出す
+    SPOOL_MAX_SIZE = 8 * 1024 * 1024
+    # 圧縮済みのメンバーを書き出す際に更新するZipFileの内部状態(pyzipper 0.4で確認)。
+    # pyzipperはzipfileモジュールを同梱しているため、Pythonのバージョンには依存しない
+    ZIPFILE_INTERNALS = ("fp", "start_dir", "_writecheck", "_didModify", "filelist", "NameToInfo")
+    # ローカルファイルヘッダーの固定長部分
+    LOCAL_HEADER_FORMAT = "<4s2B4HL2L2H"
+    LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+
+    # (パス) -> ((サイズ, 更新日時), 索引) のLRUキャッシュ
+    __index_cache: "OrderedDict[str, tuple[tuple[int, int], ZipIndex]]" = OrderedDict()
+    __index_cache_lock = threading.Lock()
+    __index_cache_hits = 0
+    __index_cache_misses = 0
+
     @classmethod
-    def __check_utf8_flag(cls, zip_ref: zipfile.ZipFile):
+    def __check_utf8_flag(cls, zip_ref: "zipfile.ZipFile"):
         # 1つでもUTF-8フラグが立っていればTrueを返す
         for info in zip_ref.infolist():
             if bool(info.flag_bits & 0x800):
@@ -12,21 +65,97 @@ class ZipUtil:
         return False
 
     @classmethod
-    def extract_zip(cls, file_path, extract_to, password=None) -> bool:
-        with zipfile.ZipFile(file_path, 'r') as zip_ref:
-            system_encoding = cls.__get_system_encoding()
-            is_utf = cls.__check_utf8_flag(zip_ref)
+    def extract_zip(cls, file_path, extract_to, password=None, max_workers: int | None = None) -> bool:
+        """ZIPファイルを展開する
+
+        max_workersが2以上の場合は、メンバーをワーカースレッドに振り分けて並列に展開します。
+        各スレッドは個別にZIPファイルを開き、メンバーをチャンク単位で読み書きします。
+
+        Args:
+            file_path: ZIPファイルのパス
+            extract_to: 展開先のディレクトリ
+            password: ZIPファイルのパスワード
+            max_workers: ワーカースレッド数。Noneの場合は設定(ZIP_WORKERS)の値
+
+        Returns:
+            bool: 展開に成功した場合はTrue
+        """
+        if max_workers is None:
+            max_workers = FileUtilConfig.get_instance().zip_workers
+        with MetricsUtil.span("zip_extract", "zip") as span:
+            with cls.__open_zip(file_path) as zip_ref:
+                members = [(index, cls.__get_target_path(extract_to, name), info.is_dir(), info.file_size)
+                           for index, (name, info) in enumerate(cls.__iter_decoded_members(zip_ref))]
+            span.add_bytes(sum(member[3] for member in members))
+
+            # ディレクトリはスレッド間で競合しないよう先に作成する
+            for _, target_path, is_dir, _ in members:
+                os.makedirs(target_path if is_dir else os.path.dirname(target_path), exist_ok=True)
+            # 展開サイズがスレッド間で偏らないよう、サイズの大きい順に振り分ける
+            members.sort(key=lambda member: member[3], reverse=True)
+            files = [(index, target_path) for index, target_path, is_dir, _ in members if not is_dir]
+            if not files:
+                return True
+
+            max_workers = max(1, min(max_workers, len(files)))
+            if max_workers == 1:
+                cls.__extract_members(file_path, password, files)
+                return True
+
+            buckets = [files[i::max_workers] for i in range(max_workers)]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(cls.__extract_members, file_path, password, bucket) for bucket in buckets]
+                for future in futures:
+                    future.result()
+            return True
+
+    @classmethod
+    def __extract_members(cls, file_path, password, members: list[tuple[int, str]]) -> None:
+        # 指定したインデックスのメンバーを展開先のパスへチャンク単位で書き出す
+        with cls.__open_zip(file_path) as zip_ref:
             if password:
                 zip_ref.setpassword(password.encode())
-            for info in zip_ref.infolist():
-                name = info.filename
-                if not is_utf:
-                    name = name.encode('cp437').decode(system_encoding, errors='replace')
-                info.filename = name
-                zip_ref.extract(info, path=extract_to)
+            infos = [info for _, info in cls.__iter_decoded_members(zip_ref)]
+            for index, target_path in members:
+                with zip_ref.open(infos[index]) as source, open(target_path, "wb") as target:
+                    while chunk := source.read(cls.CHUNK_SIZE):
+                        target.write(chunk)
 
-        return True
+    @classmethod
+    @contextlib.contextmanager
+    def __open_zip(cls, source: str | bytes) -> Iterator["zipfile.ZipFile"]:
+        import pyzipper as zipfile
+        # ZIPファイルを読み込み用に開く。sourceはファイルパス、smb://, mem:// 形式のパスまたはバイト列。
+        # AESZipFileは暗号化なし・ZipCrypto・AESのいずれのメンバーも読み込める
+        if isinstance(source, bytes):
+            with zipfile.AESZipFile(io.BytesIO(source), 'r') as zip_ref:
+                yield zip_ref
+        else:
+            # ストレージ経由で開き、セントラルディレクトリと必要なメンバーのみをシークして読み込む
+            with StorageUtil.open(source) as f, zipfile.AESZipFile(f, 'r') as zip_ref:
+                yield zip_ref
 
+    @classmethod
+    def __iter_decoded_members(cls, zip_ref: "zipfile.ZipFile"):
+        # UTF-8フラグがない場合はcp437として格納されたファイル名をシステムのエンコーディングで解釈し直す
+        system_encoding = cls.__get_system_encoding()
+        is_utf = cls.__check_utf8_flag(zip_ref)
+        for info in zip_ref.infolist():
+            name = info.filename
+            if not is_utf:
+                name = name.encode('cp437').decode(system_encoding, errors='replace')
+            info.filename = name
+            yield name, info
+
+    @classmethod
+    def __get_target_path(cls, extract_to: str, name: str) -> str:
+        # ZipFile.extract と同様に、ドライブ名や "..", "." を除いて展開先からはみ出さないパスにする
+        arcname = name.replace('/', os.path.sep)
+        if os.path.altsep:
+            arcname = arcname.replace(os.path.altsep, os.path.sep)
+        arcname = os.path.splitdrive(arcname)[1]
+        arcname = os.path.sep.join(x for x in arcname.split(os.path.sep) if x not in ('', os.path.curdir, os.path.pardir))
+        return os.path.normpath(os.path.join(extract_to, arcname))
 
     @classmethod
     def __get_system_encoding(cls):
@@ -34,30 +163,425 @@ class ZipUtil:
 
     @classmethod
     def list_zip_contents(cls, file_path) -> list[str]:
-        result = []
-        with zipfile.ZipFile(file_path, 'r') as zip_ref:
-            is_utf = cls.__check_utf8_flag(zip_ref)
-            system_encoding = cls.__get_system_encoding()
-            for info in zip_ref.infolist():
-                name = info.filename
-                if not is_utf:
-                    name = name.encode('cp437').decode(system_encoding, errors='replace')
-                result.append(name)
-        return result
-
-    @classmethod
-    def create_zip(cls, file_paths: list[str], output_zip: str, password=None) -> bool:
-        with zipfile.ZipFile(output_zip, 'w') as zip_ref:
+        # 変更されていないZIPファイルはキャッシュした索引から返す
+        return [member.name for member in cls.get_zip_index(file_path).members]
+
+    @classmethod
+    def is_archive(cls, data: bytes) -> bool:
+        """バイト列がOffice文書ではないZIPファイルかどうかを判定する
+
+        docx, xlsx, pptx もZIP形式のため、[Content_Types].xml を含むものは除きます。
+        無圧縮のZIPファイルは格納されたファイルの内容から別の形式と判定されることがあるため、
+        MIMEタイプではなくZIPファイルの構造で判定します。
+
+        Args:
+            data: 判定するデータ
+
+        Returns:
+            bool: Office文書ではないZIPファイルの場合はTrue
+        """
+        if not data.startswith(b"PK\x03\x04"):
+            return False
+        import pyzipper as zipfile
+        try:
+            with zipfile.ZipFile(io.BytesIO(data), 'r') as zip_ref:
+                return "[Content_Types].xml" not in zip_ref.NameToInfo
+        except zipfile.BadZipFile:
+            return False
+
+    @classmethod
+    def iter_member_data(
+        cls, source: str | bytes, password: str | None = None, max_member_bytes: int | None = None
+        ) -> Iterator[tuple[str, bytes | None, str | None]]:
+        """ZIPファイルのメンバーをディスクに展開せず、1つずつメモリ上に読み込んで返す
+
+        ファイル名はextract_zipと同様にUTF-8フラグがない場合はシステムのエンコーディングで解釈します。
+        ディレクトリのエントリは返しません。読み込めないメンバーはエラーメッセージとともに返し、
+        残りのメンバーの処理を継続します。
+
+        Args:
+            source: ZIPファイルのパスまたはZIPファイルのバイト列
+            password: ZIPファイルのパスワード
+            max_member_bytes: 読み込むメンバーの最大サイズ。超えるメンバーはエラーとする
+
+        Yields:
+            tuple[str, bytes | None, str | None]: メンバー名、データ、エラーメッセージ
+        """
+        with cls.__open_zip(source) as zip_ref:
             if password:
                 zip_ref.setpassword(password.encode())
-            for file_path in file_paths:
-                # ファイルかディレクトリかを確認
-                if os.path.isdir(file_path):
-                    for root, _, files in os.walk(file_path):
-                        for file in files:
-                            full_path = os.path.join(root, file)
-                            arcname = os.path.relpath(full_path, start=os.path.dirname(file_path))
-                            zip_ref.write(full_path, arcname=arcname)
-                else:
-                    zip_ref.write(file_path, arcname=os.path.basename(file_path))
+            for name, info in list(cls.__iter_decoded_members(zip_ref)):
+                if info.is_dir():
+                    continue
+                if max_member_bytes is not None and info.file_size > max_member_bytes:
+                    yield name, None, f"Member size {info.file_size} exceeds the limit of {max_member_bytes} bytes"
+                    continue
+                try:
+                    data = bytearray()
+                    with MetricsUtil.span("zip_member", "zip") as span, zip_ref.open(info) as f:
+                        while chunk := f.read(cls.CHUNK_SIZE):
+                            data += chunk
+                        span.add_bytes(len(data))
+                except Exception as e:
+                    yield name, None, f"{type(e).__name__}: {e}"
+                    continue
+                yield name, bytes(data), None
+
+    @classmethod
+    def get_zip_index(cls, file_path: str) -> ZipIndex:
+        """ZIPファイルの索引を取得する
+
+        索引は(パス, サイズ, 更新日時)をキーとしてメモリ上にキャッシュし、ファイルが
+        変更されていない場合はセントラルディレクトリの読み込みとファイル名のデコードを省略します。
+        キャッシュする索引の数はZIP_INDEX_CACHE_SIZEで指定します。
+
+        Args:
+            file_path: ZIPファイルのパス
+
+        Returns:
+            ZipIndex: メンバーの索引
+        """
+        path = file_path if StorageUtil.is_remote(file_path) else os.path.abspath(file_path)
+        st = StorageUtil.stat(path)
+        key = (st.st_size, st.st_mtime_ns)
+        with cls.__index_cache_lock:
+            cached = cls.__index_cache.get(path)
+            if cached is not None and cached[0] == key:
+                cls.__index_cache.move_to_end(path)
+                cls.__index_cache_hits += 1
+                return cached[1]
+            cls.__index_cache_misses += 1
+
+        with MetricsUtil.span("zip_index", "zip") as span:
+            index = cls.__build_zip_index(path)
+            span.add_bytes(st.st_size)
+        max_entries = FileUtilConfig.get_instance().zip_index_cache_size
+        with cls.__index_cache_lock:
+            cls.__index_cache[path] = (key, index)
+            cls.__index_cache.move_to_end(path)
+            while len(cls.__index_cache) > max_entries:
+                cls.__index_cache.popitem(last=False)
+        return index
+
+    @classmethod
+    def __build_zip_index(cls, file_path: str) -> ZipIndex:
+        members = []
+        orig_filenames = []
+        with cls.__open_zip(file_path) as zip_ref:
+            for name, info in cls.__iter_decoded_members(zip_ref):
+                members.append(FileUtilZipMemberInfo(
+                    name=name, file_size=info.file_size, compress_size=info.compress_size, crc=info.CRC,
+                    header_offset=info.header_offset, compress_type=info.compress_type,
+                    is_dir=info.is_dir(), encrypted=bool(info.flag_bits & 0x1),
+                ))
+                orig_filenames.append(info.orig_filename)
+        logger.debug(f"Indexed {len(members)} members of {file_path}")
+        return ZipIndex(members, orig_filenames)
+
+    @classmethod
+    def get_index_cache_stats(cls) -> dict:
+        """ZIPファイルの索引キャッシュの統計情報を返す
+
+        Returns:
+            dict: ヒット数、ミス数、キャッシュしている索引の数
+        """
+        with cls.__index_cache_lock:
+            return {
+                "hits": cls.__index_cache_hits,
+                "misses": cls.__index_cache_misses,
+                "entries": len(cls.__index_cache),
+            }
+
+    @classmethod
+    def list_zip_members(
+        cls, file_path: str, offset: int = 0, limit: int | None = None, pattern: str | None = None
+        ) -> FileUtilZipListing:
+        """ZIPファイルのメンバーの情報を索引からページ単位で取得する
+
+        Args:
+            file_path: ZIPファイルのパス
+            offset: 取得する最初のメンバーの位置(パターンで絞り込んだ後の位置)
+            limit: 取得するメンバーの最大数。Noneの場合はすべて
+            pattern: メンバー名を絞り込むglobパターン(例: "docs/*.pdf")
+
+        Returns:
+            FileUtilZipListing: 該当するメンバーの総数と指定範囲のメンバーの情報
+        """
+        members = cls.get_zip_index(file_path).members
+        if pattern:
+            members = [member for member in members if fnmatch.fnmatch(member.name, pattern)]
+        offset = max(0, offset)
+        end = None if limit is None else offset + max(0, limit)
+        return FileUtilZipListing(total=len(members), offset=offset, members=members[offset:end])
+
+    @classmethod
+    def read_zip_member(cls, file_path: str, name: str, password: str | None = None) -> bytes:
+        """ZIPファイルの1つのメンバーを索引のオフセットから直接読み込む
+
+        Args:
+            file_path: ZIPファイルのパス
+            name: メンバー名(list_zip_contentsが返す名前)
+            password: ZIPファイルのパスワード
+
+        Returns:
+            bytes: メンバーのデータ
+        """
+        with MetricsUtil.span("zip_read", "zip") as span:
+            data = b"".join(cls.__iter_member_chunks(file_path, name, password))
+            span.add_bytes(len(data))
+        return data
+
+    @classmethod
+    def extract_zip_member(cls, file_path: str, name: str, extract_to: str, password: str | None = None) -> str:
+        """ZIPファイルの1つのメンバーを索引のオフセットから直接展開する
+
+        Args:
+            file_path: ZIPファイルのパス
+            name: メンバー名(list_zip_contentsが返す名前)
+            extract_to: 展開先のディレクトリ
+            password: ZIPファイルのパスワード
+
+        Returns:
+            str: 展開したファイルのパス
+        """
+        target_path = cls.__get_target_path(extract_to, name)
+        if name.endswith("/"):
+            os.makedirs(target_path, exist_ok=True)
+            return target_path
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with MetricsUtil.span("zip_read", "zip") as span, open(target_path, "wb") as target:
+            for chunk in cls.__iter_member_chunks(file_path, name, password):
+                target.write(chunk)
+                span.add_bytes(len(chunk))
+        return target_path
+
+    @classmethod
+    def __iter_member_chunks(cls, file_path: str, name: str, password: str | None) -> Iterator[bytes]:
+        # 索引のオフセットからローカルファイルヘッダーを読み、データをチャンク単位で展開する。
+        # 暗号化されたメンバーやDeflate以外の圧縮形式はZipFileで読み込む
+        import pyzipper as zipfile
+        index = cls.get_zip_index(file_path)
+        position = index.get_position(name)
+        if position is None:
+            raise KeyError(f"There is no item named {name!r} in the archive")
+        member = index.members[position]
+        if member.encrypted or member.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            yield from cls.__iter_member_chunks_with_zipfile(file_path, index.orig_filenames[position], password)
+            return
+
+        with StorageUtil.open(file_path) as f:
+            f.seek(member.header_offset)
+            header = struct.unpack(cls.LOCAL_HEADER_FORMAT, f.read(cls.LOCAL_HEADER_SIZE))
+            if header[0] != b"PK\x03\x04":
+                raise zipfile.BadZipFile(f"Bad magic number for file header: {name!r}")
+            # ファイル名と拡張フィールドの長さ分を読み飛ばす
+            f.seek(header[-2] + header[-1], os.SEEK_CUR)
+
+            decompressor = zlib.decompressobj(-15) if member.compress_type == zipfile.ZIP_DEFLATED else None
+            remaining = member.compress_size
+            crc = 0
+            while remaining > 0:
+                chunk = f.read(min(cls.CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise EOFError(f"Unexpected end of data: {name!r}")
+                remaining -= len(chunk)
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                crc = zlib.crc32(chunk, crc)
+                yield chunk
+            if decompressor is not None:
+                chunk = decompressor.flush()
+                crc = zlib.crc32(chunk, crc)
+                yield chunk
+            if crc != member.crc:
+                raise zipfile.BadZipFile(f"Bad CRC-32 for file {name!r}")
+
+    @classmethod
+    def __iter_member_chunks_with_zipfile(cls, file_path: str, orig_filename: str, password: str | None) -> Iterator[bytes]:
+        with cls.__open_zip(file_path) as zip_ref:
+            if password:
+                zip_ref.setpassword(password.encode())
+            with zip_ref.open(orig_filename) as source:
+                while chunk := source.read(cls.CHUNK_SIZE):
+                    yield chunk
+
+    @classmethod
+    def create_zip(
+        cls, file_paths: list[str], output_zip: str, password=None,
+        max_workers: int | None = None, compression_level: int | None = None, store_only: bool = False
+        ) -> bool:
+        """ZIPファイルを作成する
+
+        メンバーの圧縮はワーカースレッドで並列に行い、圧縮済みのデータを
+        file_pathsの順(ディレクトリの場合はos.walkの順)にZIPファイルへ書き出します。
+        ファイルはチャンク単位で読み込むため、大きなファイルでもメモリ使用量は一定です。
+
+        Args:
+            file_paths: ZIPに含めるファイルまたはディレクトリのパス
+            output_zip: 作成するZIPファイルのパス
+            password: ZIPファイルのパスワード。指定した場合はAESで暗号化し、1スレッドで作成する
+            max_workers: ワーカースレッド数。Noneの場合は設定(ZIP_WORKERS)の値
+            compression_level: Deflateの圧縮レベル(0-9)。Noneの場合は設定(ZIP_COMPRESSION_LEVEL)の値
+            store_only: Trueの場合は圧縮せずに格納する
+
+        Returns:
+            bool: 作成に成功した場合はTrue
+        """
+        config = FileUtilConfig.get_instance()
+        if max_workers is None:
+            max_workers = config.zip_workers
+        if compression_level is None:
+            compression_level = config.zip_compression_level
+        # 圧縮レベルが未設定(None)の場合は従来どおり圧縮せずに格納する
+        if store_only:
+            compression_level = None
+        members = list(cls.__iter_members(file_paths))
+
+        with MetricsUtil.span("zip_create", "zip") as span:
+            if MetricsUtil.is_enabled():
+                span.add_bytes(sum(os.path.getsize(full_path) for full_path, _ in members))
+            return cls.__create_zip(members, output_zip, password, max_workers, compression_level, config)
+
+    @classmethod
+    def __create_zip(
+        cls, members: list[tuple[str, str]], output_zip: str, password, max_workers: int,
+        compression_level: int | None, config: FileUtilConfig
+        ) -> bool:
+        # メンバーを圧縮してZIPファイルへ書き出す
+        import pyzipper as zipfile
+        if password:
+            # pyzipperで書き込めるのはAESで暗号化したメンバーのみ
+            with zipfile.AESZipFile(output_zip, 'w', encryption=zipfile.WZ_AES) as zip_ref:
+                zip_ref.setpassword(password.encode())
+                for full_path, arcname in members:
+                    cls.__write_member(zip_ref, full_path, arcname, compression_level, config.zip_store_extensions)
+            return True
+
+        written: list["zipfile.ZipInfo"] = []
+        with zipfile.ZipFile(output_zip, 'w') as zip_ref:
+            if not cls.__can_write_compressed(zip_ref):
+                # 内部状態を持たないバージョンの場合は、並列に圧縮せずZipFile.writeで書き出す
+                logger.warning("ZipFile internals are not available. Members are compressed sequentially")
+                for full_path, arcname in members:
+                    cls.__write_member(zip_ref, full_path, arcname, compression_level, config.zip_store_extensions)
+                return True
+            if max_workers <= 1:
+                for full_path, arcname in members:
+                    written.append(cls.__write_compressed_member(
+                        zip_ref, cls.__compress_member(full_path, arcname, compression_level, config.zip_store_extensions)))
+            else:
+                # 圧縮済みデータを保持する数を制限し、書き出しは投入した順に行う
+                pending: deque[Future] = deque()
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for full_path, arcname in members:
+                        pending.append(executor.submit(
+                            cls.__compress_member, full_path, arcname, compression_level, config.zip_store_extensions))
+                        if len(pending) >= max_workers * 2:
+                            written.append(cls.__write_compressed_member(zip_ref, pending.popleft().result()))
+                    while pending:
+                        written.append(cls.__write_compressed_member(zip_ref, pending.popleft().result()))
+        cls.__verify_central_directory(output_zip, written)
         return True
+
+    @classmethod
+    def __verify_central_directory(cls, output_zip: str, written: list["zipfile.ZipInfo"]) -> None:
+        # 内部状態を更新して書き出したため、作成したZIPファイルを公開APIで開き直し、
+        # セントラルディレクトリとローカルファイルヘッダーが書き出したメンバーと一致することを確認する
+        import pyzipper as zipfile
+        expected = [(z.filename, z.CRC, z.file_size, z.compress_size, z.header_offset) for z in written]
+        with zipfile.ZipFile(output_zip) as zip_ref:
+            infos = zip_ref.infolist()
+        actual = [(z.filename, z.CRC, z.file_size, z.compress_size, z.header_offset) for z in infos]
+        if actual != expected:
+            raise zipfile.BadZipFile(f"The central directory of {output_zip} does not match the written members")
+        with open(output_zip, "rb") as f:
+            for zinfo in infos:
+                f.seek(zinfo.header_offset)
+                header = struct.unpack(cls.LOCAL_HEADER_FORMAT, f.read(cls.LOCAL_HEADER_SIZE))
+                # 署名とCRC-32(ヘッダーの8番目の値)を確認する
+                if header[0] != b"PK\x03\x04" or header[7] != zinfo.CRC:
+                    raise zipfile.BadZipFile(f"Bad local file header of {zinfo.filename} in {output_zip}")
+
+    @classmethod
+    def __iter_members(cls, file_paths: list[str]):
+        # ZIPに含めるファイルのパスと格納名を順に返す
+        for file_path in file_paths:
+            # ファイルかディレクトリかを確認
+            if os.path.isdir(file_path):
+                for root, _, files in os.walk(file_path):
+                    for file in files:
+                        full_path = os.path.join(root, file)
+                        arcname = os.path.relpath(full_path, start=os.path.dirname(file_path))
+                        yield full_path, arcname
+            else:
+                yield file_path, os.path.basename(file_path)
+
+    @classmethod
+    def __compress_member(
+        cls, full_path: str, arcname: str, compression_level: int | None, store_extensions: list[str]
+        ) -> tuple["zipfile.ZipInfo", IO[bytes]]:
+        # ファイルをチャンク単位で読み込んで圧縮し、ヘッダー情報と圧縮済みデータを返す
+        import pyzipper as zipfile
+        zinfo = zipfile.ZipInfo.from_file(full_path, arcname)
+        # 画像やZIPなど圧縮済みの形式は再圧縮しても小さくならないため格納のみとする
+        if compression_level is None or os.path.splitext(full_path)[1].lower() in store_extensions:
+            zinfo.compress_type = zipfile.ZIP_STORED
+            compressor = None
+        else:
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -15)
+
+        data = tempfile.SpooledTemporaryFile(max_size=cls.SPOOL_MAX_SIZE)
+        crc = 0
+        file_size = 0
+        with open(full_path, "rb") as f:
+            while chunk := f.read(cls.CHUNK_SIZE):
+                crc = zlib.crc32(chunk, crc)
+                file_size += len(chunk)
+                data.write(compressor.compress(chunk) if compressor else chunk)
+        if compressor:
+            data.write(compressor.flush())
+        zinfo.CRC = crc
+        zinfo.file_size = file_size
+        zinfo.compress_size = data.tell()
+        data.seek(0)
+        return zinfo, data
+
+    @classmethod
+    def __can_write_compressed(cls, zip_ref: "zipfile.ZipFile") -> bool:
+        # __write_compressed_memberが更新するZipFileの内部状態があるかどうか
+        return all(hasattr(zip_ref, name) for name in cls.ZIPFILE_INTERNALS)
+
+    @classmethod
+    def __write_member(
+        cls, zip_ref: "zipfile.ZipFile", full_path: str, arcname: str, compression_level: int | None,
+        store_extensions: list[str]
+        ) -> None:
+        # ZipFileの公開APIでメンバーを圧縮して書き出す
+        import pyzipper as zipfile
+        if compression_level is None or os.path.splitext(full_path)[1].lower() in store_extensions:
+            zip_ref.write(full_path, arcname=arcname, compress_type=zipfile.ZIP_STORED)
+        else:
+            zip_ref.write(full_path, arcname=arcname, compress_type=zipfile.ZIP_DEFLATED, compresslevel=compression_level)
+
+    @classmethod
+    def __write_compressed_member(
+        cls, zip_ref: "zipfile.ZipFile", member: tuple["zipfile.ZipInfo", IO[bytes]]
+        ) -> "zipfile.ZipInfo":
+        # 圧縮済みのデータをローカルファイルヘッダーとともに書き出し、セントラルディレクトリに登録する。
+        # ZipFile.write は圧縮処理を含むため、ZipFile.close が参照する内部状態をここで更新する
+        zinfo, data = member
+        with data:
+            if not zinfo.external_attr:
+                zinfo.external_attr = 0o600 << 16
+            zip_ref.fp.seek(zip_ref.start_dir)
+            zinfo.header_offset = zip_ref.fp.tell()
+            zip_ref._writecheck(zinfo)
+            zip_ref._didModify = True
+            zip_ref.fp.write(zinfo.FileHeader(None))
+            while chunk := data.read(cls.CHUNK_SIZE):
+                zip_ref.fp.write(chunk)
+            zip_ref.start_dir = zip_ref.fp.tell()
+            zip_ref.filelist.append(zinfo)
+            zip_ref.NameToInfo[zinfo.filename] = zinfo
+        return zinfo
@@ -0,0 +1,12 @@
+import pytest
+
+from file_util.config.file_util_config import FileUtilConfig
+
+
+@pytest.fixture
+def config(monkeypatch):
+    """共有の設定を返す。monkeypatch.setattrで変更した値はテストの終了時に元に戻る"""
+    instance = FileUtilConfig.get_instance()
+    monkeypatch.setattr(instance, "extraction_cache_dir", "")
+    monkeypatch.setattr(instance, "metrics_enabled", False)
+    return instance
@@ -0,0 +1,105 @@
+import io
+import threading
+import time
+from typing import IO
+
+from file_util.util.storage_util import MemoryStorageEntry, MemoryStorageStat
+
+
+class InMemorySMBClient:
+    """SMBStorageのテスト・ベンチマーク用に、smbclientの代わりに使用するプロセス内のSMBサーバー
+
+    UNCパス(\\\\server\\share\\path)ごとにデータをメモリ上に保持し、smbclientと同じ関数
+    (register_session, open_file, scandir, stat)を提供します。smbclientと同様に、セッションは
+    connection_cacheにサーバーごとに保持し、未登録のサーバーへの要求では既定の認証情報で登録します。
+    登録したセッション数と要求数をget_statsで確認できるため、セッションの再利用を検証できます。
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: 要求(open_file, stat, scandir)ごとに待つ秒数。ネットワークの往復時間の代わり
+        """
+        self.__latency = latency
+        self.__files: dict[str, tuple[bytes, int]] = {}
+        self.__lock = threading.Lock()
+        self.__sessions = 0
+        self.__requests = 0
+
+    def put(self, unc_path: str, data: bytes) -> None:
+        """UNCパスにデータを登録する"""
+        with self.__lock:
+            self.__files[self.__normalize(unc_path)] = (data, time.time_ns())
+
+    def register_session(
+        self, server: str, username: str | None = None, password: str | None = None,
+        connection_cache: dict | None = None, **kwargs
+        ) -> None:
+        """サーバーのセッションを登録する。connection_cacheに登録済みの場合は再利用する"""
+        cache = connection_cache if connection_cache is not None else {}
+        with self.__lock:
+            if server.lower() not in cache:
+                cache[server.lower()] = object()
+                self.__sessions += 1
+
+    def open_file(self, path: str, mode: str = "r", connection_cache: dict | None = None, **kwargs) -> IO[bytes]:
+        """ファイルを読み込み用に開く"""
+        if mode not in ("r", "rb"):
+            raise ValueError("InMemorySMBClient is read-only. Use put() to add data")
+        data, _ = self.__get(self.__request(path, connection_cache))
+        return io.BytesIO(data)
+
+    def stat(self, path: str, connection_cache: dict | None = None, **kwargs) -> MemoryStorageStat:
+        """ファイルまたはディレクトリのサイズと更新日時を取得する"""
+        key = self.__request(path, connection_cache)
+        with self.__lock:
+            item = self.__files.get(key)
+            is_dir = item is None and any(p.startswith(key + "\\") for p in self.__files)
+        if is_dir:
+            return MemoryStorageStat(0, 0, is_dir=True)
+        data, mtime_ns = self.__get(key)
+        return MemoryStorageStat(len(data), mtime_ns)
+
+    def scandir(self, path: str, connection_cache: dict | None = None, **kwargs) -> list[MemoryStorageEntry]:
+        """ディレクトリのエントリを取得する"""
+        prefix = self.__request(path, connection_cache) + "\\"
+        entries: dict[str, MemoryStorageEntry] = {}
+        with self.__lock:
+            for file_path, (data, mtime_ns) in self.__files.items():
+                if not file_path.startswith(prefix):
+                    continue
+                name, sep, _ = file_path[len(prefix):].partition("\\")
+                if name in entries:
+                    continue
+                if sep:
+                    entries[name] = MemoryStorageEntry(name, prefix + name, MemoryStorageStat(0, 0, is_dir=True), True)
+                else:
+                    entries[name] = MemoryStorageEntry(name, file_path, MemoryStorageStat(len(data), mtime_ns), False)
+        if not entries:
+            raise FileNotFoundError(path)
+        return list(entries.values())
+
+    def get_stats(self) -> dict:
+        """登録したセッション数と要求数を返す"""
+        with self.__lock:
+            return {"sessions": self.__sessions, "requests": self.__requests}
+
+    def __request(self, path: str, connection_cache: dict | None) -> str:
+        # smbclientと同様に、セッションが未登録のサーバーへの要求では既定の認証情報でセッションを登録する
+        key = self.__normalize(path)
+        self.register_session(key.lstrip("\\").split("\\")[0], connection_cache=connection_cache)
+        with self.__lock:
+            self.__requests += 1
+        if self.__latency > 0:
+            time.sleep(self.__latency)
+        return key
+
+    def __get(self, key: str) -> tuple[bytes, int]:
+        with self.__lock:
+            item = self.__files.get(key)
+        if item is None:
+            raise FileNotFoundError(key)
+        return item
+
+    def __normalize(self, path: str) -> str:
+        return path.replace("/", "\\").rstrip("\\")
@@ -0,0 +1,33 @@
+import asyncio
+import base64
+import io
+
+import docx
+
+from file_util.core import app
+
+
+def test_binary_resource_with_line_breaks(config, monkeypatch):
+    monkeypatch.setattr(app, "BASE64_DECODE_CHUNK_CHARS", 10)
+    text = "バイナリリソースのテキスト\n" * 20
+    encoded = base64.encodebytes(text.encode("utf-8")).decode("ascii")
+    # 76文字ごとの改行に加えて、4の倍数でない位置に空白を入れる
+    blob = " " + encoded[:7] + "\r\n " + encoded[7:]
+    result = asyncio.run(app.extract_binary_resource_to_text(blob, "txt"))
+    assert result.text.strip() == text.strip()
+    assert result.size == len(text.encode("utf-8"))
+
+
+def test_binary_resource_docx(config):
+    document = docx.Document()
+    document.add_paragraph("リソースの文書")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    blob = base64.encodebytes(buffer.getvalue()).decode("ascii")
+    result = asyncio.run(app.extract_binary_resource_to_text(blob, "docx"))
+    assert result.text.strip() == "リソースの文書"
+
+
+def test_base64_to_text(config):
+    blob = base64.b64encode("base64のテキスト".encode("utf-8")).decode("ascii")
+    assert asyncio.run(app.extract_base64_to_text("txt", blob)).strip() == "base64のテキスト"
@@ -0,0 +1,51 @@
+from file_util.util.cache_util import ExtractionCache, ExtractionCacheEntry
+
+
+def make_cache(tmp_path, max_bytes=1024 * 1024):
+    return ExtractionCache(str(tmp_path / "cache"), max_bytes)
+
+
+def test_put_and_get(tmp_path, config):
+    cache = make_cache(tmp_path)
+    cache.put("abc", ExtractionCacheEntry(text="本文", mime_type="text/plain", encoding="utf-8"))
+    entry = cache.get("abc")
+    assert entry is not None and entry.text == "本文" and entry.encoding == "utf-8"
+    assert cache.get("missing") is None
+    assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 1
+
+
+def test_key_includes_extractors_and_rules(tmp_path, config, monkeypatch):
+    cache = make_cache(tmp_path)
+    cache.put("abc", ExtractionCacheEntry(text="python-docx"))
+    for name, value in (("word_extractor", "ooxml"), ("ppt_extractor", "ooxml"),
+                        ("text_sanitize_rules", ["nfkc"]), ("classifier_trust", "magika")):
+        with monkeypatch.context() as m:
+            m.setattr(config, name, value)
+            assert cache.get("abc") is None, name
+            cache.put("abc", ExtractionCacheEntry(text=name))
+            assert cache.get("abc").text == name
+    assert cache.get("abc").text == "python-docx"
+
+
+def test_cache_persists_across_instances(tmp_path, config):
+    make_cache(tmp_path).put("abc", ExtractionCacheEntry(text="saved"))
+    assert make_cache(tmp_path).get("abc").text == "saved"
+
+
+def test_evicts_least_recently_used(tmp_path, config):
+    cache = make_cache(tmp_path, max_bytes=10)
+    cache.put("a", ExtractionCacheEntry(text="12345"))
+    cache.put("b", ExtractionCacheEntry(text="12345"))
+    cache.get("a")
+    cache.put("c", ExtractionCacheEntry(text="12345"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_file_hash_is_reused(tmp_path, config):
+    cache = make_cache(tmp_path)
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"content")
+    assert cache.get_content_hash(str(path)) == ExtractionCache.hash_bytes(b"content")
+    path.write_bytes(b"changed!")
+    assert cache.get_content_hash(str(path)) == ExtractionCache.hash_bytes(b"changed!")
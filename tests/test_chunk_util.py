@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from file_util.util.chunk_util import TextChunker
+from file_util.util.file_util import FileUtil
+
+TEXT = "".join(f"{i:03d} " + "あいうえお" * (i % 7) + "\n" for i in range(200))
+
+
+def chunk_all(chunker, pieces):
+    chunks = []
+    for text, location in pieces:
+        chunks += chunker.feed(text, location)
+    return chunks + chunker.finish()
+
+
+def test_chunks_cover_the_text_with_overlap():
+    chunks = chunk_all(TextChunker(100, 20), [(TEXT, None)])
+    assert all(0 < chunk.size <= 100 and chunk.size == len(chunk.text) for chunk in chunks)
+    assert all(TEXT[chunk.start_offset:chunk.end_offset] == chunk.text for chunk in chunks)
+    assert chunks[0].start_offset == 0 and chunks[-1].end_offset == len(TEXT)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert 0 <= previous.end_offset - chunk.start_offset <= 20
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+
+
+def test_sheets_and_rows():
+    rows = [(f"row{row}\n", {"sheet_name": sheet, "row": row}) for sheet in ("A", "B") for row in range(1, 30)]
+    chunks = chunk_all(TextChunker(50, 10), rows)
+    assert {chunk.sheet_name for chunk in chunks} == {"A", "B"}
+    first_b = next(chunk for chunk in chunks if chunk.sheet_name == "B")
+    assert first_b.start_row == 1 and first_b.text.startswith("row1\n")
+
+
+def test_state_keeps_offsets_and_restores_pending_text():
+    expected = chunk_all(TextChunker(100, 30), [(TEXT, None)])
+    chunker = TextChunker(100, 30)
+    split = 2000
+    chunks = chunker.feed(TEXT[:split])
+    state = chunker.get_state()
+    assert all(isinstance(length, int) for _, length, _ in state["pieces"])
+    assert "あ" not in str(state)
+
+    resumed = TextChunker(100, 30)
+    resumed.set_state(state)
+    start = state["pieces"][0][0]
+    resumed.restore(TEXT[start:start + 10], start)
+    resumed.restore(TEXT[start + 10:split], start + 10)
+    assert chunks + chunk_all(resumed, [(TEXT[split:], None)]) == expected
+
+
+@pytest.fixture
+def token_chunker(monkeypatch):
+    # エンコーディングのダウンロードを避けるため、バイト単位で連続する空白のみを結合するエンコーディングを使う
+    tiktoken = pytest.importorskip("tiktoken")
+    ranks = {bytes([i]): i for i in range(256)}
+    ranks[b"\n\n"] = 256
+    encoding = tiktoken.Encoding("test", pat_str=r"\s+|\S", mergeable_ranks=ranks, special_tokens={})
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    return encoding
+
+
+def test_tokens_are_counted_on_the_joined_chunk(token_chunker):
+    text = "ab\n\n" * 30
+    chunks = chunk_all(TextChunker(20, 5, unit=TextChunker.TOKENS), [(text, None)])
+    for chunk in chunks:
+        assert chunk.size == len(token_chunker.encode(chunk.text)) <= 20
+    # 行ごとの合計("ab\n"の3トークンと"\n"の1トークン)では5回分だが、連結した"ab\n\n"は3トークンのため6回分が収まる
+    assert chunks[0].text == "ab\n\n" * 6
+
+
+def test_tokens_require_tiktoken(monkeypatch):
+    import builtins
+    real_import = builtins.__import__
+
+    def block_tiktoken(name, *args, **kwargs):
+        if name == "tiktoken":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", block_tiktoken)
+    with pytest.raises(ValueError, match="file_util\\[tokens\\]"):
+        TextChunker(10, unit=TextChunker.TOKENS)
+
+
+@pytest.mark.parametrize("overlap", [0, 40])
+def test_paged_chunks_match_the_full_iteration(tmp_path, config, monkeypatch, overlap):
+    monkeypatch.setattr(FileUtil, "CHUNK_RESUME_INTERVAL", 64)
+    monkeypatch.setattr("file_util.util.text_util.TextUtil.CHUNK_SIZE", 500)
+    path = tmp_path / "a.txt"
+    path.write_text(TEXT, encoding="utf-8")
+
+    async def full():
+        return [chunk async for chunk in FileUtil.iter_chunks_from_file_async(str(path), 120, overlap)]
+
+    async def paged(limit):
+        chunks, cursor = [], None
+        while True:
+            page = await FileUtil.extract_chunks_from_file_async(str(path), 120, overlap, cursor=cursor, limit=limit)
+            chunks += page.chunks
+            if page.next_cursor is None:
+                return chunks
+            cursor = page.next_cursor
+
+    expected = asyncio.run(full())
+    assert len(expected) > 10
+    for limit in (1, 3, 7):
+        assert asyncio.run(paged(limit)) == expected
@@ -0,0 +1,57 @@
+import io
+
+import docx
+import pytest
+
+from file_util.model.classifier import DocumentClassifier
+
+PDF_HEAD = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n1 0 obj\n<< /Type /Catalog >>\nendobj\n"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def docx_bytes():
+    buffer = io.BytesIO()
+    docx.Document().save(buffer)
+    return buffer.getvalue()
+
+
+def classify(data, identifier):
+    return DocumentClassifier.classify(io.BytesIO(data), identifier)
+
+
+@pytest.mark.parametrize("name", ["notes.txt", "notes.md", "notes.csv"])
+def test_pdf_header_in_text_is_not_a_pdf(name, config):
+    data = "メモ\nPDFの先頭は %PDF-1.7 で始まります。\n".encode("utf-8")
+    mime_type, is_text = classify(data, name)
+    assert is_text and mime_type != "application/pdf"
+
+
+def test_pdf_signature(config):
+    assert classify(PDF_HEAD, "a.pdf") == ("application/pdf", False)
+    assert classify(PDF_HEAD, "no_extension") == ("application/pdf", False)
+    # 先頭にバイナリのデータがあるPDF
+    assert classify(b"\x00\x01\x02junk" + PDF_HEAD, "a.bin") == ("application/pdf", False)
+    # 拡張子がテキストでも先頭が%PDF-の場合はPDF
+    assert classify(PDF_HEAD, "a.txt") == ("application/pdf", False)
+
+
+def test_strict_trust_requires_matching_extension(config, monkeypatch):
+    monkeypatch.setattr(config, "classifier_trust", "strict")
+    data = docx_bytes()
+    assert classify(data, "a.docx") == (DOCX_MIME, False)
+    stats = DocumentClassifier.get_stats()["signature"]["count"]
+    classify(PDF_HEAD, "a.docx")
+    assert DocumentClassifier.get_stats()["signature"]["count"] == stats
+
+
+def test_office_signature_and_text_extension(config):
+    assert classify(docx_bytes(), "renamed.bin") == (DOCX_MIME, False)
+    assert classify("a,b\n1,2\n".encode("utf-8"), "data.csv") == ("text/csv", True)
+    assert classify("テキスト".encode("utf-16"), "utf16.txt") == ("text/plain", True)
+
+
+def test_classify_many_keeps_order(config):
+    data = [("a.pdf", PDF_HEAD), ("b.txt", b"plain text\n"), ("c.docx", docx_bytes())]
+    results = DocumentClassifier.classify_many([(name, lambda d=d: io.BytesIO(d)) for name, d in data])
+    assert [result[0] for result in results] == ["application/pdf", "text/plain", DOCX_MIME]
+    assert all(result[2] is None for result in results)
@@ -0,0 +1,36 @@
+import asyncio
+import io
+
+from file_util.util.encoding_util import EncodingUtil
+from file_util.util.file_util import FileUtil
+
+
+def test_detect_ascii_only_is_utf8():
+    result = EncodingUtil.detect(b"plain ascii text\n")
+    assert result.encoding == "utf-8"
+    assert result.method == "ascii"
+
+
+def test_detect_empty():
+    assert EncodingUtil.detect(b"").encoding is None
+
+
+def test_detect_bom_and_utf8():
+    assert EncodingUtil.detect("テキスト".encode("utf-8-sig")).encoding == "UTF-8-SIG"
+    assert EncodingUtil.detect(b"abc" + "日本語".encode("utf-8")).encoding == "utf-8"
+
+
+def test_detect_stream_beyond_scan_limit_is_utf8():
+    data = b"a" * 200 * 1024 + "日本語テキスト".encode("utf-8")
+    result = EncodingUtil.detect_stream(io.BytesIO(data), max_sample_bytes=4096, max_scan_bytes=65536)
+    assert result.encoding == "utf-8"
+    assert data.decode(result.encoding).endswith("日本語テキスト")
+
+
+def test_extract_keeps_text_after_scan_limit(tmp_path, config, monkeypatch):
+    monkeypatch.setattr(config, "encoding_max_scan_bytes", 65536)
+    path = tmp_path / "long.txt"
+    path.write_bytes(b"a" * 200 * 1024 + "日本語テキスト".encode("utf-8"))
+    text = asyncio.run(FileUtil.extract_text_from_file_async(str(path)))
+    assert text.endswith("日本語テキスト")
+    assert text.count("a") == 200 * 1024
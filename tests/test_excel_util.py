@@ -0,0 +1,60 @@
+import io
+import zipfile
+
+import openpyxl
+import pytest
+
+from file_util.util.excel_util import ExcelUtil
+
+STRICT_NS = "http://purl.oclc.org/ooxml/spreadsheetml/main"
+TRANSITIONAL_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    wb.active.title = "売上"
+    for row in range(1, 11):
+        wb.active.append([f"r{row}", row, None, "x"])
+    other = wb.create_sheet("経費")
+    other.append(["交通費", 100])
+    path = tmp_path / "book.xlsx"
+    wb.save(path)
+    return path
+
+
+def to_strict(path, tmp_path):
+    # workbook.xmlの名前空間をStrictに置き換える
+    strict_path = tmp_path / "strict.xlsx"
+    with zipfile.ZipFile(path) as source, zipfile.ZipFile(strict_path, "w") as target:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename == "xl/workbook.xml":
+                data = data.replace(TRANSITIONAL_NS.encode(), STRICT_NS.encode())
+            target.writestr(info, data)
+    return strict_path
+
+
+def test_sheet_names(workbook, tmp_path):
+    assert ExcelUtil.get_sheet_names(str(workbook)) == ["売上", "経費"]
+    assert ExcelUtil.get_sheet_names(str(to_strict(workbook, tmp_path))) == ["売上", "経費"]
+    assert ExcelUtil.get_sheet_names(io.BytesIO(workbook.read_bytes())) == ["売上", "経費"]
+
+
+def test_rows(workbook):
+    rows = list(ExcelUtil.iter_rows_from_sheet(str(workbook)))
+    assert rows[0] == ("売上", 1, "r1\t1\tx")
+    assert rows[-1] == ("経費", 1, "交通費\t100")
+    assert len(rows) == 11
+    assert ExcelUtil.extract_text_from_sheet(str(workbook), "経費") == "交通費\t100\n"
+    assert ExcelUtil.extract_text_from_sheet(str(workbook), "売上", max_rows=2, columns=["A", "D"]) == "r1\tx\nr2\tx\n"
+
+
+def test_max_rows_counts_from_the_start_row(workbook):
+    rows = list(ExcelUtil.iter_rows_from_sheet(str(workbook), "売上", max_rows=3, start_sheet="売上", start_row=5))
+    assert [(number, line) for _, number, line in rows] == [(5, "r5\t5\tx"), (6, "r6\t6\tx"), (7, "r7\t7\tx")]
+
+
+def test_resume_from_sheet_and_row(workbook):
+    rows = list(ExcelUtil.iter_rows_from_sheet(str(workbook), start_sheet="売上", start_row=10))
+    assert [(sheet, number) for sheet, number, _ in rows] == [("売上", 10), ("経費", 1)]
@@ -0,0 +1,59 @@
+import asyncio
+import io
+import os
+
+import docx
+
+from file_util.config.file_util_config import FileUtilConfig
+from file_util.util.executor_util import ExecutorUtil
+from file_util.util.file_util import FileUtil
+
+
+def make_docx_bytes(text):
+    document = docx.Document()
+    document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_process_pool_is_opt_in(monkeypatch):
+    monkeypatch.delenv("EXECUTOR_PROCESS_WORKERS", raising=False)
+    assert FileUtilConfig().executor_process_workers == 0
+
+
+def test_bytes_are_not_sent_to_the_process_pool(config, monkeypatch):
+    monkeypatch.setattr(config, "executor_process_workers", 2)
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("in-memory data must not be pickled to a worker process")
+
+    monkeypatch.setattr(ExecutorUtil, "run_in_process", fail)
+    text = asyncio.run(FileUtil.extract_text_from_bytes_async(make_docx_bytes("メモリ上の文書"), "docx"))
+    assert "メモリ上の文書" in text
+
+
+def test_iter_in_thread_closes_the_iterator():
+    closed = []
+
+    def numbers():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    async def take_three():
+        values = []
+        async for value in ExecutorUtil.iter_in_thread("test", numbers()):
+            values.append(value)
+            if len(values) == 3:
+                break
+        return values
+
+    assert asyncio.run(take_three()) == [0, 1, 2]
+    assert closed == [True]
+
+
+def test_run_in_thread_records_stats():
+    assert asyncio.run(ExecutorUtil.run_in_thread("test-stats", os.path.join, "a", "b")) == os.path.join("a", "b")
+    assert ExecutorUtil.get_stats()["test-stats"]["completed"] >= 1
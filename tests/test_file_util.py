@@ -0,0 +1,42 @@
+import asyncio
+import base64
+
+import pytest
+
+from file_util.util.cache_util import ExtractionCache
+from file_util.util.file_util import FileUtil
+
+DATA = "見出し\n本文です。\n".encode("utf-8")
+
+
+@pytest.fixture
+def cache(tmp_path, config, monkeypatch):
+    monkeypatch.setattr(config, "extraction_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr("file_util.util.cache_util.ExtractionCache._ExtractionCache__instance", None)
+    return ExtractionCache.get_instance()
+
+
+async def stream(data, size=4):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def test_bytes_base64_and_stream_share_cache_entries(cache):
+    text = asyncio.run(FileUtil.extract_text_from_bytes_async(DATA, "txt"))
+    assert "本文です。" in text
+    assert cache.get_stats()["hits"] == 0
+
+    assert asyncio.run(FileUtil.extract_base64_to_text("txt", base64.b64encode(DATA).decode())) == text
+    assert asyncio.run(FileUtil.extract_text_from_stream_async(stream(DATA), "txt")).text == text
+    assert asyncio.run(FileUtil.extract_text_from_bytes_async(DATA, "txt")) == text
+    assert cache.get_stats()["hits"] == 3
+
+
+@pytest.mark.parametrize("spool_max_bytes", [0, 1024])
+def test_stream_is_cached_in_memory_and_spooled(cache, config, monkeypatch, spool_max_bytes):
+    monkeypatch.setattr(config, "upload_spool_max_bytes", spool_max_bytes)
+    first = asyncio.run(FileUtil.extract_text_from_stream_async(stream(DATA), "txt"))
+    second = asyncio.run(FileUtil.extract_text_from_stream_async(stream(DATA), "txt"))
+    assert first.text == second.text and "見出し" in first.text
+    assert second.size == len(DATA)
+    assert cache.get(ExtractionCache.hash_bytes(DATA)).text == first.text
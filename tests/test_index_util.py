@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+from file_util.util.file_util import FileUtil
+from file_util.util.index_util import IndexManifest, IndexManifestEntry
+
+
+def entry(path, content_hash, manifest):
+    return IndexManifestEntry(path, 1, 1, content_hash, "text/plain", manifest.get_text_path(content_hash))
+
+
+def test_shared_text_is_kept_until_the_run_ends(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest"))
+    try:
+        manifest.put_entries("/root", [entry("/root/a.txt", "x" * 64, manifest)])
+        text_x = manifest.write_text("x" * 64, "X")
+        # 新しいファイルBはAと同じ内容のためテキストを書き込まない
+        assert manifest.write_text("x" * 64, "X") == text_x
+        # Bを記録する前にAの内容が変わる
+        stale = manifest.put_entries("/root", [entry("/root/a.txt", "y" * 64, manifest)])
+        assert os.path.exists(text_x)
+        stale |= manifest.put_entries("/root", [entry("/root/b.txt", "x" * 64, manifest)])
+        assert manifest.remove_unreferenced_texts(stale) == 0
+        assert os.path.exists(text_x)
+
+        stale = manifest.delete_entries(["/root/b.txt"])
+        assert manifest.remove_unreferenced_texts(stale) == 1
+        assert not os.path.exists(text_x)
+    finally:
+        manifest.close()
+
+
+def test_index_directory_shares_and_removes_texts(tmp_path, config, monkeypatch):
+    monkeypatch.setattr(FileUtil, "INDEX_BATCH_SIZE", 1)
+    root = tmp_path / "docs"
+    root.mkdir()
+    manifest_dir = str(tmp_path / "manifest")
+    (root / "a.txt").write_text("first version\n", encoding="utf-8")
+    report = asyncio.run(FileUtil.index_directory_async(str(root), manifest_dir))
+    assert report.new == 1
+
+    (root / "a.txt").write_text("second version\n", encoding="utf-8")
+    (root / "b.txt").write_text("first version\n", encoding="utf-8")
+    report = asyncio.run(FileUtil.index_directory_async(str(root), manifest_dir))
+    assert (report.new, report.changed) == (1, 1)
+    paths = {os.path.basename(e.file_path): e.text_path for e in report.entries}
+    with open(paths["b.txt"], encoding="utf-8") as f:
+        assert f.read().strip() == "first version"
+
+    (root / "b.txt").unlink()
+    report = asyncio.run(FileUtil.index_directory_async(str(root), manifest_dir))
+    assert report.deleted == 1 and report.unchanged == 1
+    assert not os.path.exists(paths["b.txt"])
+    assert os.path.exists(paths["a.txt"])
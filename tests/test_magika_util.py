@@ -0,0 +1,73 @@
+import io
+import zipfile
+
+import pytest
+
+from file_util.util.magika_util import MagikaUtil
+
+SAMPLES = [
+    b"",
+    b"short",
+    b"#!/usr/bin/env python3\nimport sys\n\n" + b"def main():\n    print(sys.argv)\n\n" * 60,
+    b"<html><head><title>t</title></head><body>" + b"<p>hello world</p>\n" * 200 + b"</body></html>",
+    b'{"items": [' + b",".join(b'{"id": %d, "name": "n%d"}' % (i, i) for i in range(200)) + b"]}",
+]
+
+
+def zip_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("a.txt", "text " * 1000)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def samples():
+    return SAMPLES + [zip_bytes()]
+
+
+def closing_streams(samples):
+    # 次のストリームを要求された時点で前のストリームを閉じる
+    for data in samples:
+        with io.BytesIO(data) as stream:
+            yield stream
+
+
+def labels(results):
+    return [result.output.label if result is not None else None for result in results]
+
+
+def expected(samples):
+    return labels(MagikaUtil.identify_bytes(data) for data in samples)
+
+
+@pytest.fixture
+def batch_supported(monkeypatch):
+    monkeypatch.setattr(MagikaUtil, "_MagikaUtil__batch_supported", None)
+
+
+def test_batches_match_single_identification(samples, batch_supported, config):
+    assert labels(MagikaUtil.identify_streams(closing_streams(samples), batch_size=2)) == expected(samples)
+
+
+def test_failed_batch_is_identified_one_by_one(samples, batch_supported, config, monkeypatch):
+    magika = MagikaUtil.get_magika()
+    get_results = magika._get_results_from_features
+
+    def fail_batches(features):
+        # identify_streamによる1件ずつの判定は成功させる
+        if len(features) > 1:
+            raise RuntimeError("inference failed")
+        return get_results(features)
+
+    monkeypatch.setattr(magika, "_get_results_from_features", fail_batches)
+    results = MagikaUtil.identify_streams(closing_streams(samples), batch_size=2)
+    assert labels(results) == expected(samples)
+    assert all(result is not None for result in results)
+
+
+def test_unreadable_stream_returns_none(batch_supported, config):
+    closed = io.BytesIO(b"data")
+    closed.close()
+    results = MagikaUtil.identify_streams([closed, io.BytesIO(SAMPLES[2])])
+    assert results[0] is None and results[1] is not None
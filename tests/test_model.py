@@ -0,0 +1,42 @@
+from file_util.model import FileUtilDocument, FileUtilDocumentHandle, FileUtilDocumentType
+
+TEXT = "こんにちは、世界\n".encode("utf-8") * 10
+
+
+def test_document_keeps_data_as_a_field(config):
+    data = bytes(TEXT)
+    document = FileUtilDocument(data=data, identifier="a.txt")
+    assert document.data is data
+    assert "data" in FileUtilDocument.model_fields
+    assert document.model_dump() == {"identifier": "a.txt", "data": data}
+    assert document.mime_type == "text/plain" and document.encoding == "utf-8"
+    assert document.get_document_type() == FileUtilDocumentType.TEXT
+    assert document.is_data_loaded()
+
+
+def test_buffers_are_not_copied(config):
+    view = memoryview(bytearray(TEXT))
+    document = FileUtilDocument(data=view, identifier="a.txt")
+    assert document.data is view and document.handle.data is view
+    with document.open_data() as f:
+        assert f.read() == TEXT
+
+
+def test_header_only_document(tmp_path, config):
+    path = tmp_path / "a.txt"
+    path.write_bytes(TEXT)
+    document = FileUtilDocument.from_file(str(path), header_only=True)
+    assert document.data == b"" and not document.is_data_loaded()
+    assert document.mime_type == "text/plain"
+    assert bytes(document.read_data()) == TEXT
+    assert FileUtilDocument.from_file(str(path)).data == TEXT
+
+
+def test_handle_identifies_once(tmp_path, config):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    handle = FileUtilDocumentHandle(str(path))
+    assert not handle.is_identified()
+    assert handle.identify() == ("application/pdf", None)
+    assert handle.is_identified() and handle.get_document_type() == FileUtilDocumentType.PDF
+    assert FileUtilDocumentHandle(str(tmp_path / "missing.txt")).identify() == ("", None)
@@ -0,0 +1,79 @@
+import io
+
+import docx
+import pptx
+import pytest
+from docx.shared import Inches
+
+from file_util.util.ooxml_util import OOXMLUtil
+from file_util.util.ppt_util import PPTUtil
+from file_util.util.word_util import WordUtil
+
+
+def save(document) -> io.BytesIO:
+    buffer = io.BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def docx_file():
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "ヘッダー"
+    document.add_paragraph("第1段落")
+    paragraph = document.add_paragraph("Name\tValue")
+    # タブ位置の定義(w:pPr/w:tabs/w:tab)はタブ文字として出力しない
+    paragraph.paragraph_format.tab_stops.add_tab_stop(Inches(1))
+    paragraph.paragraph_format.tab_stops.add_tab_stop(Inches(2))
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "A1"
+    table.cell(0, 1).text = "B1"
+    document.sections[0].footer.paragraphs[0].text = "フッター"
+    return save(document)
+
+
+@pytest.fixture
+def pptx_file():
+    presentation = pptx.Presentation()
+    for title in ("FIRST", "SECOND", "THIRD"):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = title
+    # 3枚目のスライドを先頭に移動する。ファイル名(slide3.xml)の順と表示順が異なる
+    slide_ids = presentation.slides._sldIdLst
+    third = list(slide_ids)[2]
+    slide_ids.remove(third)
+    slide_ids.insert(0, third)
+    return save(presentation)
+
+
+def test_docx_text(docx_file):
+    lines = OOXMLUtil.extract_text_from_docx(docx_file).splitlines()
+    assert lines == ["ヘッダー", "第1段落", "Name\tValue", "A1\tB1", "フッター"]
+
+
+def test_docx_paragraphs_match_python_docx(docx_file):
+    ooxml = OOXMLUtil.extract_text_from_docx(docx_file)
+    docx_file.seek(0)
+    for line in WordUtil.extract_text_from_docx(docx_file, engine="python-docx").splitlines():
+        assert line in ooxml
+
+
+def test_pptx_slides_follow_presentation_order(pptx_file):
+    slides = list(OOXMLUtil.iter_slides_from_pptx(pptx_file))
+    assert slides == [(1, ["THIRD"]), (2, ["FIRST"]), (3, ["SECOND"])]
+    pptx_file.seek(0)
+    assert OOXMLUtil.extract_text_from_pptx(pptx_file) == PPTUtil.extract_text_from_pptx(
+        io.BytesIO(pptx_file.getvalue()), engine="python-pptx")
+
+
+def test_pptx_start_slide(pptx_file):
+    assert list(OOXMLUtil.iter_slides_from_pptx(pptx_file, start_slide=3)) == [(3, ["SECOND"])]
+
+
+def test_extractor_setting_selects_engine(docx_file, config, monkeypatch):
+    monkeypatch.setattr(config, "word_extractor", "ooxml")
+    assert "フッター" in WordUtil.extract_text_from_docx(docx_file)
+    docx_file.seek(0)
+    monkeypatch.setattr(config, "word_extractor", "python-docx")
+    assert "フッター" not in WordUtil.extract_text_from_docx(docx_file)
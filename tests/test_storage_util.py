@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from file_util.core.app import extract_text_from_directory
+from file_util.util.storage_util import FileStorage, LocalStorage, MemoryStorage, SMBStorage, StorageUtil
+from tests.smb_stub import InMemorySMBClient
+
+
+@pytest.fixture
+def smb_client(config, monkeypatch):
+    client = InMemorySMBClient()
+    client.put("\\\\fileserver\\docs\\notes\\a.txt", "議事録 A\n".encode("utf-8"))
+    client.put("\\\\fileserver\\docs\\notes\\b.txt", "議事録 B\n".encode("utf-8"))
+    client.put("\\\\fileserver\\docs\\notes\\sub\\c.txt", "議事録 C\n".encode("utf-8"))
+    client.put("\\\\fileserver\\docs\\readme.md", b"# README\n")
+    monkeypatch.setattr(config, "smb_cifs_server", "fileserver")
+    monkeypatch.setattr(config, "smb_cifs_share", "docs")
+    storage = SMBStorage("fileserver", "docs", client=client)
+    StorageUtil.register_storage(StorageUtil.SMB_PREFIX, storage)
+    yield client
+    StorageUtil.unregister_storage(StorageUtil.SMB_PREFIX)
+
+
+def test_file_storage_is_abstract():
+    with pytest.raises(TypeError):
+        FileStorage()
+
+
+def test_local_storage_reads_ranges(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(bytes(range(100)))
+    storage = LocalStorage()
+    assert storage.read_range(str(path), 10, 5) == bytes(range(10, 15))
+    assert storage.read_range(str(path), -3, 10) == bytes([97, 98, 99])
+    assert storage.read_bytes(str(path)) == bytes(range(100))
+    stats = storage.get_stats()
+    assert stats["opens"] == 3 and stats["bytes_read"] == 5 + 3 + 100
+
+
+def test_memory_storage():
+    storage = MemoryStorage()
+    storage.put("mem://box/dir/a.txt", b"alpha")
+    storage.put("mem://box/dir/sub/b.txt", b"beta")
+    with storage.open("mem://box/dir/a.txt") as f:
+        assert f.read() == b"alpha"
+    assert storage.stat("mem://box/dir/a.txt").st_size == 5
+    assert storage.stat("mem://box/dir").st_mode & 0o040000
+    entries = {entry.name: entry for entry in storage.scandir("mem://box/dir")}
+    assert sorted(entries) == ["a.txt", "sub"]
+    assert entries["sub"].is_dir() and entries["sub"].path == "mem://box/dir/sub"
+    assert entries["a.txt"].path == "mem://box/dir/a.txt" and entries["a.txt"].stat().st_size == 5
+    with pytest.raises(ValueError):
+        storage.open("mem://box/dir/a.txt", "wb")
+    storage.remove("mem://box/dir/a.txt")
+    with pytest.raises(FileNotFoundError):
+        storage.open("mem://box/dir/a.txt")
+    with pytest.raises(FileNotFoundError):
+        storage.scandir("mem://box/missing")
+
+
+def test_storage_util_routing(tmp_path, config, monkeypatch):
+    assert isinstance(StorageUtil.get_storage(str(tmp_path)), LocalStorage)
+    assert StorageUtil.get_storage("mem://box/a.txt") is StorageUtil.get_memory_storage()
+    assert StorageUtil.is_remote("smb://server/share/a.txt") and not StorageUtil.is_remote(str(tmp_path))
+    with pytest.raises(ValueError):
+        StorageUtil.get_storage("ftp://server/a.txt")
+
+    StorageUtil.get_memory_storage().put("mem://box/a.txt", b"0123456789")
+    try:
+        assert StorageUtil.read_range("mem://box/a.txt", 2, 3) == b"234"
+        assert StorageUtil.stat("mem://box/a.txt").st_size == 10
+        assert StorageUtil.get_stats()["mem://"]["opens"] >= 1
+    finally:
+        StorageUtil.get_memory_storage().remove("mem://box/a.txt")
+
+    monkeypatch.setattr(config, "enable_smb_cifs", False)
+    StorageUtil.unregister_storage(StorageUtil.SMB_PREFIX)
+    with pytest.raises(ValueError):
+        StorageUtil.get_storage("smb://server/share/a.txt")
+
+    storage = MemoryStorage()
+    StorageUtil.register_storage("test://", storage)
+    try:
+        assert StorageUtil.get_storage("test://a") is storage
+    finally:
+        StorageUtil.unregister_storage("test://")
+
+
+def test_smb_storage_paths(smb_client):
+    storage = StorageUtil.get_storage("smb://fileserver/docs/readme.md")
+    assert storage.to_unc_path("smb://fileserver/docs/notes/a.txt") == ("fileserver", "\\\\fileserver\\docs\\notes\\a.txt")
+    assert storage.to_unc_path("smb:///notes/a.txt") == ("fileserver", "\\\\fileserver\\docs\\notes\\a.txt")
+    with pytest.raises(ValueError):
+        storage.to_unc_path("smb://fileserver")
+
+    with StorageUtil.open("smb://fileserver/docs/readme.md") as f:
+        assert f.read() == b"# README\n"
+    assert StorageUtil.stat("smb:///readme.md").st_size == 9
+    entries = {entry.name: entry for entry in storage.scandir("smb://fileserver/docs/notes")}
+    assert sorted(entries) == ["a.txt", "b.txt", "sub"]
+    assert entries["a.txt"].path == "smb://fileserver/docs/notes/a.txt"
+    assert entries["sub"].is_dir()
+
+
+def test_smb_batch_reuses_one_session(smb_client):
+    results = asyncio.run(extract_text_from_directory("smb://fileserver/docs"))
+    texts = {result.file_path: result.text for result in results}
+    assert not [result.error for result in results if result.error]
+    assert texts["smb://fileserver/docs/notes/sub/c.txt"].strip() == "議事録 C"
+    assert len(texts) == 4
+    stats = smb_client.get_stats()
+    assert stats["sessions"] == 1
+    assert stats["requests"] > len(texts)
@@ -0,0 +1,69 @@
+import asyncio
+import random
+
+import pytest
+
+from file_util.util.file_util import FileUtil
+from file_util.util.text_sanitizer import TextSanitizer
+
+SAMPLE = "ﾃｷｽﾄ  と　全角\t\tタブ\r\n\r\n\r\n改行がな ＡＢＣ１２３  \n\n\n末尾   "
+
+
+def sanitize_in_pieces(sanitizer, text, seed):
+    rng = random.Random(seed)
+    output, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 5)
+        output.append(sanitizer.feed(text[position:position + size]))
+        position += size
+    output.append(sanitizer.finish())
+    return "".join(output)
+
+
+def test_normalize_rules():
+    assert TextSanitizer.normalize_rules(["NFKC", " crlf", "nfkc", ""]) == ("crlf", "nfkc")
+    assert TextSanitizer.normalize_rules([]) == ()
+    with pytest.raises(ValueError):
+        TextSanitizer.normalize_rules(["unknown"])
+
+
+def test_default_rules_collapse_newlines_and_spaces():
+    assert TextSanitizer().sanitize("a  b\n\n\nc") == "a b\nc"
+
+
+@pytest.mark.parametrize("rules", [(), ("crlf",), ("whitespace",), ("nfkc",), ("crlf", "whitespace", "nfkc")])
+def test_chunked_equals_whole(rules):
+    whole = TextSanitizer(rules).sanitize(SAMPLE)
+    for seed in range(20):
+        assert sanitize_in_pieces(TextSanitizer(rules), SAMPLE, seed) == whole
+
+
+def test_rules():
+    assert TextSanitizer(["crlf"]).sanitize("a\r\n\r\nb\rc") == "a\nb\nc"
+    assert TextSanitizer(["whitespace"]).sanitize("a\t　b") == "a b"
+    # 結合文字(濁点)は直前の文字と合成する
+    assert TextSanitizer(["nfkc"]).sanitize("ＡＢＣ が") == "ABC が"
+
+
+def test_state_round_trip():
+    first = TextSanitizer(["crlf", "nfkc"])
+    head = first.feed("abc\r")
+    second = TextSanitizer(["crlf", "nfkc"])
+    second.set_state(first.get_state())
+    assert head + second.feed("\nか") + second.feed("゙") + second.finish() == "abc\nが"
+
+
+def test_cached_text_follows_the_rules(tmp_path, config, monkeypatch):
+    monkeypatch.setattr(config, "extraction_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr("file_util.util.cache_util.ExtractionCache._ExtractionCache__instance", None)
+    path = tmp_path / "a.txt"
+    path.write_text("ＡＢＣ\r\n", encoding="utf-8")
+
+    def extract():
+        return asyncio.run(FileUtil.extract_text_from_file_async(str(path)))
+
+    assert extract().strip() == "ＡＢＣ"
+    monkeypatch.setattr(config, "text_sanitize_rules", ["nfkc"])
+    assert extract().strip() == "ABC"
+    monkeypatch.setattr(config, "text_sanitize_rules", [])
+    assert extract().strip() == "ＡＢＣ"
@@ -0,0 +1,105 @@
+import os
+import random
+import zipfile as stdlib_zipfile
+import zlib
+
+import pytest
+import pyzipper
+
+from file_util.util.zip_util import ZipUtil
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    root = tmp_path / "src"
+    (root / "docs" / "sub").mkdir(parents=True)
+    (root / "docs" / "a.txt").write_text("テキスト\n" * 1000, encoding="utf-8")
+    (root / "docs" / "sub" / "b.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    (root / "docs" / "empty.txt").write_bytes(b"")
+    # チャンクサイズを超える、圧縮しにくいデータ
+    rng = random.Random(0)
+    (root / "docs" / "large.bin").write_bytes(bytes(rng.getrandbits(8) for _ in range(ZipUtil.CHUNK_SIZE * 2 + 123)))
+    (root / "docs" / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 5000)
+    return root / "docs"
+
+
+def read_sources(source_dir):
+    sources = {}
+    for dirpath, _, files in os.walk(source_dir):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            arcname = os.path.relpath(path, os.path.dirname(source_dir)).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                sources[arcname] = f.read()
+    return sources
+
+
+def assert_round_trip(output_zip, sources, password=None):
+    # pyzipperと標準ライブラリのzipfileの両方で、CRC-32と内容を確認する
+    readers = [pyzipper.AESZipFile] if password else [pyzipper.ZipFile, stdlib_zipfile.ZipFile]
+    for reader in readers:
+        with reader(output_zip) as zip_ref:
+            if password:
+                zip_ref.setpassword(password.encode())
+            assert zip_ref.testzip() is None
+            assert sorted(zip_ref.namelist()) == sorted(sources)
+            for info in zip_ref.infolist():
+                data = zip_ref.read(info)
+                assert data == sources[info.filename]
+                # AES(AE-2)のメンバーはCRC-32の代わりにHMACで検証する
+                if not password:
+                    assert info.CRC == zlib.crc32(sources[info.filename])
+                assert info.file_size == len(data)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("level", [None, 6])
+def test_create_zip_round_trip(tmp_path, source_dir, config, workers, level):
+    output_zip = str(tmp_path / "out.zip")
+    assert ZipUtil.create_zip([str(source_dir)], output_zip, max_workers=workers, compression_level=level)
+    sources = read_sources(source_dir)
+    assert_round_trip(output_zip, sources)
+    with pyzipper.ZipFile(output_zip) as zip_ref:
+        types = {info.filename: info.compress_type for info in zip_ref.infolist()}
+    expected = pyzipper.ZIP_STORED if level is None else pyzipper.ZIP_DEFLATED
+    assert types["docs/a.txt"] == expected
+    # 圧縮済みの形式は格納のみとする
+    assert types["docs/image.png"] == pyzipper.ZIP_STORED
+
+
+def test_create_zip_with_public_api_fallback(tmp_path, source_dir, config, monkeypatch):
+    monkeypatch.setattr(ZipUtil, "_ZipUtil__can_write_compressed", classmethod(lambda cls, zip_ref: False))
+    output_zip = str(tmp_path / "out.zip")
+    assert ZipUtil.create_zip([str(source_dir)], output_zip, max_workers=4, compression_level=6)
+    assert_round_trip(output_zip, read_sources(source_dir))
+
+
+def test_create_zip_with_password(tmp_path, source_dir, config):
+    output_zip = str(tmp_path / "out.zip")
+    assert ZipUtil.create_zip([str(source_dir)], output_zip, password="secret")
+    sources = read_sources(source_dir)
+    assert_round_trip(output_zip, sources, password="secret")
+    with pyzipper.AESZipFile(output_zip) as zip_ref:
+        assert all(info.flag_bits & 0x1 for info in zip_ref.infolist())
+
+    extract_to = tmp_path / "extracted"
+    assert ZipUtil.extract_zip(output_zip, str(extract_to), password="secret")
+    assert (extract_to / "docs" / "sub" / "b.csv").read_bytes() == sources["docs/sub/b.csv"]
+    assert ZipUtil.read_zip_member(output_zip, "docs/a.txt", password="secret") == sources["docs/a.txt"]
+
+
+def test_extract_and_read_members(tmp_path, source_dir, config):
+    output_zip = str(tmp_path / "out.zip")
+    ZipUtil.create_zip([str(source_dir)], output_zip, max_workers=4, compression_level=6)
+    sources = read_sources(source_dir)
+
+    extract_to = tmp_path / "extracted"
+    assert ZipUtil.extract_zip(output_zip, str(extract_to), max_workers=3)
+    for arcname, data in sources.items():
+        assert (extract_to / arcname).read_bytes() == data
+
+    assert sorted(ZipUtil.list_zip_contents(output_zip)) == sorted(sources)
+    assert ZipUtil.read_zip_member(output_zip, "docs/sub/b.csv") == sources["docs/sub/b.csv"]
+    assert ZipUtil.list_zip_members(output_zip, pattern="docs/*.txt").total == 2
+    members = {name: data for name, data, error in ZipUtil.iter_member_data(output_zip) if error is None}
+    assert members == sources